@@ -0,0 +1,128 @@
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Long-lived processes (the app) re-run eviction after this many writes or seconds since the last pass
+EVICT_EVERY_WRITES = 100
+EVICT_INTERVAL_SECONDS = 3600
+
+
+def make_cache_key(kind, model, prompt_version, content):
+    """Content-addressed key for a model response"""
+    digest = hashlib.sha256()
+    for part in (kind, model, prompt_version, content):
+        digest.update(str(part).encode('utf-8'))
+        digest.update(b'\x1f')
+    return digest.hexdigest()
+
+
+class AICache:
+    """Persistent SQLite cache of model responses keyed on (kind, model, prompt version, content).
+
+    Entries older than max_age_days are evicted, and the least recently used
+    entries are dropped once the stored values exceed max_bytes. Eviction runs
+    on open and again every EVICT_EVERY_WRITES writes or EVICT_INTERVAL_SECONDS.
+    """
+
+    def __init__(self, path, max_age_days=30, max_bytes=200 * 1024 * 1024):
+        self.path = path
+        self.max_age_seconds = max_age_days * 86400
+        self.max_bytes = max_bytes
+        self.stats = {}
+        self._lock = threading.Lock()
+        self._writes_since_evict = 0
+        self._evicted_at = 0.0
+
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS entries (
+                key TEXT PRIMARY KEY,
+                kind TEXT NOT NULL,
+                value TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed_at)")
+        self._conn.commit()
+        self.evict()
+
+    def _count(self, kind, outcome):
+        kind_stats = self.stats.setdefault(kind, {'hits': 0, 'misses': 0})
+        kind_stats[outcome] += 1
+
+    def get(self, kind, model, prompt_version, content):
+        """Return the cached value or None, updating hit/miss counters"""
+        key = make_cache_key(kind, model, prompt_version, content)
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, created_at FROM entries WHERE key = ?", (key,)).fetchone()
+            if row is None or time.time() - row[1] > self.max_age_seconds:
+                self._count(kind, 'misses')
+                return None
+
+            self._conn.execute("UPDATE entries SET accessed_at = ? WHERE key = ?", (time.time(), key))
+            self._conn.commit()
+            self._count(kind, 'hits')
+        return json.loads(row[0])
+
+    def put(self, kind, model, prompt_version, content, value):
+        """Store a value for the given inputs"""
+        key = make_cache_key(kind, model, prompt_version, content)
+        serialized = json.dumps(value)
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO entries (key, kind, value, size, created_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (key, kind, serialized, len(serialized), now, now))
+            self._conn.commit()
+            self._writes_since_evict += 1
+            due = (self._writes_since_evict >= EVICT_EVERY_WRITES
+                   or now - self._evicted_at >= EVICT_INTERVAL_SECONDS)
+
+        if due:
+            self.evict()
+
+    def evict(self):
+        """Drop expired entries, then least recently used ones until under the size budget"""
+        with self._lock:
+            self._writes_since_evict = 0
+            self._evicted_at = time.time()
+            cutoff = self._evicted_at - self.max_age_seconds
+            expired = self._conn.execute("DELETE FROM entries WHERE created_at < ?", (cutoff,)).rowcount
+
+            total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+            dropped = 0
+            if total > self.max_bytes:
+                rows = self._conn.execute("SELECT key, size FROM entries ORDER BY accessed_at").fetchall()
+                stale_keys = []
+                for key, size in rows:
+                    if total <= self.max_bytes:
+                        break
+                    stale_keys.append((key,))
+                    total -= size
+                self._conn.executemany("DELETE FROM entries WHERE key = ?", stale_keys)
+                dropped = len(stale_keys)
+            self._conn.commit()
+
+        if expired or dropped:
+            logger.info(f"🧹 AI cache evicted {expired} expired and {dropped} least recently used entries")
+
+    def summary(self):
+        """One-line description of hit/miss counters"""
+        parts = [f"{kind}: {s['hits']} hits / {s['misses']} misses" for kind, s in sorted(self.stats.items())]
+        return ", ".join(parts) if parts else "no lookups"
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -1,94 +1,182 @@
-import google.generativeai as genai
+import threading
 import time
 import logging
-import re
+from collections import OrderedDict
 
-from config import perplexity_client
+from ai_cache import AICache
+from metrics import metrics
+from config import (get_genai, get_perplexity_client, AI_CACHE_ENABLED, AI_CACHE_PATH, AI_CACHE_MAX_AGE_DAYS, AI_CACHE_MAX_MB,
+                    EMBED_BATCH_SIZE, QUERY_EMBED_CACHE_SIZE)
 from text_utils import clean_perplexity_summary, ensure_complete_sentences
+from tts_rules import preprocess_for_tts
 
 logger = logging.getLogger(__name__)
 
+EMBEDDING_MODEL = 'models/embedding-001'
+SUMMARY_MODEL = 'sonar-pro'
 
-def preprocess_for_tts(text):
-    """Preprocess text to make it more TTS-friendly"""
-    # Handle version numbers (e.g., "2. 5" -> "2.5")
-    text = re.sub(r'(\d+)\.\s+(\d+)', r'\1.\2', text)
+# Bump when the summary prompt or post-processing changes so cached summaries are regenerated
+SUMMARY_PROMPT_VERSION = 'v1'
+EMBEDDING_TASK_TYPE = 'retrieval_document'
 
-    # Handle decimal numbers with spaces (e.g., "3. 14" -> "3.14")
-    text = re.sub(r'(\d+)\.\s+(\d+)', r'\1.\2', text)
+# Returned by summarize_content when every attempt failed
+SUMMARY_UNAVAILABLE = "Summary not available"
+QUERY_TASK_TYPE = 'retrieval_query'
 
-    # Handle model names with spaces (e.g., "GPT 4" -> "GPT-4")
-    text = re.sub(r'\b([A-Z]+)\s+(\d+(?:\.\d+)?)\b', r'\1-\2', text)
+_ai_cache = None
+_ai_cache_lock = threading.Lock()
 
-    # Handle common abbreviations that might have spaces
-    text = re.sub(r'\bA\.\s*I\.\b', 'AI', text)
-    text = re.sub(r'\bU\.\s*S\.\b', 'US', text)
-    text = re.sub(r'\bU\.\s*K\.\b', 'UK', text)
+# Normalized search query -> embedding, most recently used last
+_query_embeddings = OrderedDict()
+_query_lock = threading.Lock()
 
-    # Handle acronyms with periods and spaces (e.g., "N. A. S. A." -> "NASA")
-    text = re.sub(r'\b([A-Z])\.\s*([A-Z])\.\s*([A-Z])\.\s*([A-Z])\.\b', r'\1\2\3\4', text)
-    text = re.sub(r'\b([A-Z])\.\s*([A-Z])\.\s*([A-Z])\.\b', r'\1\2\3', text)
 
-    # Handle company names with periods (e.g., "Inc." -> "Incorporated")
-    text = re.sub(r'\bInc\.\b', 'Incorporated', text)
-    text = re.sub(r'\bLtd\.\b', 'Limited', text)
-    text = re.sub(r'\bCorp\.\b', 'Corporation', text)
+def get_ai_cache():
+    """Return the shared response cache, or None when caching is disabled"""
+    global _ai_cache
+    if _ai_cache is None and AI_CACHE_ENABLED:
+        # Stage workers call this from several threads at once; only one may open the cache
+        with _ai_cache_lock:
+            if _ai_cache is None:
+                try:
+                    _ai_cache = AICache(AI_CACHE_PATH, AI_CACHE_MAX_AGE_DAYS, int(AI_CACHE_MAX_MB * 1024 * 1024))
+                except Exception as e:
+                    logger.warning(f"AI cache unavailable, continuing without it: {e}")
+                    return None
+    return _ai_cache
 
-    # Handle common technical terms
-    text = re.sub(r'\bAPI\b', 'A-P-I', text)  # Some TTS engines pronounce this better
-    text = re.sub(r'\bURL\b', 'U-R-L', text)
-    text = re.sub(r'\bHTTP\b', 'H-T-T-P', text)
 
-    # Clean up multiple spaces
-    text = re.sub(r'\s+', ' ', text)
-
-    return text.strip()
-
-
-def generate_embedding(content):
-    """Generate embedding using Google Gemini with retry logic"""
-    max_retries = 3
+def _embed_batch(contents, max_retries=3, task_type=EMBEDDING_TASK_TYPE):
+    """Embed one provider-sized batch with retry logic, returning its vectors or None"""
     for attempt in range(max_retries):
         try:
-            if len(content) > 10000:
-                content = content[:10000]
+            logger.debug(f"Generating embeddings for a batch of {len(contents)} documents")
 
-            logger.debug(f"Generating embedding for content of length: {len(content)}")
+            with metrics.span('gemini_embed', documents=len(contents)):
+                response = get_genai().embed_content(
+                    model=EMBEDDING_MODEL,
+                    content=contents,
+                    task_type=task_type
+                )
 
-            response = genai.embed_content(
-                model='models/embedding-001',
-                content=content,
-                task_type="retrieval_document"
-            )
-
-            logger.debug(f"Embedding generated successfully. Dimension: {len(response['embedding'])}")
-            return response['embedding']
+            embeddings = response['embedding']
+            if len(embeddings) != len(contents):
+                raise ValueError(f"expected {len(contents)} embeddings, got {len(embeddings)}")
+            return embeddings
 
         except Exception as e:
-            logger.warning(f"Embedding attempt {attempt + 1} failed: {e}")
+            logger.warning(f"Embedding batch attempt {attempt + 1} failed: {e}")
             if attempt < max_retries - 1:
+                metrics.incr('retries_total', operation='gemini_embed')
                 time.sleep(2 ** attempt)  # Exponential backoff
             else:
-                logger.error(f"Failed to generate embedding after {max_retries} attempts")
+                logger.error(f"Failed to embed batch of {len(contents)} after {max_retries} attempts")
                 return None
 
 
+def generate_embeddings(contents, batch_size=EMBED_BATCH_SIZE):
+    """Generate embeddings for many documents using batched Gemini calls.
+
+    Cached documents are served locally and the rest are sent in batches of at
+    most batch_size, each retried on its own. Vectors are returned in input
+    order, with None for documents whose batch kept failing.
+    """
+    contents = [content[:10000] for content in contents]
+    embeddings = [None] * len(contents)
+    cache = get_ai_cache()
+
+    missing = []
+    for position, content in enumerate(contents):
+        cached = cache.get('embedding', EMBEDDING_MODEL, EMBEDDING_TASK_TYPE, content) if cache else None
+        if cached is not None:
+            embeddings[position] = cached
+        else:
+            missing.append(position)
+
+    for start in range(0, len(missing), batch_size):
+        positions = missing[start:start + batch_size]
+        batch_embeddings = _embed_batch([contents[position] for position in positions])
+        if batch_embeddings is None:
+            continue
+
+        for position, embedding in zip(positions, batch_embeddings):
+            embeddings[position] = embedding
+            if cache:
+                cache.put('embedding', EMBEDDING_MODEL, EMBEDDING_TASK_TYPE, contents[position], embedding)
+
+    logger.debug(f"Embedded {len(contents)} documents with {(len(missing) + batch_size - 1) // batch_size} requests")
+    return embeddings
+
+
+def generate_embedding(content):
+    """Generate embedding using Google Gemini with retry logic"""
+    return generate_embeddings([content])[0]
+
+
+def embed_query(query):
+    """Embed a search query for similarity search, or return None if it fails.
+
+    Queries are embedded as retrieval queries, not documents, with their
+    original casing. Repeated queries (compared ignoring case and extra
+    whitespace) are served from memory or the AI cache instead of calling
+    Gemini again.
+    """
+    query = ' '.join(query.split())
+    key = query.lower()
+    if not query:
+        return None
+
+    with _query_lock:
+        embedding = _query_embeddings.get(key)
+        if embedding is not None:
+            _query_embeddings.move_to_end(key)
+            return embedding
+
+    cache = get_ai_cache()
+    embedding = cache.get('embedding', EMBEDDING_MODEL, QUERY_TASK_TYPE, key) if cache else None
+    if embedding is None:
+        embeddings = _embed_batch([query], task_type=QUERY_TASK_TYPE)
+        if embeddings is None:
+            return None
+        embedding = embeddings[0]
+        if cache:
+            cache.put('embedding', EMBEDDING_MODEL, QUERY_TASK_TYPE, key, embedding)
+
+    with _query_lock:
+        _query_embeddings[key] = embedding
+        while len(_query_embeddings) > QUERY_EMBED_CACHE_SIZE:
+            _query_embeddings.popitem(last=False)
+    return embedding
+
+
+def summary_failed(summary):
+    """True when summarize_content produced no usable summary (all attempts failed or were too short)"""
+    return not summary or summary == SUMMARY_UNAVAILABLE
+
+
 def summarize_content(content):
     """Summarize content using Perplexity API with retry logic and clean output"""
+    if len(content) > 12000:
+        content = content[:12000]
+
+    cache = get_ai_cache()
+    if cache:
+        cached = cache.get('summary', SUMMARY_MODEL, SUMMARY_PROMPT_VERSION, content)
+        if cached is not None:
+            return cached
+
     max_retries = 3
     for attempt in range(max_retries):
         try:
-            if len(content) > 12000:
-                content = content[:12000]
-
             logger.debug("Calling Perplexity API for summarization...")
 
-            chat = perplexity_client.chat.completions.create(
-                model="sonar-pro",
-                messages=[
-                    {
-                        "role": "system",
-                        "content": """You are an expert AI newsletter summarizer. Create a comprehensive yet concise summary that captures the essence of the article.
+            with metrics.span('perplexity'):
+                chat = get_perplexity_client().chat.completions.create(
+                    model=SUMMARY_MODEL,
+                    messages=[
+                        {
+                            "role": "system",
+                            "content": """You are an expert AI newsletter summarizer. Create a comprehensive yet concise summary that captures the essence of the article.
 
 IMPORTANT: Your response must be clean text suitable for text-to-speech systems. Follow these rules:
 - Do NOT use any markdown formatting (no *, **, _, __, `, etc.)
@@ -112,14 +200,14 @@ Your summary should:
 - Write for business professionals and tech enthusiasts
 - Be engaging and informative
 - Ensure all sentences are grammatically complete"""
-                    },
-                    {"role": "user",
-                     "content": f"Please summarize this article in exactly 4-5 complete sentences with clean, plain text suitable for text-to-speech with no citations or references. Make sure version numbers have no spaces (like 2.5 not 2. 5) and end with a complete sentence:\n\n{content}"}
-                ],
-                max_tokens=250,  # Increased from 200 to ensure complete sentences
-                temperature=0.2,  # Slightly lower for more consistent output
+                        },
+                        {"role": "user",
+                         "content": f"Please summarize this article in exactly 4-5 complete sentences with clean, plain text suitable for text-to-speech with no citations or references. Make sure version numbers have no spaces (like 2.5 not 2. 5) and end with a complete sentence:\n\n{content}"}
+                    ],
+                    max_tokens=250,  # Increased from 200 to ensure complete sentences
+                    temperature=0.2,  # Slightly lower for more consistent output
 
-            )
+                )
 
             summary = chat.choices[0].message.content.strip()
 
@@ -139,14 +227,18 @@ Your summary should:
             # Validate summary quality
             if len(clean_summary) < 50:
                 logger.warning("Summary too short, retrying...")
+                metrics.incr('retries_total', operation='perplexity')
                 continue
 
+            if cache:
+                cache.put('summary', SUMMARY_MODEL, SUMMARY_PROMPT_VERSION, content, clean_summary)
             return clean_summary
 
         except Exception as e:
             logger.warning(f"Summarization attempt {attempt + 1} failed: {e}")
             if attempt < max_retries - 1:
+                metrics.incr('retries_total', operation='perplexity')
                 time.sleep(2 ** attempt)
             else:
                 logger.error(f"Failed to generate summary after {max_retries} attempts")
-                return "Summary not available"
\ No newline at end of file
+                return SUMMARY_UNAVAILABLE
\ No newline at end of file
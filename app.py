@@ -1,14 +1,17 @@
 import streamlit as st
 import os
-from pinecone import Pinecone
 from dotenv import load_dotenv
 from datetime import datetime
-import requests
-from PIL import Image
-from io import BytesIO
 import asyncio
-import edge_tts
-import io
+from config import (ARTICLE_CACHE_TTL, LAST_RUN_PATH, THUMBNAIL_CACHE_DIR, THUMBNAIL_MEMORY_ITEMS,
+                    THUMBNAIL_DISK_MAX_MB, IMAGE_FETCH_WORKERS, IMAGE_STORE_DIR, AUDIO_CACHE_DIR, AUDIO_CACHE_MAX_MB,
+                    VECTOR_STORE, ARTICLES_PER_PAGE, SEARCH_TOP_K)
+from ai_services import embed_query
+from article_manifest import article_from_metadata, build_manifest, load_manifest, page_of
+from image_cache import ThumbnailCache, ImageStore
+from newsletter_audio import AudioSegmentCache, stream_newsletter
+from pinecone_manager import fetch_all_metadata
+from vector_store import open_index
 
 # Load environment variables
 load_dotenv()
@@ -277,119 +280,149 @@ st.markdown(f"""
 
 @st.cache_resource
 def init_pinecone():
-    """Initialize Pinecone connection"""
+    """Open the configured vector index (Pinecone, or the local store when VECTOR_STORE=local)"""
     try:
-        api_key = os.getenv("PINECONE_API_KEY")
-        index_name = os.getenv("PINECONE_INDEX_NAME")
+        if VECTOR_STORE == 'pinecone':
+            api_key = os.getenv("PINECONE_API_KEY")
+            index_name = os.getenv("PINECONE_INDEX_NAME")
 
-        if not api_key or not index_name:
-            return None
+            if not api_key or not index_name:
+                return None
 
-        pc = Pinecone(api_key=api_key)
-        index = pc.Index(index_name)
-        return index
+        return open_index(VECTOR_STORE)
 
     except Exception as e:
         st.error(f"Failed to connect to database: {str(e)}")
         return None
 
 
-def load_image_from_url(url):
-    """Load and resize image from URL"""
-    try:
-        if not url or url == "":
-            return None
-
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-        }
-        response = requests.get(url, headers=headers, timeout=10)
-        response.raise_for_status()
-
-        image = Image.open(BytesIO(response.content))
-        # Smaller image size for better proportion with summary
-        image.thumbnail((280, 200), Image.Resampling.LANCZOS)
-        return image
-    except Exception:
-        return None
+@st.cache_resource
+def get_thumbnail_cache():
+    """Process-wide thumbnail LRU shared by every session"""
+    return ThumbnailCache(THUMBNAIL_CACHE_DIR, THUMBNAIL_MEMORY_ITEMS, int(THUMBNAIL_DISK_MAX_MB * 1024 * 1024))
 
 
-async def create_audio_from_all_articles(articles, voice="en-US-AriaNeural"):
-    """Convert all articles to speech using edge-tts with high-quality voice"""
-    try:
-        # Combine all articles into one text
-        full_text = "Welcome to your AI Newsletter Summary. Here are today's top stories.\n\n"
+@st.cache_resource
+def get_image_store():
+    """Thumbnails pre-rendered by the pipeline"""
+    return ImageStore(IMAGE_STORE_DIR)
+
+
+def load_image_from_url(url):
+    """Load the resized thumbnail for an image URL, from cache when possible"""
+    return get_thumbnail_cache().fetch(url)
 
-        for i, article in enumerate(articles, 1):
-            # Add article number and title
-            full_text += f"Article {i}: {article['title']}\n"
 
-            # Add author and source
-            if article['author'] and article['author'] != 'Unknown Author':
-                full_text += f"By {article['author']} from {article['source']}.\n"
-            else:
-                full_text += f"From {article['source']}.\n"
+def load_images(articles):
+    """Thumbnails for all articles, returning {image url: bytes or None}.
 
-            # Add summary
-            full_text += f"{article['ai_summary']}\n\n"
+    Images the pipeline already rendered are read from the local store (the 2x
+    variant, so they stay sharp on high-DPI screens); the rest are downloaded
+    concurrently through the thumbnail cache.
+    """
+    store = get_image_store()
+    images = {}
+    for article in articles:
+        data = store.read(article.get('image_key', ''), '2x')
+        if data is not None:
+            images[article['image']] = data
 
-            # Add a pause between articles
-            if i < len(articles):
-                full_text += "Next article.\n\n"
+    missing = [article['image'] for article in articles if article['image'] and article['image'] not in images]
+    if missing:
+        images.update(get_thumbnail_cache().fetch_many(missing, IMAGE_FETCH_WORKERS))
+    return images
 
-        full_text += "That concludes your newsletter summary. Have a great day!"
 
-        # Create TTS using edge-tts
-        communicate = edge_tts.Communicate(full_text, voice)
+@st.cache_resource
+def get_audio_cache():
+    """Synthesized audio segments shared by every session"""
+    return AudioSegmentCache(AUDIO_CACHE_DIR, int(AUDIO_CACHE_MAX_MB * 1024 * 1024))
+
 
-        # Generate audio to bytes
-        audio_bytes = io.BytesIO()
-        async for chunk in communicate.stream():
-            if chunk["type"] == "audio":
-                audio_bytes.write(chunk["data"])
+async def create_audio_from_all_articles(articles, voice="en-US-AriaNeural", preview=None):
+    """Convert all articles to speech using edge-tts with high-quality voice.
 
-        audio_bytes.seek(0)
-        return audio_bytes.getvalue()
+    Intro, outro and per-article segments are cached on disk by content and
+    voice, so only articles not heard before with this voice are synthesized,
+    several at a time. When a preview placeholder is given, the first story is
+    playable there as soon as it is ready, while the rest is still rendering.
+    """
+    try:
+        chunks = []
+        previewed = preview is None or len(articles) < 2
+        async for name, data in stream_newsletter(articles, voice, get_audio_cache()):
+            chunks.append(data)
+            if not previewed and name.startswith('article-'):
+                with preview.container():
+                    st.caption("First story, ready while the rest renders")
+                    st.audio(b''.join(chunks), format='audio/mp3')
+                previewed = True
+
+        return b''.join(chunks)
 
     except Exception as e:
         st.error(f"Error creating audio: {e}")
         return None
 
 
-def get_articles_from_pinecone(index, limit=7):
-    """Retrieve articles from Pinecone"""
+def last_pipeline_run():
+    """Modification time of the pipeline's run marker, or 0 when it has not been seen"""
+    try:
+        return os.path.getmtime(LAST_RUN_PATH)
+    except OSError:
+        return 0
+
+
+@st.cache_data(ttl=ARTICLE_CACHE_TTL, show_spinner=False)
+def load_articles(_index, last_run):
+    """All stored articles, newest first, cached per pipeline run.
+
+    Read from the manifest the pipeline writes after each run; when there is
+    none (e.g. the app is deployed apart from the pipeline) the same listing is
+    built from the index's IDs and metadata. last_run is only part of the cache
+    key: a newer pipeline run makes the next rerun load again, and the TTL
+    bounds staleness when the marker is not visible.
+    """
+    articles = load_manifest()
+    if articles is None:
+        articles = build_manifest(fetch_all_metadata(_index))
+    return articles
+
+
+def get_articles_from_pinecone(index):
+    """Retrieve every stored article, newest first"""
     try:
+        return load_articles(index, last_pipeline_run())
+
+    except Exception as e:
+        st.error(f"Error retrieving articles: {str(e)}")
+        return []
+
+
+def search_articles(index, query, sources=None, limit=SEARCH_TOP_K):
+    """Articles most similar to a search query, best first, optionally only from the given sources"""
+    try:
+        embedding = embed_query(query)
+        if embedding is None:
+            st.error("Could not process the search query. Please try again.")
+            return []
+
         query_response = index.query(
-            vector=[0.1] * 768,
+            vector=embedding,
             top_k=limit,
-            include_metadata=True
+            include_metadata=True,
+            filter={'source': {'$in': list(sources)}} if sources else None
         )
-
-        articles = []
-        for match in query_response.matches:
-            metadata = match.metadata
-            articles.append({
-                'id': match.id,
-                'title': metadata.get('title', 'No Title'),
-                'author': metadata.get('author', 'Unknown Author'),
-                'source': metadata.get('source', 'Unknown Source'),
-                'ai_summary': metadata.get('ai_summary', metadata.get('summary', 'No summary available')),
-                'original_summary': metadata.get('original_summary', ''),
-                'image': metadata.get('image', ''),
-                'url': metadata.get('url', ''),
-                'published': metadata.get('published', ''),
-                'score': match.score
-            })
-
-        return articles
+        return [article_from_metadata(match.id, match.metadata or {}, match.score)
+                for match in query_response.matches]
 
     except Exception as e:
-        st.error(f"Error retrieving articles: {str(e)}")
+        st.error(f"Error searching articles: {str(e)}")
         return []
 
 
-def render_article_card(article, index):
-    """Render individual article card"""
+def render_article_card(article, index, image=None):
+    """Render individual article card; image holds the prefetched thumbnail bytes"""
     st.markdown('<div class="article-card">', unsafe_allow_html=True)
 
     # Title
@@ -419,7 +452,6 @@ def render_article_card(article, index):
 
     # Image with proper centering and spacing
     if article["image"]:
-        image = load_image_from_url(article["image"])
         if image:
             # Create centered image container with better proportions
             col1, col2, col3 = st.columns([1.5, 1, 1.5])
@@ -488,18 +520,45 @@ def main():
 
     source_text = ", ".join([f"{k}: {v}" for k, v in sources.items()])
 
+    # Search and source filter; without a query the newest articles are listed a page at a time
+    search_col, source_col = st.columns([2, 1])
+    with search_col:
+        search_query = st.text_input("Search articles", placeholder="Search articles, e.g. open-source LLMs")
+    with source_col:
+        selected_sources = st.multiselect("Sources", list(sources.keys()))
+
+    if search_query.strip():
+        with st.spinner("Searching articles..."):
+            articles = search_articles(index, search_query, selected_sources)
+        heading = f"Search results: Found {len(articles)}"
+        page_text = ""
+    else:
+        listed = [article for article in all_articles
+                  if not selected_sources or article['source'] in selected_sources]
+        page_count = max(1, (len(listed) + ARTICLES_PER_PAGE - 1) // ARTICLES_PER_PAGE)
+        page = st.number_input("Page", min_value=1, max_value=page_count, value=1, step=1) \
+            if page_count > 1 else 1
+        articles, page_count = page_of(listed, int(page), ARTICLES_PER_PAGE)
+        heading = f"Latest articles: Found {len(listed)}"
+        page_text = f"Page {int(page)} of {page_count}" if page_count > 1 else ""
+
     # Display article count and sources using HTML to avoid link symbols
     st.markdown(f"""
     <div class="centered">
         <h2 style="color: #7D2AE8; font-size: 1.8rem; margin-bottom: 15px;">
-            Latest articles: Found {len(all_articles)}
+            {heading}
         </h2>
         <p style="font-size: 16px; margin-bottom: 10px;">Sources: {source_text}</p>
+        {f'<p style="font-size: 16px; margin-bottom: 10px;">{page_text}</p>' if page_text else ''}
         <p style="font-size: 16px; margin-bottom: 10px;">Stay updated with the latest AI and tech news with AI-powered summaries.</p>
         <p style="font-size: 16px; margin-bottom: 20px;">Select Voice and Click the below button to generate audio summary.</p>
     </div>
     """, unsafe_allow_html=True)
 
+    if not articles:
+        st.info("No articles match your search.")
+        st.stop()
+
     # Voice selection centered - FIXED EMPTY LABEL
     st.markdown('<div class="centered">', unsafe_allow_html=True)
     voices = get_available_voices()
@@ -513,14 +572,19 @@ def main():
 
     # Generate button centered
     if st.button("Generate Audio Summary", type="primary"):
-        with st.spinner(f"Generating audio for {len(all_articles)} articles..."):
+        # Center the audio players using columns
+        col1, col2, col3 = st.columns([1, 2, 1])
+        with col2:
+            preview_slot = st.empty()
+            full_slot = st.empty()
+
+        with st.spinner(f"Generating audio for {len(articles)} articles..."):
             try:
-                audio_data = asyncio.run(create_audio_from_all_articles(all_articles, selected_voice))
+                audio_data = asyncio.run(create_audio_from_all_articles(articles, selected_voice, preview_slot))
 
                 if audio_data:
-                    # Center the audio player using columns
-                    col1, col2, col3 = st.columns([1, 2, 1])
-                    with col2:
+                    with full_slot.container():
+                        st.caption("Full newsletter")
                         st.audio(audio_data, format='audio/mp3')
                 else:
                     st.error("Failed to generate audio. Please try again.")
@@ -533,9 +597,12 @@ def main():
     # Add some spacing before articles
     st.markdown("<br>", unsafe_allow_html=True)
 
+    # Fetch every thumbnail at once so render time does not add up image by image
+    images = load_images(articles)
+
     # Display articles
-    for i, article in enumerate(all_articles):
-        render_article_card(article, i)
+    for i, article in enumerate(articles):
+        render_article_card(article, i, images.get(article['image']))
 
     st.markdown('</div>', unsafe_allow_html=True)
 
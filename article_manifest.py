@@ -0,0 +1,91 @@
+"""Recency-ordered list of the stored articles, kept next to the vector index.
+
+The pipeline rewrites the manifest from the index after every run. The app
+reads it to list articles newest first, one page at a time, without querying
+the index. Each entry is the article dict the app renders, plus published_ts
+(epoch seconds, 0 when the date is unknown) to sort on.
+"""
+import json
+import logging
+import os
+from datetime import datetime, timezone
+
+from config import ARTICLE_MANIFEST_PATH
+from date_utils import parse_date_flexible
+
+logger = logging.getLogger(__name__)
+
+
+def published_timestamp(published):
+    """Epoch seconds for a stored published date, or 0 when it cannot be parsed"""
+    parsed = parse_date_flexible(published)
+    return parsed.timestamp() if parsed else 0
+
+
+def article_from_metadata(doc_id, metadata, score=None):
+    """The app's article dict for a stored vector's metadata"""
+    published_ts = metadata.get('published_ts')
+    if published_ts is None:
+        # Stored before published_ts was written to metadata
+        published_ts = published_timestamp(metadata.get('published', ''))
+    return {
+        'id': doc_id,
+        'title': metadata.get('title', 'No Title'),
+        'author': metadata.get('author', 'Unknown Author'),
+        'source': metadata.get('source', 'Unknown Source'),
+        'ai_summary': metadata.get('ai_summary', metadata.get('summary', 'No summary available')),
+        'original_summary': metadata.get('original_summary', ''),
+        'image': metadata.get('image', ''),
+        'image_key': metadata.get('image_key', ''),
+        'url': metadata.get('url', ''),
+        'published': metadata.get('published', ''),
+        'published_ts': published_ts,
+        'score': score,
+    }
+
+
+def build_manifest(metadata_by_id):
+    """Article dicts for {doc_id: metadata}, newest first (ties by title)"""
+    articles = [article_from_metadata(doc_id, metadata) for doc_id, metadata in metadata_by_id.items()]
+    articles.sort(key=lambda article: (-article['published_ts'], article['title'], article['id']))
+    return articles
+
+
+def write_manifest(articles, path=ARTICLE_MANIFEST_PATH):
+    """Atomically write the manifest; returns False (and logs) when it could not be written"""
+    manifest = {
+        'generated_at': datetime.now(timezone.utc).isoformat(),
+        'count': len(articles),
+        'articles': articles,
+    }
+    try:
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f)
+        os.replace(tmp_path, path)
+        return True
+    except Exception as e:
+        logger.warning(f"Could not write article manifest {path}: {e}")
+        return False
+
+
+def load_manifest(path=ARTICLE_MANIFEST_PATH):
+    """Articles from the manifest, newest first, or None when there is no readable manifest"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)['articles']
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        logger.warning(f"Could not read article manifest {path}: {e}")
+        return None
+
+
+def page_of(articles, page, page_size):
+    """Return (articles on the 1-based page, number of pages); out-of-range pages are clamped"""
+    page_size = max(1, page_size)
+    pages = max(1, (len(articles) + page_size - 1) // page_size)
+    page = min(max(1, page), pages)
+    start = (page - 1) * page_size
+    return articles[start:start + page_size], pages
@@ -0,0 +1,152 @@
+"""Benchmark date_utils parsing against the original dateutil-only implementation.
+
+Checks that parse_date_flexible and is_from_last_24_hours agree with the frozen
+originals in benchmarks/legacy.py, then times the old parser against the new
+one cold (empty memo), warm (every string seen before) and on feedparser's
+struct_times.
+
+    python -m benchmarks.bench_date_utils
+    python -m benchmarks.bench_date_utils --dates 20000
+    python -m benchmarks.bench_date_utils --corpus exported_dates.json
+
+By default the corpus is synthesized in the date formats our feeds publish
+(Substack/WordPress RFC 822, Atom ISO 8601, podcast hosts, the odd free-form
+date), covering two years of historical entries with the repeats a real
+feed list has. Pass --corpus with a JSON list of date strings taken from real
+feeds to run on those instead.
+
+RFC 822 zone names such as EST are the one intended difference: dateutil
+ignores them and treated those dates as UTC, while the new parser applies the
+offset. They are counted separately, not as mismatches.
+"""
+import argparse
+import json
+import random
+import sys
+import timeit
+import warnings
+from datetime import datetime, timedelta, timezone
+
+import feedparser
+
+from benchmarks.legacy import legacy_is_from_last_24_hours, legacy_parse_date_flexible
+from date_utils import _parse_date_string, is_from_last_24_hours, parse_date_flexible
+
+NAMED_ZONES = (' EST', ' EDT', ' CST', ' CDT', ' MST', ' MDT', ' PST', ' PDT')
+
+# (weight, formatter) pairs, roughly the mix seen across our feeds
+FORMATS = [
+    (40, lambda d: d.strftime('%a, %d %b %Y %H:%M:%S GMT')),
+    (20, lambda d: d.strftime('%a, %d %b %Y %H:%M:%S +0000')),
+    (8, lambda d: d.astimezone(timezone(timedelta(hours=-4))).strftime('%a, %d %b %Y %H:%M:%S -0400')),
+    (4, lambda d: d.strftime('%a, %d %b %Y %H:%M:%S -0000')),
+    (10, lambda d: d.strftime('%Y-%m-%dT%H:%M:%SZ')),
+    (5, lambda d: d.strftime('%Y-%m-%dT%H:%M:%S.') + f"{d.microsecond // 1000:03d}Z"),
+    (4, lambda d: d.astimezone(timezone(timedelta(hours=5, minutes=30))).strftime('%Y-%m-%dT%H:%M:%S+05:30')),
+    (2, lambda d: d.strftime('%d %b %Y %H:%M GMT')),
+    (2, lambda d: d.strftime('%a, %d %b %Y %H:%M:%S EST')),
+    (1, lambda d: d.strftime('%a, %d %b %Y %H:%M:%S +0000 (UTC)')),
+    (1, lambda d: d.strftime('%B %d, %Y')),
+    (1, lambda d: d.strftime('%Y-%m-%d')),
+    (1, lambda d: d.strftime('%A, %B %d, %Y - %H:%M')),
+]
+
+
+def synthesize_dates(count, seed=2024):
+    """Feed-style date strings over the last two years; about a third repeat earlier ones"""
+    rng = random.Random(seed)
+    now = datetime.now(timezone.utc)
+    weights = [weight for weight, _ in FORMATS]
+    dates = []
+    for _ in range(count):
+        if dates and rng.random() < 0.35:
+            dates.append(rng.choice(dates))
+            continue
+        moment = now - timedelta(seconds=rng.randint(0, 2 * 365 * 86400), microseconds=rng.randint(0, 999999))
+        dates.append(rng.choices(FORMATS, weights)[0][1](moment))
+    return dates
+
+
+def struct_times(dates):
+    """The *_parsed struct_time feedparser produces for each date it can parse"""
+    items = ''.join(f'<item><pubDate>{date}</pubDate></item>' for date in dates)
+    feed = feedparser.parse(f'<rss version="2.0"><channel>{items}</channel></rss>')
+    return [entry.published_parsed for entry in feed.entries if entry.get('published_parsed')]
+
+
+def check_identical(dates, reference_time):
+    """Return (mismatches, named_zone_differences)"""
+    mismatches = []
+    named_zone = 0
+    for date in dates:
+        new, old = parse_date_flexible(date), legacy_parse_date_flexible(date)
+        same = new == old and (new is None or new.isoformat() == old.isoformat())
+        if not same:
+            if date.upper().endswith(NAMED_ZONES):
+                named_zone += 1
+                continue
+            mismatches.append(('parse_date_flexible', date, new, old))
+        elif is_from_last_24_hours(date, reference_time) != legacy_is_from_last_24_hours(date, reference_time):
+            mismatches.append(('is_from_last_24_hours', date, None, None))
+    return mismatches, named_zone
+
+
+def best_of(fn, repeat, setup=None):
+    times = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        times.append(timeit.timeit(fn, number=1))
+    return min(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--corpus', help='JSON list of date strings from real feeds')
+    parser.add_argument('--dates', type=int, default=5000, help='number of synthesized dates')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+    # dateutil warns on every zone name it does not know (the legacy path hits these)
+    warnings.simplefilter('ignore')
+
+    if args.corpus:
+        with open(args.corpus, 'r', encoding='utf-8') as f:
+            dates = [date for date in json.load(f) if isinstance(date, str)]
+    else:
+        dates = synthesize_dates(args.dates)
+    reference_time = datetime.now(timezone.utc)
+
+    mismatches, named_zone = check_identical(dates, reference_time)
+    print(f"Checked {len(dates)} dates ({len(set(dates))} distinct): "
+          f"{'identical output' if not mismatches else f'{len(mismatches)} MISMATCHES'}"
+          f"{f', {named_zone} with RFC 822 zone names now offset correctly' if named_zone else ''}")
+    for function, date, new, old in mismatches[:10]:
+        print(f"  {function}: {date!r} new={new} old={old}")
+
+    per_date = 1e6 / len(dates)
+    legacy = best_of(lambda: [legacy_parse_date_flexible(d) for d in dates], args.repeat)
+    cold = best_of(lambda: [parse_date_flexible(d) for d in dates], args.repeat, _parse_date_string.cache_clear)
+    warm = best_of(lambda: [parse_date_flexible(d) for d in dates], args.repeat)
+    print(f"{'parse (dateutil)':<28} {legacy * per_date:8.2f} us/date")
+    print(f"{'parse tiered, cold memo':<28} {cold * per_date:8.2f} us/date   speedup {legacy / cold:6.1f}x")
+    print(f"{'parse tiered, warm memo':<28} {warm * per_date:8.2f} us/date   speedup {legacy / warm:6.1f}x")
+
+    parsed = struct_times(dates)
+    if parsed:
+        struct = best_of(lambda: [parse_date_flexible(p) for p in parsed], args.repeat)
+        print(f"{'parse struct_time':<28} {struct * 1e6 / len(parsed):8.2f} us/date   "
+              f"speedup {legacy * per_date / (struct * 1e6 / len(parsed)):6.1f}x")
+
+    values = [parse_date_flexible(d) for d in dates]
+    values = [value for value in values if value]
+    legacy_window = best_of(lambda: [legacy_is_from_last_24_hours(v, reference_time) for v in values], args.repeat)
+    window = best_of(lambda: [is_from_last_24_hours(v, reference_time) for v in values], args.repeat)
+    per_value = 1e6 / len(values)
+    print(f"{'is_from_last_24_hours':<28} legacy {legacy_window * per_value:6.2f} us   "
+          f"new {window * per_value:6.2f} us   speedup {legacy_window / window:5.2f}x")
+
+    return 1 if mismatches else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,103 @@
+"""Benchmark lxml article extraction against the original BeautifulSoup implementation.
+
+Checks that html_extract gives the same text and image as the frozen
+BeautifulSoup originals in benchmarks/legacy.py, then times both.
+
+    python -m benchmarks.bench_html_extract
+    python -m benchmarks.bench_html_extract --pages ~/saved-substack-pages
+
+The bundled pages (benchmarks/data/pages/*.html.gz) mimic Substack post markup:
+a large head, navigation, subscribe widgets, comments and a big inline preload
+script. Pass --pages with a directory of pages saved from the browser
+(.html or .html.gz) to run on real posts.
+"""
+import argparse
+import glob
+import gzip
+import os
+import re
+import sys
+import timeit
+
+from benchmarks.legacy import (legacy_extract_from_fallback_html, legacy_extract_image_from_html,
+                               legacy_extract_text_from_html)
+from html_extract import extract_image, extract_page, extract_text
+
+DEFAULT_PAGES = os.path.join(os.path.dirname(__file__), 'data', 'pages')
+BASE_URL = 'https://example.substack.com/p/post'
+
+
+def load_pages(directory):
+    pages = {}
+    for path in sorted(glob.glob(os.path.join(directory, '*.html')) + glob.glob(os.path.join(directory, '*.html.gz'))):
+        opener = gzip.open if path.endswith('.gz') else open
+        with opener(path, 'rb') as f:
+            pages[os.path.basename(path)] = f.read()
+    return pages
+
+
+def variants(name, data):
+    """The page as bytes and str, plus structural edge cases built from it"""
+    text = data.decode('utf-8', 'replace')
+    yield name, data
+    yield f"{name} [str]", text
+    yield f"{name} [no article]", re.sub(r'<(/?)article\b', r'<\1section', text)
+    yield f"{name} [no head]", re.sub(r'<head>.*?</head>', '', text, flags=re.DOTALL)
+    yield f"{name} [fragment]", re.sub(r'^.*?<body[^>]*>|</body>.*$', '', text, flags=re.DOTALL)
+
+
+def check_identical(documents):
+    """Return a list of (function, document name) pairs where outputs differ"""
+    mismatches = []
+    for name, document in documents:
+        if extract_text(document) != legacy_extract_text_from_html(document):
+            mismatches.append(('extract_text', name))
+        if extract_image(document, BASE_URL) != legacy_extract_image_from_html(document, BASE_URL):
+            mismatches.append(('extract_image', name))
+        if extract_page(document, BASE_URL) != legacy_extract_from_fallback_html(document, BASE_URL):
+            mismatches.append(('extract_page', name))
+    return mismatches
+
+
+def time_pair(label, new_fn, legacy_fn, pages, repeat):
+    legacy = min(timeit.repeat(lambda: [legacy_fn(page) for page in pages], number=1, repeat=repeat))
+    new = min(timeit.repeat(lambda: [new_fn(page) for page in pages], number=1, repeat=repeat))
+    per_page = 1e3 / len(pages)
+    print(f"{label:<28} legacy {legacy * per_page:8.2f} ms   new {new * per_page:8.2f} ms   "
+          f"speedup {legacy / new:5.2f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--pages', default=DEFAULT_PAGES, help='directory of saved .html / .html.gz pages')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    pages = load_pages(args.pages)
+    if not pages:
+        print(f"No .html or .html.gz pages found in {args.pages}")
+        return 1
+
+    documents = [variant for name, data in pages.items() for variant in variants(name, data)]
+    mismatches = check_identical(documents)
+    total_kb = sum(len(data) for data in pages.values()) / 1024
+    print(f"Checked {len(documents)} documents from {len(pages)} pages ({total_kb:.0f} KB): "
+          f"{'identical output' if not mismatches else f'{len(mismatches)} MISMATCHES'}")
+    for function, name in mismatches[:10]:
+        print(f"  {function}: {name}")
+
+    raw = list(pages.values())
+    time_pair('text (cleaned_html)', extract_text, legacy_extract_text_from_html, raw, args.repeat)
+    time_pair('image (raw html)', lambda page: extract_image(page, BASE_URL),
+              lambda page: legacy_extract_image_from_html(page, BASE_URL), raw, args.repeat)
+    time_pair('crawl4ai result (text+image)', lambda page: (extract_text(page), extract_image(page, BASE_URL)),
+              lambda page: (legacy_extract_text_from_html(page), legacy_extract_image_from_html(page, BASE_URL)),
+              raw, args.repeat)
+    time_pair('http fallback page', lambda page: extract_page(page, BASE_URL),
+              lambda page: legacy_extract_from_fallback_html(page, BASE_URL), raw, args.repeat)
+
+    return 1 if mismatches else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,141 @@
+"""Check cold import time of the pipeline and its leaf modules against budgets.
+
+Each module is imported in a fresh interpreter with `python -X importtime`, so
+the numbers are cold-start costs as seen by a cron or serverless run. Also
+reports which provider SDKs each import pulled in; leaf modules that never call
+a provider should not load any.
+
+    python -m benchmarks.bench_import_time
+    python -m benchmarks.bench_import_time --modules config text_utils --repeat 5
+
+Budgets leave about 1.5x headroom over the times measured when they were set.
+They are scaled to the machine: a stdlib-only baseline import is timed in the
+same run, and on runners slower than the reference machine every budget grows
+by the same ratio (budgets never shrink on faster machines). Independently of
+timing, importing any module must not build a provider client: the lazy
+getters in config (get_genai, get_perplexity_client, get_pinecone) must still
+be uncalled afterwards.
+
+Exits with status 1 when a module exceeds its budget, loads an SDK it should
+not, or builds a provider client. Modules whose third-party dependencies are
+not installed are skipped.
+"""
+import argparse
+import os
+import re
+import subprocess
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Cumulative import budget per module (milliseconds on the reference machine)
+BUDGETS_MS = {
+    'config': 45,
+    'text_utils': 15,
+    'tts_rules': 15,
+    'date_utils': 20,
+    'ai_cache': 30,
+    'rate_limiter': 110,
+    'html_extract': 40,
+    'article_manifest': 55,
+    'rss_fetcher': 300,
+    'ai_services': 65,
+    'pinecone_manager': 180,
+    'scrape': 1500,
+    'pipeline': 2000,
+}
+
+# Stdlib-only import timed every run, and its time on the machine the budgets were set on
+BASELINE_MODULE = 'asyncio'
+BASELINE_MS = 46
+
+# Provider SDKs that should only be imported when a client is first used
+PROVIDER_SDKS = ('openai', 'pinecone', 'google.generativeai', 'crawl4ai')
+
+# Modules allowed to load a provider SDK at import time
+SDK_ALLOWED = {
+    'scrape': ('crawl4ai',),
+    'pipeline': ('crawl4ai',),
+}
+
+# Lazy client getters in config; each must be uncalled after importing any module
+CLIENT_GETTERS = ('get_genai', 'get_perplexity_client', 'get_pinecone')
+
+# Dummy keys so config imports without a .env; clients are never built here
+DUMMY_ENV = {'PERPLEXITY_API_KEY': 'bench', 'PINECONE_API_KEY': 'bench', 'GOOGLE_API_KEY': 'bench'}
+
+IMPORTTIME_LINE = re.compile(r'^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)')
+
+
+def measure(module):
+    """Import module in a fresh interpreter.
+
+    Returns (cumulative_ms, loaded_sdks, built_clients, error); error is set when the import failed.
+    """
+    probe = (f"import sys, {module}; "
+             f"print(','.join(m for m in {PROVIDER_SDKS!r} if m in sys.modules)); "
+             f"config = sys.modules.get('config'); "
+             f"print(','.join(g for g in {CLIENT_GETTERS!r} "
+             f"if config and getattr(config, g).cache_info().currsize))")
+    env = {**os.environ, **{key: os.environ.get(key, value) for key, value in DUMMY_ENV.items()}}
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', probe], cwd=REPO_ROOT, env=env,
+                            capture_output=True, text=True)
+    if result.returncode != 0:
+        return None, (), (), result.stderr.strip().splitlines()[-1] if result.stderr.strip() else 'import failed'
+
+    cumulative_us = None
+    for line in result.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        # The top-level entry for the module itself carries the cumulative time
+        if match and match.group(4) == module and len(match.group(3)) == 1:
+            cumulative_us = int(match.group(2))
+    sdk_line, client_line = (result.stdout.splitlines() + ['', ''])[:2]
+    loaded = tuple(name for name in sdk_line.split(',') if name)
+    built = tuple(name for name in client_line.split(',') if name)
+    return (cumulative_us or 0) / 1000, loaded, built, None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--modules', nargs='+', default=list(BUDGETS_MS), help='modules to import')
+    parser.add_argument('--repeat', type=int, default=3, help='imports per module; the fastest is reported')
+    args = parser.parse_args()
+
+    baseline = min(measure(BASELINE_MODULE)[0] or BASELINE_MS for _ in range(max(1, args.repeat)))
+    scale = max(1.0, baseline / BASELINE_MS)
+    print(f"Baseline: {BASELINE_MODULE} imports in {baseline:.1f} ms (reference {BASELINE_MS} ms), "
+          f"budgets scaled x{scale:.2f}")
+
+    failures = 0
+    print(f"{'module':<18} {'import ms':>10} {'budget ms':>10}  provider SDKs loaded")
+    for module in args.modules:
+        runs = [measure(module) for _ in range(max(1, args.repeat))]
+        errors = [error for _, _, _, error in runs if error]
+        if errors:
+            print(f"{module:<18} {'skipped':>10} {'':>10}  ({errors[0]})")
+            continue
+
+        elapsed = min(ms for ms, _, _, _ in runs)
+        loaded = runs[0][1]
+        built = runs[0][2]
+        budget = BUDGETS_MS[module] * scale if module in BUDGETS_MS else None
+        unexpected = [sdk for sdk in loaded if sdk not in SDK_ALLOWED.get(module, ())]
+
+        flags = []
+        if budget is not None and elapsed > budget:
+            flags.append('OVER BUDGET')
+        if unexpected:
+            flags.append(f"unexpected SDK: {', '.join(unexpected)}")
+        if built:
+            flags.append(f"client built at import: {', '.join(built)}")
+        failures += bool(flags)
+
+        budget_text = f"{budget:.0f}" if budget is not None else '-'
+        print(f"{module:<18} {elapsed:>10.1f} {budget_text:>10}  {', '.join(loaded) or 'none'}"
+              f"{'   <-- ' + '; '.join(flags) if flags else ''}")
+
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,250 @@
+"""End-to-end throughput benchmark of pipeline.process_articles against local stand-ins.
+
+Feeds, article pages and images come from a local fake site. Crawl4AI,
+Perplexity, Gemini and Pinecone are replaced by the stand-ins in
+benchmarks/fakes.py, which have configurable latency and error rates. Nothing
+leaves the machine and no API keys are needed.
+
+    python -m benchmarks.bench_pipeline
+    python -m benchmarks.bench_pipeline --feeds 12 100 1000 --hosts 50
+    python -m benchmarks.bench_pipeline --feeds 200 --chat-error-rate 0.05 --json report.json
+    python -m benchmarks.bench_pipeline --feeds 100 --full-text-feeds 0.8
+
+Reports articles/sec, p50/p95 latency per stage and peak RSS of the pipeline
+process. The site server runs in a separate process and is not counted. When
+several --feeds values are given, each scale runs in a fresh interpreter so
+peak RSS and module-level state are per scale. Pipeline settings (concurrency,
+batch sizes, ...) are read from the environment as usual.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import math
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+STAGES = ('feed', 'scrape', 'thumbnail', 'summarize', 'embed', 'store')
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a list of numbers (0 for an empty list)"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered) + 0.5)) - 1))
+    return ordered[rank]
+
+
+def peak_rss_mb():
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def _timed(timings, stage, fn):
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            timings[stage].append(time.perf_counter() - start)
+    return wrapper
+
+
+def _timed_async(timings, stage, fn):
+    async def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return await fn(*args, **kwargs)
+        finally:
+            timings[stage].append(time.perf_counter() - start)
+    return wrapper
+
+
+def run_scale(args, feed_count):
+    """Run the pipeline once against feed_count fake feeds and return the report dict"""
+    from benchmarks import fakes
+
+    cache_dir = tempfile.mkdtemp(prefix='bench-pipeline-')
+    # config reads these at import time, so they must be set before any repo module is imported
+    os.environ['CACHE_DIR'] = cache_dir
+    for key in ('FEED_CACHE_PATH', 'AI_CACHE_PATH', 'LAST_RUN_PATH', 'IMAGE_STORE_DIR'):
+        os.environ.pop(key, None)
+    os.environ['AI_CACHE_ENABLED'] = 'true' if args.ai_cache else 'false'
+    os.environ['HOST_RATE_LIMIT'] = str(args.host_rate)
+    os.environ.setdefault('FEED_FETCH_TOTAL_TIMEOUT', '600')
+    for key in ('PERPLEXITY_API_KEY', 'PINECONE_API_KEY', 'GOOGLE_API_KEY', 'PINECONE_INDEX_NAME'):
+        os.environ.setdefault(key, 'bench')
+
+    server, hosts, port = fakes.start_site_server(args.hosts, args.articles_per_feed, args.site_latency,
+                                                  args.site_error_rate, full_text=args.full_text_feeds)
+    try:
+        try:
+            import crawl4ai  # noqa: F401
+        except ImportError:
+            sys.modules['crawl4ai'] = fakes.crawl4ai_module()
+
+        import ai_services
+        import image_cache
+        import pinecone_manager
+        import pipeline
+        import rss_fetcher
+        import scrape
+
+        logging.getLogger().setLevel(args.log_level)
+
+        chat = fakes.FakeChatClient(args.chat_latency, args.chat_error_rate)
+        embedder = fakes.FakeEmbeddingClient(args.embed_latency, args.embed_document_latency,
+                                             args.embed_error_rate)
+        index = fakes.InMemoryIndex(args.upsert_latency)
+        fakes.FakeCrawler.render_latency = args.render_latency
+
+        rss_fetcher.RSS_FEEDS = fakes.make_feeds(feed_count, hosts, port)
+        scrape.AsyncWebCrawler = fakes.FakeCrawler
+        ai_services.get_perplexity_client = lambda: chat
+        ai_services.get_genai = lambda: embedder
+        pinecone_manager.get_pinecone = lambda: fakes.FakePinecone(index)
+
+        timings = {stage: [] for stage in STAGES}
+        fetch_feed = rss_fetcher.fetch_feed
+        rss_fetcher.fetch_feed = _timed(timings, 'feed', rss_fetcher.fetch_feed)
+        scrape.ArticleScraper.scrape_article = _timed_async(timings, 'scrape', scrape.ArticleScraper.scrape_article)
+        image_cache.ImageStore.ingest = _timed(timings, 'thumbnail', image_cache.ImageStore.ingest)
+        pipeline.summarize_content = _timed(timings, 'summarize', pipeline.summarize_content)
+        pipeline.prepare_vectors = _timed(timings, 'embed', pipeline.prepare_vectors)
+        index.upsert = _timed(timings, 'store', index.upsert)
+
+        start = time.perf_counter()
+        asyncio.run(pipeline.process_articles())
+        wall = time.perf_counter() - start
+
+        # Plan the next incremental run: exactly the articles whose summary failed must be retried
+        rss_fetcher.fetch_feed = fetch_feed
+        recent_articles, _ = rss_fetcher.fetch_recent_articles()
+        retried = len(pinecone_manager.plan_sync(index, recent_articles)[0])
+    finally:
+        server.terminate()
+
+    from metrics import metrics
+
+    stored = len(index.vectors)
+    # One collector fills embed batches: at most one partial batch per linger window, plus full ones
+    embed_budget = (math.ceil(feed_count * args.articles_per_feed / pipeline.EMBED_BATCH_SIZE)
+                    + math.ceil(wall / pipeline.EMBED_BATCH_LINGER)) if pipeline.EMBED_BATCH_LINGER > 0 else None
+    full_text_feeds = sum(1 for feed in range(feed_count) if fakes.is_full_text_feed(feed, args.full_text_feeds))
+    return {
+        'feeds': feed_count,
+        'hosts': min(len(hosts), feed_count),
+        'articles_expected': feed_count * args.articles_per_feed,
+        'articles_stored': stored,
+        # Complete feed bodies (with or without a separate <description>) must be used, not scraped
+        'feed_bodies_expected': full_text_feeds * args.articles_per_feed,
+        'feed_bodies_used': int(metrics.counter('content_source_total', source='feed', feed_body='full')),
+        'summaries_failed': int(metrics.counter('summaries_failed_total')),
+        'retried_next_run': retried,
+        'wall_s': round(wall, 3),
+        'articles_per_sec': round(stored / wall, 3) if wall else 0.0,
+        'peak_rss_mb': round(peak_rss_mb() or 0.0, 1),
+        'calls': {'chat': chat.calls, 'embed': embedder.calls, 'upsert': index.upsert_calls},
+        'embed_calls_max': embed_budget,
+        'stages': {
+            stage: {
+                'count': len(values),
+                'p50_ms': round(percentile(values, 50) * 1000, 1),
+                'p95_ms': round(percentile(values, 95) * 1000, 1),
+            }
+            for stage, values in timings.items()
+        },
+    }
+
+
+def print_report(report):
+    print(f"\n== {report['feeds']} feeds on {report['hosts']} hosts: {report['articles_stored']}/"
+          f"{report['articles_expected']} articles stored in {report['wall_s']:.1f}s "
+          f"({report['articles_per_sec']:.2f} articles/s), peak RSS {report['peak_rss_mb']:.0f} MB")
+    print(f"   feed bodies used instead of scraping: {report['feed_bodies_used']}/{report['feed_bodies_expected']}")
+    print(f"   failed summaries: {report['summaries_failed']}, "
+          f"planned for retry by the next run: {report['retried_next_run']}")
+    embed_note = f" (at most {report['embed_calls_max']} expected)" if report['embed_calls_max'] is not None else ''
+    print(f"   provider calls: {report['calls']['chat']} chat, {report['calls']['embed']} embed{embed_note}, "
+          f"{report['calls']['upsert']} upsert")
+    print(f"   {'stage':<10} {'count':>7} {'p50 ms':>10} {'p95 ms':>10}")
+    for stage, stats in report['stages'].items():
+        print(f"   {stage:<10} {stats['count']:>7} {stats['p50_ms']:>10.1f} {stats['p95_ms']:>10.1f}")
+
+
+def child_argv(args, feed_count):
+    argv = [sys.executable, '-m', 'benchmarks.bench_pipeline', '--feeds', str(feed_count), '--result-line']
+    for name, value in vars(args).items():
+        if name in ('feeds', 'json', 'result_line'):
+            continue
+        flag = '--' + name.replace('_', '-')
+        if isinstance(value, bool):
+            if value:
+                argv.append(flag)
+        else:
+            argv.extend([flag, str(value)])
+    return argv
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--feeds', type=int, nargs='+', default=[12], help='feed counts to run, one run each')
+    parser.add_argument('--articles-per-feed', type=int, default=3)
+    parser.add_argument('--hosts', type=int, default=8, help='distinct loopback hosts the feeds are spread over')
+    parser.add_argument('--host-rate', type=float, default=20, help='per-host requests/sec for the politeness limiter')
+    parser.add_argument('--site-latency', type=float, default=0.05, help='mean fake site response time (s)')
+    parser.add_argument('--site-error-rate', type=float, default=0.0)
+    parser.add_argument('--full-text-feeds', type=float, default=0.0,
+                        help='fraction of feeds that publish whole posts in content:encoded')
+    parser.add_argument('--render-latency', type=float, default=0.3, help='mean browser stand-in render time (s)')
+    parser.add_argument('--chat-latency', type=float, default=1.0, help='mean summary request time (s)')
+    parser.add_argument('--chat-error-rate', type=float, default=0.0)
+    parser.add_argument('--embed-latency', type=float, default=0.3, help='mean embedding request time (s)')
+    parser.add_argument('--embed-document-latency', type=float, default=0.005, help='added per document (s)')
+    parser.add_argument('--embed-error-rate', type=float, default=0.0)
+    parser.add_argument('--upsert-latency', type=float, default=0.1, help='mean upsert request time (s)')
+    parser.add_argument('--ai-cache', action='store_true', help='leave the AI response cache enabled')
+    parser.add_argument('--log-level', default='WARNING')
+    parser.add_argument('--json', help='write the reports to this JSON file')
+    parser.add_argument('--result-line', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if len(args.feeds) == 1:
+        reports = [run_scale(args, args.feeds[0])]
+    else:
+        reports = []
+        for feed_count in args.feeds:
+            result = subprocess.run(child_argv(args, feed_count), stdout=subprocess.PIPE, text=True)
+            lines = [line for line in result.stdout.splitlines() if line.startswith('RESULT ')]
+            if result.returncode != 0 or not lines:
+                print(f"Run with {feed_count} feeds failed (exit {result.returncode})")
+                return 1
+            reports.append(json.loads(lines[-1][len('RESULT '):]))
+
+    if args.result_line:
+        print('RESULT ' + json.dumps(reports[0]))
+        return 0
+
+    for report in reports:
+        print_report(report)
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(reports, f, indent=2)
+
+    return 0 if all(r['articles_stored'] == r['articles_expected'] and r['feed_bodies_used'] == r['feed_bodies_expected']
+                    and r['retried_next_run'] == r['summaries_failed']
+                    and (r['embed_calls_max'] is None or r['calls']['embed'] <= r['embed_calls_max'])
+                    for r in reports) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,100 @@
+"""Benchmark text_utils cleaning against the original implementation.
+
+Checks that the current functions produce byte-identical output to the frozen
+originals in benchmarks/legacy.py, then times both.
+
+    python -m benchmarks.bench_text_utils
+    python -m benchmarks.bench_text_utils --corpus exported_summaries.json
+
+The bundled corpus (benchmarks/data/summaries.json) holds representative
+Perplexity-style summaries; pass --corpus with a JSON list of strings exported
+from the index to run on real data. Randomized variants are added to stress
+edge cases (markdown, curly quotes, control and non-ASCII characters).
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import timeit
+
+from benchmarks.legacy import (legacy_clean_text_for_speech, legacy_clean_perplexity_summary,
+                               legacy_clean_string_for_metadata)
+from text_utils import (clean_text_for_speech, clean_perplexity_summary, clean_string_for_metadata,
+                        clean_texts_for_speech)
+
+DEFAULT_CORPUS = os.path.join(os.path.dirname(__file__), 'data', 'summaries.json')
+
+NOISE = ['*', '**', '_', '__', '`', '\\n', '\\', '/', ', ', ',', '"', '“', '”', '’', '—', '–', '…', '•',
+         '[1]', '(2)', '\n', '\t', '  ', 'é', '日本', '\x00', '\x7f', '€', '™', '#', '@', '%', '&', '<b>',
+         'References: x', '\n3. ref', ' 42', 'A. I.', 'v2. 5']
+
+
+def load_corpus(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return [text for text in json.load(f) if isinstance(text, str)]
+
+
+def fuzz_variants(corpus, count, seed=1234):
+    """Splice random noise tokens into corpus strings"""
+    rng = random.Random(seed)
+    variants = []
+    for _ in range(count):
+        words = rng.choice(corpus).split(' ')
+        for _ in range(rng.randint(1, 12)):
+            words.insert(rng.randrange(len(words) + 1), rng.choice(NOISE))
+        variants.append(rng.choice([' ', '', '\n']).join(words))
+    return variants
+
+
+def check_identical(texts):
+    """Return a list of (function, input) pairs where outputs differ"""
+    mismatches = []
+    for text in texts:
+        if clean_text_for_speech(text) != legacy_clean_text_for_speech(text):
+            mismatches.append(('clean_text_for_speech', text))
+        if clean_perplexity_summary(text) != legacy_clean_perplexity_summary(text):
+            mismatches.append(('clean_perplexity_summary', text))
+        for max_len in (100, 2000):
+            if clean_string_for_metadata(text, max_len) != legacy_clean_string_for_metadata(text, max_len):
+                mismatches.append((f'clean_string_for_metadata[{max_len}]', text))
+    if clean_texts_for_speech(texts) != [legacy_clean_text_for_speech(text) for text in texts]:
+        mismatches.append(('clean_texts_for_speech', '<batch>'))
+    return mismatches
+
+
+def time_pair(label, new_fn, legacy_fn, texts, repeat):
+    legacy = min(timeit.repeat(lambda: [legacy_fn(t) for t in texts], number=1, repeat=repeat))
+    new = min(timeit.repeat(lambda: [new_fn(t) for t in texts], number=1, repeat=repeat))
+    per_item = 1e6 / len(texts)
+    print(f"{label:<28} legacy {legacy * per_item:8.1f} us   new {new * per_item:8.1f} us   "
+          f"speedup {legacy / new:5.2f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--corpus', default=DEFAULT_CORPUS, help='JSON list of summary strings')
+    parser.add_argument('--fuzz', type=int, default=5000, help='number of randomized variants to check')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    corpus = load_corpus(args.corpus)
+    texts = corpus + fuzz_variants(corpus, args.fuzz)
+
+    mismatches = check_identical(texts)
+    print(f"Checked {len(texts)} inputs ({len(corpus)} corpus + {args.fuzz} fuzzed): "
+          f"{'identical output' if not mismatches else f'{len(mismatches)} MISMATCHES'}")
+    for name, text in mismatches[:10]:
+        print(f"  {name}: {text!r}")
+
+    time_pair('clean_text_for_speech', clean_text_for_speech, legacy_clean_text_for_speech, texts, args.repeat)
+    time_pair('clean_perplexity_summary', clean_perplexity_summary, legacy_clean_perplexity_summary, texts,
+              args.repeat)
+    time_pair('clean_string_for_metadata', lambda t: clean_string_for_metadata(t, 2000),
+              lambda t: legacy_clean_string_for_metadata(t, 2000), texts, args.repeat)
+
+    return 1 if mismatches else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,88 @@
+"""Golden-output check and micro-benchmark for tts_rules.preprocess_for_tts.
+
+    python -m benchmarks.bench_tts_rules
+
+Verifies the rule engine against benchmarks/data/tts_golden.json and against
+the frozen original implementation on the summary corpus plus fuzzed
+variants, then times both per summary and on a whole newsletter script.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import timeit
+
+from benchmarks.legacy import legacy_preprocess_for_tts
+from tts_rules import preprocess_for_tts
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), 'data')
+GOLDEN = os.path.join(DATA_DIR, 'tts_golden.json')
+CORPUS = os.path.join(DATA_DIR, 'summaries.json')
+
+NOISE = ['GPT 4', 'GPT 4. 1', '2. 5', '1. 2. 3', 'A. I.', 'A.I.x', 'U.S.', 'U. K.x', 'N. A. S. A.', 'X.Y.Z.w',
+         'Inc.', 'Inc.x', 'Ltd.x', 'Corp.y', 'API', 'URL', 'HTTP', 'API 2', 'HTTP 1.1', '\n', '\t', '  ', '.',
+         '3', 'B.', 'C.x', 'API.', 'LLM 3. 5']
+
+
+def fuzz_variants(corpus, count, seed=4321):
+    rng = random.Random(seed)
+    variants = []
+    for _ in range(count):
+        words = rng.choice(corpus).split(' ')
+        for _ in range(rng.randint(1, 10)):
+            words.insert(rng.randrange(len(words) + 1), rng.choice(NOISE))
+        variants.append(rng.choice([' ', '', '\n']).join(words))
+    return variants
+
+
+def check_golden():
+    with open(GOLDEN, 'r', encoding='utf-8') as f:
+        cases = json.load(f)
+    failures = [case for case in cases if preprocess_for_tts(case['input']) != case['expected']]
+    for case in failures:
+        print(f"  golden mismatch: {case['input']!r} -> {preprocess_for_tts(case['input'])!r}, "
+              f"expected {case['expected']!r}")
+    return len(cases), failures
+
+
+def time_it(fn, texts, repeat):
+    return min(timeit.repeat(lambda: [fn(text) for text in texts], number=1, repeat=repeat))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--fuzz', type=int, default=5000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    golden_count, golden_failures = check_golden()
+    print(f"Golden cases: {golden_count - len(golden_failures)}/{golden_count} passed")
+
+    with open(CORPUS, 'r', encoding='utf-8') as f:
+        corpus = json.load(f)
+    texts = corpus + fuzz_variants(corpus, args.fuzz)
+    mismatches = [text for text in texts if preprocess_for_tts(text) != legacy_preprocess_for_tts(text)]
+    print(f"Checked {len(texts)} inputs against the original: "
+          f"{'identical output' if not mismatches else f'{len(mismatches)} MISMATCHES'}")
+    for text in mismatches[:10]:
+        print(f"  {text!r}")
+
+    for label, sample in (('per summary (corpus)', corpus), ('per input (fuzzed)', texts)):
+        legacy = time_it(legacy_preprocess_for_tts, sample, args.repeat)
+        new = time_it(preprocess_for_tts, sample, args.repeat)
+        per_item = 1e6 / len(sample)
+        print(f"{label:<24} legacy {legacy * per_item:8.1f} us   new {new * per_item:8.1f} us   "
+              f"speedup {legacy / new:5.2f}x")
+
+    script = ['\n\n'.join(corpus * 3)]
+    legacy = time_it(legacy_preprocess_for_tts, script, args.repeat)
+    new = time_it(preprocess_for_tts, script, args.repeat)
+    print(f"{'newsletter script':<24} legacy {legacy * 1e6:8.1f} us   new {new * 1e6:8.1f} us   "
+          f"speedup {legacy / new:5.2f}x")
+
+    return 1 if golden_failures or mismatches else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,122 @@
+"""Benchmark the local vector store's write path and queries, and check its results.
+
+Writes --vectors random vectors in VectorWriter-sized batches, then flushes
+once, as a pipeline run does. It checks:
+
+- every query returns the same top-k as a brute-force numpy reference
+- a fresh reader (the app's view) sees nothing before the flush and everything after it
+- the flush writes exactly one generation file
+
+It times the batched writes, the flush and a query. With --per-batch-flush
+it also flushes after every batch, the old one-generation-per-write
+behaviour, for comparison.
+
+    python -m benchmarks.bench_vector_store
+    python -m benchmarks.bench_vector_store --vectors 100000 --per-batch-flush
+
+Every flush rewrites the whole matrix, so flush time grows linearly with the
+index: about a second per few hundred thousand 768-dimension vectors. That is
+the practical size limit for this backend; use Pinecone beyond it.
+"""
+import argparse
+import glob
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from vector_store import LocalVectorIndex
+
+DIMENSION = 768
+
+
+def make_records(count, seed=7):
+    rng = np.random.default_rng(seed)
+    vectors = rng.normal(size=(count, DIMENSION)).astype(np.float32)
+    records = [{'id': f"doc-{i}", 'values': vectors[i].tolist(), 'metadata': {'source': f"S{i % 5}", 'n': i}}
+               for i in range(count)]
+    return records, vectors
+
+
+def reference_top_k(vectors, query, k, mask=None):
+    scores = vectors @ query / (np.linalg.norm(vectors, axis=1) * np.linalg.norm(query))
+    if mask is not None:
+        scores = np.where(mask, scores, -np.inf)
+    return [f"doc-{row}" for row in np.argsort(-scores, kind='stable')[:k]]
+
+
+def write(directory, records, batch_size, per_batch_flush):
+    index = LocalVectorIndex(directory)
+    start = time.perf_counter()
+    for offset in range(0, len(records), batch_size):
+        index.upsert(vectors=records[offset:offset + batch_size])
+        if per_batch_flush:
+            index.flush()
+    writes = time.perf_counter() - start
+
+    reader = LocalVectorIndex(directory)
+    unflushed_visible = reader.describe_index_stats().total_vector_count
+    start = time.perf_counter()
+    index.flush()
+    flush = time.perf_counter() - start
+    return index, reader, writes, flush, unflushed_visible
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--vectors', type=int, default=20000)
+    parser.add_argument('--batch-size', type=int, default=100, help='vectors per upsert, like UPSERT_BATCH_SIZE')
+    parser.add_argument('--queries', type=int, default=20)
+    parser.add_argument('--per-batch-flush', action='store_true', help='also time flushing after every batch')
+    args = parser.parse_args()
+
+    records, vectors = make_records(args.vectors)
+    failures = []
+    directory = tempfile.mkdtemp(prefix='bench-vector-store-')
+    try:
+        index, reader, writes, flush, unflushed_visible = write(directory, records, args.batch_size, False)
+        if unflushed_visible:
+            failures.append(f"reader saw {unflushed_visible} vectors before the flush")
+        if reader.describe_index_stats().total_vector_count != args.vectors:
+            failures.append("reader does not see every vector after the flush")
+        generations = len(glob.glob(os.path.join(directory, 'vectors-*.npy')))
+        if generations != 1:
+            failures.append(f"{generations} generation files after one flush")
+
+        rng = np.random.default_rng(11)
+        mask = np.array([i % 5 in (1, 3) for i in range(args.vectors)])
+        query_times = []
+        for _ in range(args.queries):
+            query = rng.normal(size=DIMENSION).astype(np.float32)
+            start = time.perf_counter()
+            matches = reader.query(vector=query, top_k=10).matches
+            query_times.append(time.perf_counter() - start)
+            if [match.id for match in matches] != reference_top_k(vectors, query, 10):
+                failures.append("query top-k differs from the reference")
+            filtered = reader.query(vector=query, top_k=10, filter={'source': {'$in': ['S1', 'S3']}}).matches
+            if [match.id for match in filtered] != reference_top_k(vectors, query, 10, mask):
+                failures.append("filtered query top-k differs from the reference")
+
+        print(f"{args.vectors} vectors in batches of {args.batch_size}: "
+              f"{'all checks passed' if not failures else f'{len(failures)} FAILURES'}")
+        for failure in sorted(set(failures)):
+            print(f"  {failure}")
+        print(f"{'buffered upserts':<28} {writes * 1000:9.1f} ms")
+        print(f"{'one flush':<28} {flush * 1000:9.1f} ms")
+        print(f"{'query p50':<28} {sorted(query_times)[len(query_times) // 2] * 1e6:9.1f} us")
+
+        if args.per_batch_flush:
+            shutil.rmtree(directory)
+            _, _, writes, flush, _ = write(directory, records, args.batch_size, True)
+            print(f"{'flush after every batch':<28} {(writes + flush) * 1000:9.1f} ms")
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,335 @@
+"""Local stand-ins for the pipeline's external services, used by bench_pipeline.
+
+- A site server that serves RSS feeds, article pages and images. It runs in its
+  own process so it does not count towards the pipeline's CPU or memory.
+- A browser stand-in for Crawl4AI that fetches pages over HTTP and adds a
+  render delay.
+- Perplexity-style chat and Gemini-style embedding clients with configurable
+  latency and error rates.
+- An in-memory index that implements the subset of the Pinecone API the
+  pipeline uses.
+"""
+import asyncio
+import hashlib
+import math
+import multiprocessing
+import random
+import threading
+import time
+import types
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from io import BytesIO
+from xml.sax.saxutils import escape
+
+WORDS = ('model', 'agents', 'inference', 'latency', 'product', 'teams', 'training', 'evaluation', 'data',
+         'research', 'startup', 'pricing', 'launch', 'benchmark', 'open', 'weights', 'users', 'growth')
+
+
+def _paragraphs(seed, count):
+    rng = random.Random(seed)
+    return [' '.join(rng.choice(WORDS) for _ in range(rng.randint(40, 80))).capitalize() + '.'
+            for _ in range(count)]
+
+
+def _jpeg(seed):
+    from PIL import Image
+    out = BytesIO()
+    Image.new('RGB', (1200, 800), ((seed * 37) % 256, (seed * 91) % 256, 120)).save(out, format='JPEG')
+    return out.getvalue()
+
+
+class SiteHandler(BaseHTTPRequestHandler):
+    """Serves /feed/<n>, /post/<n>/<k> and /img/<n>.jpg for the benchmark's fake newsletters"""
+
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status, body, content_type, extra_headers=None):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (extra_headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        site = self.server.site
+        latency = site['latency']
+        if latency:
+            time.sleep(latency * random.uniform(0.5, 1.5))
+        if random.random() < site['error_rate']:
+            self._send(503, b'busy', 'text/plain', {'Retry-After': '1'})
+            return
+
+        parts = self.path.strip('/').split('/')
+        base = f"http://{self.headers.get('Host')}"
+        try:
+            if parts[0] == 'feed' and len(parts) == 2:
+                feed = int(parts[1])
+                # Spread the full-text fraction evenly over feed numbers
+                full_text = is_full_text_feed(feed, site['full_text'])
+                self._send(200, self._feed(feed, base, site['articles_per_feed'], site['started'], full_text), 'application/rss+xml')
+            elif parts[0] == 'post' and len(parts) == 3:
+                self._send(200, self._post(int(parts[1]), int(parts[2]), base), 'text/html; charset=utf-8')
+            elif parts[0] == 'img' and len(parts) == 2:
+                images = site['images']
+                self._send(200, images[int(parts[1].split('.')[0]) % len(images)], 'image/jpeg')
+            else:
+                self._send(404, b'not found', 'text/plain')
+        except ValueError:
+            self._send(404, b'not found', 'text/plain')
+
+    @staticmethod
+    def _feed(feed, base, articles_per_feed, started, full_text=False):
+        # Dates are fixed at server start, so a feed is identical every time it is fetched
+        now = started
+        items = []
+        for k in range(articles_per_feed):
+            published = format_datetime(now - timedelta(minutes=17 * k + feed % 60 + 1))
+            summary = _paragraphs(feed * 1000 + k, 1)[0][:300]
+            description = f"<description>{escape(summary)}</description>"
+            body = ''
+            if full_text:
+                # Every other full-text feed has no <description>, so feedparser copies the body into summary
+                if feed % 2:
+                    description = ''
+
+                # Substack-style full post plus an image enclosure
+                post = ''.join(f'<p>{p}</p>' for p in _paragraphs(feed * 1000 + k, 12))
+                body = (f"<content:encoded><![CDATA[{post}]]></content:encoded>"
+                        f'<enclosure url="{base}/img/{feed}.jpg" type="image/jpeg" length="0"/>')
+            items.append(f"<item><title>Newsletter {feed} issue {k}: {escape(summary[:60])}</title>"
+                         f"<link>{base}/post/{feed}/{k}</link><author>Author {feed}</author>"
+                         f"<pubDate>{published}</pubDate>{description}{body}</item>")
+        return (f'<?xml version="1.0" encoding="UTF-8"?>'
+                f'<rss version="2.0" xmlns:content="http://purl.org/rss/1.0/modules/content/"><channel>'
+                f'<title>Newsletter {feed}</title><link>{base}/</link>{"".join(items)}</channel></rss>').encode()
+
+    @staticmethod
+    def _post(feed, k, base):
+        body = ''.join(f'<p>{p}</p>' for p in _paragraphs(feed * 1000 + k, 12))
+        return (f'<html><head><title>Issue {k}</title><meta property="og:image" content="{base}/img/{feed}.jpg">'
+                f'<script>var tracking = true;</script><style>p {{ margin: 0 }}</style></head>'
+                f'<body><nav>Home | Archive</nav><article><h1>Newsletter {feed} issue {k}</h1>{body}</article>'
+                f'<footer>Unsubscribe</footer></body></html>').encode()
+
+
+def _serve(hosts, port, site, ready):
+    site = dict(site, images=[_jpeg(seed) for seed in range(8)], started=datetime.now(timezone.utc))
+    servers = []
+    for host in hosts:
+        server = ThreadingHTTPServer((host, port), SiteHandler)
+        server.daemon_threads = True
+        server.site = site
+        servers.append(server)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+    ready.set()
+    threading.Event().wait()
+
+
+def is_full_text_feed(feed, fraction):
+    """Whether fake feed number feed publishes whole posts, for a full_text fraction of feeds"""
+    return (feed * 37) % 100 < fraction * 100
+
+
+def start_site_server(host_count=1, articles_per_feed=3, latency=0.02, error_rate=0.0, port=0, full_text=0.0):
+    """Start the fake site in a child process listening on host_count loopback addresses.
+
+    A full_text fraction of the feeds publish whole posts in content:encoded
+    (see is_full_text_feed); half of those have no <description>.
+
+    Returns (process, hosts, port). Each loopback address is a separate host for the
+    pipeline's per-host rate limiter and connection pool; Linux routes all of
+    127.0.0.0/8 to loopback, other systems usually only 127.0.0.1.
+    """
+    if port == 0:
+        import socket
+        with socket.socket() as probe:
+            probe.bind(('127.0.0.1', 0))
+            port = probe.getsockname()[1]
+
+    hosts = [f"127.0.{i // 250}.{i % 250 + 1}" for i in range(max(1, host_count))]
+    site = {'articles_per_feed': articles_per_feed, 'latency': latency, 'error_rate': error_rate,
+            'full_text': full_text}
+    ready = multiprocessing.Event()
+    process = multiprocessing.Process(target=_serve, args=(hosts, port, site, ready), daemon=True)
+    process.start()
+    if not ready.wait(30):
+        process.terminate()
+        raise RuntimeError("fake site server did not start")
+    return process, hosts, port
+
+
+def make_feeds(count, hosts, port):
+    """RSS_FEEDS-style mapping of count fake feeds spread round-robin over hosts"""
+    return {f"Bench Newsletter {n}": f"http://{hosts[n % len(hosts)]}:{port}/feed/{n}" for n in range(count)}
+
+
+class _Kwargs:
+    """Attribute bag standing in for Crawl4AI config objects"""
+
+    def __init__(self, **kwargs):
+        self.__dict__.update(kwargs)
+
+
+class FakeCrawler:
+    """Crawl4AI AsyncWebCrawler stand-in: plain HTTP fetch plus a simulated render delay"""
+
+    render_latency = 0.2
+
+    def __init__(self, config=None, verbose=False):
+        self.ready = True
+        self._session = None
+
+    async def start(self):
+        import aiohttp
+        self._session = aiohttp.ClientSession()
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+
+    async def arun(self, url, config=None):
+        await asyncio.sleep(self.render_latency * random.uniform(0.5, 1.5))
+        try:
+            async with self._session.get(url) as response:
+                html = (await response.read()).decode('utf-8', 'replace')
+                status = response.status
+                headers = dict(response.headers)
+        except Exception as e:
+            return types.SimpleNamespace(success=False, error_message=str(e), status_code=None, html='',
+                                         cleaned_html='', markdown='', response_headers={})
+        return types.SimpleNamespace(success=status == 200, error_message='' if status == 200 else f"HTTP {status}",
+                                     status_code=status, html=html, cleaned_html=html, markdown='',
+                                     response_headers=headers)
+
+
+def crawl4ai_module():
+    """Module object exposing the Crawl4AI names scrape.py imports, backed by FakeCrawler"""
+    module = types.ModuleType('crawl4ai')
+    module.AsyncWebCrawler = FakeCrawler
+    module.BrowserConfig = _Kwargs
+    module.CrawlerRunConfig = _Kwargs
+    module.CacheMode = types.SimpleNamespace(BYPASS='bypass', ENABLED='enabled')
+    return module
+
+
+def _delay(latency):
+    if latency:
+        time.sleep(latency * random.uniform(0.5, 1.5))
+
+
+class FakeChatClient:
+    """Perplexity (OpenAI-compatible) client stand-in returning canned summaries"""
+
+    def __init__(self, latency=0.8, error_rate=0.0):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.calls = 0
+        self.chat = types.SimpleNamespace(completions=types.SimpleNamespace(create=self._create))
+
+    def _create(self, model, messages, **kwargs):
+        self.calls += 1
+        _delay(self.latency)
+        if random.random() < self.error_rate:
+            raise RuntimeError("fake chat endpoint: 500 Internal Server Error")
+        digest = hashlib.sha256(messages[-1]['content'].encode('utf-8')).hexdigest()[:8]
+        text = (f"The article {digest} describes a new development in applied AI. It explains how teams "
+                f"measure latency and cost when moving models into production. The author compares "
+                f"several approaches with concrete numbers. The piece ends with an outlook for the next year.")
+        return types.SimpleNamespace(choices=[types.SimpleNamespace(message=types.SimpleNamespace(content=text))])
+
+
+class FakeEmbeddingClient:
+    """Gemini embed_content stand-in with per-request and per-document latency"""
+
+    def __init__(self, latency=0.3, per_document_latency=0.005, error_rate=0.0, dimension=768):
+        self.latency = latency
+        self.per_document_latency = per_document_latency
+        self.error_rate = error_rate
+        self.dimension = dimension
+        self.calls = 0
+
+    def _vector(self, text):
+        rng = random.Random(hashlib.sha256(text.encode('utf-8')).digest())
+        values = [rng.gauss(0, 1) for _ in range(self.dimension)]
+        norm = math.sqrt(sum(v * v for v in values)) or 1.0
+        return [v / norm for v in values]
+
+    def embed_content(self, model, content, task_type=None, **kwargs):
+        self.calls += 1
+        documents = content if isinstance(content, list) else [content]
+        _delay(self.latency + self.per_document_latency * len(documents))
+        if random.random() < self.error_rate:
+            raise RuntimeError("fake embedding endpoint: 503 Service Unavailable")
+        vectors = [self._vector(text) for text in documents]
+        return {'embedding': vectors if isinstance(content, list) else vectors[0]}
+
+
+class InMemoryIndex:
+    """Pinecone Index stand-in holding vectors in a dict"""
+
+    def __init__(self, upsert_latency=0.05, dimension=768):
+        self.upsert_latency = upsert_latency
+        self.dimension = dimension
+        self.vectors = {}
+        self.upsert_calls = 0
+        self._lock = threading.Lock()
+
+    def upsert(self, vectors):
+        _delay(self.upsert_latency)
+        with self._lock:
+            self.upsert_calls += 1
+            for record in vectors:
+                self.vectors[record['id']] = record
+
+    def fetch(self, ids):
+        with self._lock:
+            found = {doc_id: types.SimpleNamespace(id=doc_id, values=self.vectors[doc_id]['values'],
+                                                   metadata=self.vectors[doc_id]['metadata'])
+                     for doc_id in ids if doc_id in self.vectors}
+        return types.SimpleNamespace(vectors=found)
+
+    def delete(self, ids):
+        with self._lock:
+            for doc_id in ids:
+                self.vectors.pop(doc_id, None)
+
+    def list(self, limit=100):
+        with self._lock:
+            ids = list(self.vectors)
+        for start in range(0, len(ids), limit):
+            yield ids[start:start + limit]
+
+    def describe_index_stats(self):
+        with self._lock:
+            return types.SimpleNamespace(total_vector_count=len(self.vectors), dimension=self.dimension)
+
+    def query(self, vector, top_k=10, include_metadata=False, **kwargs):
+        with self._lock:
+            records = list(self.vectors.values())
+        scored = sorted(((sum(a * b for a, b in zip(vector, record['values'])), record) for record in records),
+                        key=lambda pair: pair[0], reverse=True)[:top_k]
+        return types.SimpleNamespace(matches=[
+            types.SimpleNamespace(id=record['id'], score=score,
+                                  metadata=record['metadata'] if include_metadata else None)
+            for score, record in scored
+        ])
+
+
+class FakePinecone:
+    """Pinecone client stand-in that always hands out the same in-memory index"""
+
+    def __init__(self, index):
+        self.index = index
+
+    def list_indexes(self):
+        return [types.SimpleNamespace(name='bench')]
+
+    def Index(self, name):
+        return self.index
@@ -1,8 +1,6 @@
 import os
+from functools import lru_cache
 from dotenv import load_dotenv
-from openai import OpenAI
-from pinecone import Pinecone
-import google.generativeai as genai
 import pytz
 import logging
 
@@ -31,16 +29,147 @@ RSS_FEEDS = {
     "Practical AI Podcast": "https://feeds.megaphone.fm/MLN2155636147"
 }
 
-# Configure APIs
-genai.configure(api_key=GOOGLE_API_KEY)
+# Feed fetching limits (seconds)
+FEED_FETCH_MAX_WORKERS = int(os.getenv("FEED_FETCH_MAX_WORKERS", "8"))
+FEED_TIMEOUT = float(os.getenv("FEED_TIMEOUT", "20"))
+FEED_FETCH_TOTAL_TIMEOUT = float(os.getenv("FEED_FETCH_TOTAL_TIMEOUT", "60"))
 
-# Configure Perplexity API client
-perplexity_client = OpenAI(
-    api_key=PERPLEXITY_API_KEY,
-    base_url="https://api.perplexity.ai"
-)
+# Full post bodies in feeds (content:encoded) are used instead of scraping when they have at
+# least this many characters of text and don't look truncated; 0 always scrapes
+FEED_CONTENT_MIN_CHARS = int(os.getenv("FEED_CONTENT_MIN_CHARS", "1000"))
 
-pc = Pinecone(api_key=PINECONE_API_KEY)
+# Pipeline stage concurrency (workers per stage; for embed, batch requests in flight) and queue depth between stages
+SCRAPE_CONCURRENCY = int(os.getenv("SCRAPE_CONCURRENCY", "3"))
+SUMMARIZE_CONCURRENCY = int(os.getenv("SUMMARIZE_CONCURRENCY", "4"))
+EMBED_CONCURRENCY = int(os.getenv("EMBED_CONCURRENCY", "4"))
+STORE_CONCURRENCY = int(os.getenv("STORE_CONCURRENCY", "2"))
+STAGE_QUEUE_SIZE = int(os.getenv("STAGE_QUEUE_SIZE", "8"))
+
+# Documents per Gemini embedding request (provider limit is 100) and how long the
+# pipeline's embed stage waits for a batch to fill before sending it (seconds)
+EMBED_BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", "100"))
+EMBED_BATCH_LINGER = float(os.getenv("EMBED_BATCH_LINGER", "2"))
+
+# "incremental" upserts only new/changed articles and deletes expired ones; "full" wipes the index first
+SYNC_MODE = os.getenv("SYNC_MODE", "incremental")
+
+# Pinecone write path: records per upsert batch, request size cap, parallel upsert threads,
+# and how many written IDs to spot-check with one bulk fetch at the end of a run (0 disables)
+UPSERT_BATCH_SIZE = int(os.getenv("UPSERT_BATCH_SIZE", "100"))
+UPSERT_MAX_BATCH_BYTES = int(os.getenv("UPSERT_MAX_BATCH_BYTES", "2000000"))
+UPSERT_THREADS = int(os.getenv("UPSERT_THREADS", "2"))
+VERIFY_SAMPLE_SIZE = int(os.getenv("VERIFY_SAMPLE_SIZE", "5"))
+
+# Vector store backend for both the pipeline and the app: "pinecone" (hosted index) or
+# "local" (embedded index in LOCAL_INDEX_DIR, no network needed; for dev and tests)
+VECTOR_STORE = os.getenv("VECTOR_STORE", "pinecone").lower()
+
+# Crawl4AI browser pool: warm browsers kept alive and pages served before a browser is recycled
+BROWSER_POOL_SIZE = int(os.getenv("BROWSER_POOL_SIZE", "3"))
+BROWSER_MAX_PAGES = int(os.getenv("BROWSER_MAX_PAGES", "50"))
+
+# Shared HTTP client used by the scraper's non-browser fallback
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "20"))
+HTTP_PER_HOST_LIMIT = int(os.getenv("HTTP_PER_HOST_LIMIT", "4"))
+HTTP_TIMEOUT = float(os.getenv("HTTP_TIMEOUT", "30"))
+
+# Adaptive scrape strategy: per-domain outcomes decide whether plain HTTP runs before the
+# headless browser. Both run until a domain has MIN_SAMPLES outcomes each (and again once its
+# stats are REPROBE_HOURS old); after that HTTP goes first only where it succeeds at least
+# MIN_SUCCESS_RATE of the time with at least MIN_CONTENT_RATIO of the browser's text
+SCRAPE_STRATEGY_MIN_SAMPLES = int(os.getenv("SCRAPE_STRATEGY_MIN_SAMPLES", "3"))
+SCRAPE_HTTP_MIN_SUCCESS_RATE = float(os.getenv("SCRAPE_HTTP_MIN_SUCCESS_RATE", "0.8"))
+SCRAPE_HTTP_MIN_CONTENT_RATIO = float(os.getenv("SCRAPE_HTTP_MIN_CONTENT_RATIO", "0.7"))
+SCRAPE_STRATEGY_REPROBE_HOURS = float(os.getenv("SCRAPE_STRATEGY_REPROBE_HOURS", "72"))
+
+# Per-host politeness: default requests/sec to any single host, plus overrides as "host=rps,host=rps"
+HOST_RATE_LIMIT = float(os.getenv("HOST_RATE_LIMIT", "1"))
+HOST_RATE_LIMITS = {
+    host.strip(): float(rate)
+    for host, _, rate in (item.partition("=") for item in os.getenv("HOST_RATE_LIMITS", "").split(",") if "=" in item)
+}
+
+# Local on-disk caches
+CACHE_DIR = os.getenv("CACHE_DIR", ".cache")
+FEED_CACHE_PATH = os.getenv("FEED_CACHE_PATH", os.path.join(CACHE_DIR, "feed_cache.json"))
+AI_CACHE_ENABLED = os.getenv("AI_CACHE_ENABLED", "true").lower() == "true"
+AI_CACHE_PATH = os.getenv("AI_CACHE_PATH", os.path.join(CACHE_DIR, "ai_cache.sqlite3"))
+AI_CACHE_MAX_AGE_DAYS = float(os.getenv("AI_CACHE_MAX_AGE_DAYS", "30"))
+AI_CACHE_MAX_MB = float(os.getenv("AI_CACHE_MAX_MB", "200"))
+SCRAPE_STATS_PATH = os.getenv("SCRAPE_STATS_PATH", os.path.join(CACHE_DIR, "scrape_stats.json"))
+LOCAL_INDEX_DIR = os.getenv("LOCAL_INDEX_DIR", os.path.join(CACHE_DIR, "vector_index"))
+
+# Written by the pipeline at the end of each run; the app's article cache is keyed on it
+LAST_RUN_PATH = os.getenv("LAST_RUN_PATH", os.path.join(CACHE_DIR, "last_run.json"))
+
+# Stored articles newest first, rewritten by the pipeline after each run; the app lists and pages from it
+ARTICLE_MANIFEST_PATH = os.getenv("ARTICLE_MANIFEST_PATH", os.path.join(CACHE_DIR, "article_manifest.json"))
+
+# Per-run instrumentation: JSON report (spans, latencies, counters) and a Prometheus
+# textfile for node_exporter's textfile collector; set either to "" to disable it
+RUN_REPORT_PATH = os.getenv("RUN_REPORT_PATH", os.path.join(CACHE_DIR, "run_report.json"))
+METRICS_TEXTFILE_PATH = os.getenv("METRICS_TEXTFILE_PATH", os.path.join(CACHE_DIR, "newsletter_pipeline.prom"))
+
+# Streamlit app: seconds an article list is reused when no newer pipeline run is seen,
+# and the thumbnail LRU (items kept in memory, on-disk size cap) plus parallel image downloads
+ARTICLE_CACHE_TTL = int(os.getenv("ARTICLE_CACHE_TTL", "600"))
+THUMBNAIL_CACHE_DIR = os.getenv("THUMBNAIL_CACHE_DIR", os.path.join(CACHE_DIR, "thumbnails"))
+THUMBNAIL_MEMORY_ITEMS = int(os.getenv("THUMBNAIL_MEMORY_ITEMS", "128"))
+THUMBNAIL_DISK_MAX_MB = float(os.getenv("THUMBNAIL_DISK_MAX_MB", "100"))
+IMAGE_FETCH_WORKERS = int(os.getenv("IMAGE_FETCH_WORKERS", "8"))
+
+# Streamlit app: articles per listing page, results returned by a search, and search query
+# embeddings remembered in memory (they are also kept in the AI cache)
+ARTICLES_PER_PAGE = int(os.getenv("ARTICLES_PER_PAGE", "7"))
+SEARCH_TOP_K = int(os.getenv("SEARCH_TOP_K", "10"))
+QUERY_EMBED_CACHE_SIZE = int(os.getenv("QUERY_EMBED_CACHE_SIZE", "256"))
+
+# Pipeline-rendered thumbnails read directly by the app: store location, parallel
+# download/resize workers, and how long thumbnails no article has reused are kept
+IMAGE_STORE_DIR = os.getenv("IMAGE_STORE_DIR", os.path.join(CACHE_DIR, "images"))
+IMAGE_CONCURRENCY = int(os.getenv("IMAGE_CONCURRENCY", "4"))
+IMAGE_STORE_MAX_AGE_DAYS = float(os.getenv("IMAGE_STORE_MAX_AGE_DAYS", "7"))
+
+# Synthesized newsletter audio segments (intro/outro, headings, one per article and voice)
+AUDIO_CACHE_DIR = os.getenv("AUDIO_CACHE_DIR", os.path.join(CACHE_DIR, "audio"))
+AUDIO_CACHE_MAX_MB = float(os.getenv("AUDIO_CACHE_MAX_MB", "200"))
+TTS_CONCURRENCY = int(os.getenv("TTS_CONCURRENCY", "4"))
+
+# Provider clients are built on first use so importing config (and modules that
+# never call a provider) does not pay for importing or initializing their SDKs
+@lru_cache(maxsize=None)
+def get_genai():
+    """Return the google.generativeai module, configured with our API key"""
+    import google.generativeai as genai
+    genai.configure(api_key=GOOGLE_API_KEY)
+    return genai
+
+
+@lru_cache(maxsize=None)
+def get_perplexity_client():
+    """Return the shared Perplexity API client"""
+    from openai import OpenAI
+    return OpenAI(
+        api_key=PERPLEXITY_API_KEY,
+        base_url="https://api.perplexity.ai"
+    )
+
+
+@lru_cache(maxsize=None)
+def get_pinecone():
+    """Return the shared Pinecone client"""
+    from pinecone import Pinecone
+    return Pinecone(api_key=PINECONE_API_KEY)
+
+
+_LAZY_CLIENTS = {'pc': get_pinecone, 'perplexity_client': get_perplexity_client}
+
+
+def __getattr__(name):
+    # Keeps `from config import pc` / `perplexity_client` working, built on first access
+    if name in _LAZY_CLIENTS:
+        return _LAZY_CLIENTS[name]()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 # Set timezones
 IST = pytz.timezone('Asia/Kolkata')
@@ -1,20 +1,22 @@
 import logging
-from config import pc, perplexity_client
-import google.generativeai as genai
+from config import get_genai, get_perplexity_client, get_pinecone, VECTOR_STORE
 logger = logging.getLogger(__name__)
 def test_connection():
     """Test all API connections"""
     logger.info("🔧 Testing API connections...")
 
-    try:
-        indexes = pc.list_indexes()
-        logger.info(f"✅ Pinecone connected. Indexes: {[idx.name for idx in indexes]}")
-    except Exception as e:
-        logger.error(f"❌ Pinecone error: {e}")
-        return False
+    if VECTOR_STORE == 'pinecone':
+        try:
+            indexes = get_pinecone().list_indexes()
+            logger.info(f"✅ Pinecone connected. Indexes: {[idx.name for idx in indexes]}")
+        except Exception as e:
+            logger.error(f"❌ Pinecone error: {e}")
+            return False
+    else:
+        logger.info(f"✅ Using the {VECTOR_STORE} vector store, no Pinecone connection needed")
 
     try:
-        test_embedding = genai.embed_content(
+        test_embedding = get_genai().embed_content(
             model='models/embedding-001',
             content="test",
             task_type="retrieval_document"
@@ -25,7 +27,7 @@ def test_connection():
         return False
 
     try:
-        response = perplexity_client.chat.completions.create(
+        response = get_perplexity_client().chat.completions.create(
             model="sonar-pro",
             messages=[{"role": "user", "content": "Hello"}],
             max_tokens=10
@@ -1,14 +1,79 @@
+import re
+import time
 from datetime import datetime, timedelta, timezone
-from dateutil import parser
+from functools import lru_cache
 import logging
 
 logger = logging.getLogger(__name__)
 
-def parse_date_flexible(date_string):
-    """Parse date string with multiple format support"""
-    if not date_string:
+# Distinct date strings remembered; feeds repeat the same dates every run
+DATE_CACHE_SIZE = 4096
+
+_DAY = timedelta(hours=24)
+_ZERO = timedelta(0)
+
+_MONTHS = {name: number for number, name in enumerate(
+    ('jan', 'feb', 'mar', 'apr', 'may', 'jun', 'jul', 'aug', 'sep', 'oct', 'nov', 'dec'), 1)}
+
+# RFC 822 zone names (military zones aside); offsets in hours
+_RFC822_ZONES = {'gmt': 0, 'ut': 0, 'utc': 0, 'z': 0, 'est': -5, 'edt': -4, 'cst': -6, 'cdt': -5,
+                 'mst': -7, 'mdt': -6, 'pst': -8, 'pdt': -7}
+
+# e.g. "Mon, 06 Oct 2025 14:03:00 +0000", "6 Oct 2025 14:03 GMT"
+_RFC822 = re.compile(
+    r'(?:[a-z]{3}[a-z]*,?\s*)?(\d{1,2})\s+([a-z]{3})[a-z]*\s+(\d{4})\s+(\d{1,2}):(\d{2})(?::(\d{2}))?'
+    r'\s*([+-]\d{4}|[a-z]{1,3})?', re.IGNORECASE)
+
+# e.g. "2025-10-06", "2025-10-06T14:03:00Z", "2025-10-06 14:03:00.123+05:30"
+_ISO8601 = re.compile(
+    r'\d{4}-\d{2}-\d{2}(?:[T ]\d{2}:\d{2}(?::\d{2}(?:\.\d{1,6})?)?)?(?:Z|[+-]\d{2}:?\d{2})?', re.IGNORECASE)
+
+
+def _parse_rfc822(date_string):
+    match = _RFC822.fullmatch(date_string)
+    if not match:
+        return None
+    day, month, year, hour, minute, second, zone = match.groups()
+    month = _MONTHS.get(month.lower())
+    if month is None:
+        return None
+
+    if not zone:
+        tz = timezone.utc
+    elif zone[0] in '+-':
+        minutes = int(zone[1:3]) * 60 + int(zone[3:5])
+        tz = timezone(timedelta(minutes=-minutes if zone[0] == '-' else minutes))
+    elif zone.lower() in _RFC822_ZONES:
+        tz = timezone(timedelta(hours=_RFC822_ZONES[zone.lower()]))
+    else:
         return None
 
+    try:
+        return datetime(int(year), month, int(day), int(hour), int(minute), int(second or 0), tzinfo=tz)
+    except ValueError:
+        return None
+
+
+def _parse_iso8601(date_string):
+    if not _ISO8601.fullmatch(date_string):
+        return None
+    try:
+        parsed = datetime.fromisoformat(date_string)
+    except ValueError:
+        return None
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+@lru_cache(maxsize=DATE_CACHE_SIZE)
+def _parse_date_string(date_string):
+    date_string = date_string.strip()
+    parsed = _parse_rfc822(date_string) or _parse_iso8601(date_string)
+    if parsed is not None:
+        return parsed
+
+    # Anything else goes through dateutil's heuristics, imported only when first needed
+    from dateutil import parser
+
     try:
         parsed = parser.parse(date_string)
         # If no timezone info, assume UTC
@@ -21,6 +86,30 @@ def parse_date_flexible(date_string):
         return None
 
 
+def parse_date_flexible(date_string):
+    """Parse a feed date into a timezone-aware datetime, or return None.
+
+    Accepts feedparser's *_parsed struct_time (or the list it becomes in JSON),
+    which is already UTC. Strings are tried as strict RFC 822 and ISO 8601
+    before falling back to dateutil; naive results are taken as UTC. Parsed
+    strings are memoized.
+    """
+    if not date_string:
+        return None
+
+    if isinstance(date_string, (time.struct_time, tuple, list)):
+        try:
+            return datetime(*date_string[:6], tzinfo=timezone.utc)
+        except (TypeError, ValueError) as e:
+            logger.warning(f"Could not use parsed date: {date_string}, error: {e}")
+            return None
+    if not isinstance(date_string, str):
+        logger.warning(f"Could not parse date: {date_string!r} is not a string")
+        return None
+
+    return _parse_date_string(date_string)
+
+
 def is_from_last_24_hours(published_date, reference_time=None):
     """Check if article was published in the last 24 hours from reference time"""
     if not published_date:
@@ -34,19 +123,14 @@ def is_from_last_24_hours(published_date, reference_time=None):
         if not published_date:
             return False
 
-        if published_date.tzinfo:
-            published_utc = published_date.astimezone(timezone.utc)
-        else:
-            published_utc = published_date.replace(tzinfo=timezone.utc)
+        # Aware datetimes subtract correctly across zones; only naive ones need a zone
+        if published_date.tzinfo is None:
+            published_date = published_date.replace(tzinfo=timezone.utc)
+        if reference_time.tzinfo is None:
+            reference_time = reference_time.replace(tzinfo=timezone.utc)
 
-        if reference_time.tzinfo:
-            reference_utc = reference_time.astimezone(timezone.utc)
-        else:
-            reference_utc = reference_time.replace(tzinfo=timezone.utc)
-
-        time_diff = reference_utc - published_utc
-        return time_diff <= timedelta(hours=24) and time_diff >= timedelta(0)
+        return _ZERO <= reference_time - published_date <= _DAY
 
     except Exception as e:
         logger.error(f"Error checking date: {e}")
-        return False
\ No newline at end of file
+        return False
@@ -0,0 +1,32 @@
+import os
+
+
+def evict_lru_dir(directory, max_bytes):
+    """Delete the least recently used files under directory until it fits max_bytes.
+
+    Recency is the file's mtime, which the caches bump on every hit. Returns
+    how many files were removed.
+    """
+    files = []
+    total = 0
+    for root, _, names in os.walk(directory):
+        for name in names:
+            path = os.path.join(root, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            files.append((stat.st_mtime, stat.st_size, path))
+            total += stat.st_size
+
+    removed = 0
+    for _, size, path in sorted(files):
+        if total <= max_bytes:
+            break
+        try:
+            os.remove(path)
+            total -= size
+            removed += 1
+        except OSError:
+            pass
+    return removed
@@ -0,0 +1,167 @@
+"""Article text and lead image extraction from scraped HTML.
+
+Every document is parsed once with lxml, and its text and image candidates are
+read from that one tree. Selectors are precompiled XPath equivalents of the
+CSS selectors the scraper used with BeautifulSoup, tried in the same order, so
+the extracted text and image are unchanged.
+"""
+import logging
+from urllib.parse import urljoin
+
+from lxml import etree
+from lxml import html as lxml_html
+
+logger = logging.getLogger(__name__)
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.webp', '.gif')
+
+# Never rendered as text; stripped right after parsing (their tails are kept)
+INVISIBLE_TAGS = ('script', 'style', 'template')
+
+# Page chrome dropped from raw pages before looking for the article
+CHROME_TAGS = ('nav', 'footer', 'header', 'aside')
+
+
+def _class_xpath(name):
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+
+def _first(expression):
+    return etree.XPath(f"({expression})[1]")
+
+
+_ROOT_CONTENT = [
+    _first('//article'),
+    _first('//*[@role="main"]'),
+    _first('//main'),
+    _first(f'//*[{_class_xpath("post-content")}]'),
+    _first(f'//*[{_class_xpath("entry-content")}]'),
+    _first(f'//*[{_class_xpath("article-content")}]'),
+    _first(f'//*[{_class_xpath("content")}]'),
+]
+
+# article, [role="main"], main, .post-content, .entry-content, .article-content, .content, .post-body
+CLEANED_CONTENT_XPATHS = _ROOT_CONTENT + [_first(f'//*[{_class_xpath("post-body")}]')]
+
+# Raw pages are searched without .post-body
+PAGE_CONTENT_XPATHS = list(_ROOT_CONTENT)
+
+# meta og:image, meta twitter:image, img[class*=featured], img[class*=hero], article img, .content img, img
+IMAGE_XPATHS = [
+    _first('//meta[@property="og:image"]'),
+    _first('//meta[@name="twitter:image"]'),
+    _first('//img[contains(@class, "featured")]'),
+    _first('//img[contains(@class, "hero")]'),
+    _first('//article//img'),
+    _first(f'//*[{_class_xpath("content")}]//img'),
+    _first('//img'),
+]
+
+_BODY = _first('//body')
+
+
+def parse_html(content):
+    """Parse an HTML document (str or bytes) into an lxml tree, or return None if it is empty"""
+    if not content:
+        return None
+    if isinstance(content, bytes):
+        try:
+            content = content.decode('utf-8')
+        except UnicodeDecodeError:
+            pass  # let lxml pick the encoding from the page's meta charset
+    try:
+        root = lxml_html.document_fromstring(content)
+    except ValueError:
+        # str input with an XML encoding declaration must be parsed from bytes
+        root = lxml_html.document_fromstring(content.encode('utf-8'))
+    except etree.ParserError:
+        return None
+    etree.strip_elements(root, *INVISIBLE_TAGS, with_tail=False)
+    return root
+
+
+def normalize_whitespace(text):
+    """Collapse line breaks and runs of spaces into single spaces"""
+    lines = (line.strip() for line in text.splitlines())
+    chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
+    return ' '.join(chunk for chunk in chunks if chunk)
+
+
+def find_main_content(root, xpaths=CLEANED_CONTENT_XPATHS, require_text=True):
+    """Return the first element matched by xpaths, falling back to <body> (or the whole tree).
+
+    With require_text, a match with no text moves on to the next selector.
+    """
+    element = None
+    for xpath in xpaths:
+        matches = xpath(root)
+        element = matches[0] if matches else None
+        if element is not None and (not require_text or element.text_content().strip()):
+            break
+
+    if element is None:
+        body = _BODY(root)
+        element = body[0] if body else root
+    return element
+
+
+def find_image(root, base_url):
+    """Return the first usable absolute image URL from the image selectors, or ''"""
+    for xpath in IMAGE_XPATHS:
+        matches = xpath(root)
+        if not matches:
+            continue
+        element = matches[0]
+        src = element.get('content') or element.get('src', '')
+        if not src:
+            continue
+
+        # Make relative URLs absolute
+        if src.startswith('//'):
+            src = 'https:' + src
+        elif src.startswith('/'):
+            src = urljoin(base_url, src)
+
+        if src.startswith('http') and any(ext in src.lower() for ext in IMAGE_EXTENSIONS):
+            return src
+    return ""
+
+
+def extract_text(html_content):
+    """Clean article text from an already cleaned HTML document (e.g. Crawl4AI's cleaned_html)"""
+    root = parse_html(html_content)
+    if root is None:
+        return ""
+    return normalize_whitespace(find_main_content(root).text_content())
+
+
+def extract_image(html_content, base_url):
+    """Best image URL from an HTML document"""
+    root = parse_html(html_content)
+    if root is None:
+        return ""
+    return find_image(root, base_url)
+
+
+def extract_fragment(html_content, base_url):
+    """Return (text, image_url) from an HTML fragment such as a feed entry's content, from a single parse"""
+    root = parse_html(html_content)
+    if root is None:
+        return "", ""
+    return normalize_whitespace(find_main_content(root).text_content()), find_image(root, base_url)
+
+
+def extract_page(html_content, base_url):
+    """Return (text, image_url) from a raw page, both read from a single parse.
+
+    Navigation, header, footer and aside elements are dropped first, so neither
+    their text nor their images are picked up.
+    """
+    root = parse_html(html_content)
+    if root is None:
+        return "", ""
+    etree.strip_elements(root, *CHROME_TAGS, with_tail=False)
+
+    main_content = find_main_content(root, PAGE_CONTENT_XPATHS, require_text=False)
+    content = normalize_whitespace(main_content.text_content())
+    return content, find_image(root, base_url)
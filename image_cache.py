@@ -0,0 +1,237 @@
+import hashlib
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+import requests
+from PIL import Image
+
+from disk_cache import evict_lru_dir
+
+logger = logging.getLogger(__name__)
+
+IMAGE_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+}
+
+THUMBNAIL_SIZE = (280, 200)
+
+
+def make_thumbnail(data, size=THUMBNAIL_SIZE):
+    """Resize raw image bytes to fit within size and return them re-encoded as JPEG (PNG if transparent)"""
+    image = Image.open(BytesIO(data))
+    image.thumbnail(size, Image.Resampling.LANCZOS)
+
+    out = BytesIO()
+    if image.mode in ('RGBA', 'LA') or (image.mode == 'P' and 'transparency' in image.info):
+        image.save(out, format='PNG', optimize=True)
+    else:
+        image.convert('RGB').save(out, format='JPEG', quality=85, optimize=True)
+    return out.getvalue()
+
+
+def download_image(url, timeout=10):
+    """Download an image and return its bytes"""
+    response = requests.get(url, headers=IMAGE_HEADERS, timeout=timeout)
+    response.raise_for_status()
+    return response.content
+
+
+class ThumbnailCache:
+    """Two-level LRU of encoded thumbnails keyed by image URL.
+
+    Recently shown thumbnails stay in memory (up to memory_items); every
+    thumbnail is also written under directory, whose least recently used files
+    are removed once the directory exceeds max_disk_bytes. URLs that fail to
+    load are not retried for failure_ttl seconds.
+    """
+
+    def __init__(self, directory, memory_items=128, max_disk_bytes=100 * 1024 * 1024, size=THUMBNAIL_SIZE,
+                 failure_ttl=600):
+        self.directory = directory
+        self.memory_items = memory_items
+        self.max_disk_bytes = max_disk_bytes
+        self.size = size
+        self.failure_ttl = failure_ttl
+        self._memory = OrderedDict()
+        self._failures = {}
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, url):
+        key = hashlib.sha256(f"{url}|{self.size[0]}x{self.size[1]}".encode('utf-8')).hexdigest()
+        return os.path.join(self.directory, key[:2], key)
+
+    def _remember(self, url, data):
+        with self._lock:
+            self._memory[url] = data
+            self._memory.move_to_end(url)
+            while len(self._memory) > self.memory_items:
+                self._memory.popitem(last=False)
+
+    def get(self, url):
+        """Return cached thumbnail bytes for url, or None"""
+        with self._lock:
+            data = self._memory.get(url)
+            if data is not None:
+                self._memory.move_to_end(url)
+                return data
+
+        path = self._path(url)
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+        except OSError:
+            return None
+
+        # Bump the file's mtime so disk eviction sees it as recently used
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        self._remember(url, data)
+        return data
+
+    def put(self, url, data):
+        """Store thumbnail bytes in memory and on disk"""
+        self._remember(url, data)
+        path = self._path(url)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{threading.get_ident()}.tmp"
+            with open(tmp_path, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"Could not write thumbnail for {url}: {e}")
+
+    def fetch(self, url):
+        """Return the thumbnail for url, downloading and resizing it on a miss (None on failure)"""
+        if not url:
+            return None
+        data = self.get(url)
+        if data is not None:
+            return data
+        if time.monotonic() - self._failures.get(url, float('-inf')) < self.failure_ttl:
+            return None
+        try:
+            data = make_thumbnail(download_image(url), self.size)
+        except Exception as e:
+            logger.debug(f"Could not load image {url}: {e}")
+            with self._lock:
+                self._failures[url] = time.monotonic()
+            return None
+        self.put(url, data)
+        return data
+
+    def fetch_many(self, urls, max_workers=8):
+        """Fetch thumbnails for several URLs concurrently, returning {url: bytes or None}"""
+        unique = list(dict.fromkeys(url for url in urls if url))
+        results = {}
+        missing = []
+        for url in unique:
+            data = self.get(url)
+            if data is not None:
+                results[url] = data
+            else:
+                missing.append(url)
+
+        if missing:
+            with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(missing))),
+                                    thread_name_prefix="image") as executor:
+                for url, data in zip(missing, executor.map(self.fetch, missing)):
+                    results[url] = data
+            self.evict()
+        return results
+
+    def evict(self):
+        """Remove least recently used thumbnail files until the directory fits max_disk_bytes"""
+        removed = evict_lru_dir(self.directory, self.max_disk_bytes)
+        if removed:
+            logger.info(f"🧹 Evicted {removed} cached thumbnails")
+
+
+# Thumbnail variants the pipeline renders for every article image
+THUMBNAIL_VARIANTS = {
+    '1x': THUMBNAIL_SIZE,
+    '2x': (THUMBNAIL_SIZE[0] * 2, THUMBNAIL_SIZE[1] * 2),
+}
+
+
+class ImageStore:
+    """Content-addressed store of pre-rendered article thumbnails.
+
+    The pipeline downloads each article image once and writes every variant
+    under the sha256 of the original bytes; that key goes into the article's
+    metadata so the app can read the thumbnails straight from disk.
+    """
+
+    def __init__(self, directory, variants=None):
+        self.directory = directory
+        self.variants = dict(THUMBNAIL_VARIANTS if variants is None else variants)
+        os.makedirs(directory, exist_ok=True)
+
+    def path(self, key, variant='1x'):
+        return os.path.join(self.directory, key[:2], f"{key}_{variant}")
+
+    def has(self, key):
+        return all(os.path.exists(self.path(key, variant)) for variant in self.variants)
+
+    def read(self, key, variant='1x'):
+        """Return the stored thumbnail bytes, or None if the key or variant is missing"""
+        if not key:
+            return None
+        try:
+            with open(self.path(key, variant), 'rb') as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def add(self, data):
+        """Render and store every variant of an image's bytes, returning its content key"""
+        key = hashlib.sha256(data).hexdigest()
+        if self.has(key):
+            # Already rendered for an earlier article or run; refresh it so prune keeps it
+            for variant in self.variants:
+                os.utime(self.path(key, variant))
+            return key
+
+        os.makedirs(os.path.join(self.directory, key[:2]), exist_ok=True)
+        for variant, size in self.variants.items():
+            path = self.path(key, variant)
+            tmp_path = f"{path}.{threading.get_ident()}.tmp"
+            with open(tmp_path, 'wb') as f:
+                f.write(make_thumbnail(data, size))
+            os.replace(tmp_path, path)
+        return key
+
+    def ingest(self, url, timeout=10):
+        """Download an image and store its thumbnails, returning the key or '' on failure"""
+        if not url:
+            return ''
+        try:
+            return self.add(download_image(url, timeout))
+        except Exception as e:
+            logger.warning(f"⚠️ Could not store thumbnails for {url}: {e}")
+            return ''
+
+    def prune(self, max_age_days):
+        """Remove thumbnails not written or reused in the last max_age_days"""
+        cutoff = time.time() - max_age_days * 86400
+        removed = 0
+        for root, _, names in os.walk(self.directory):
+            for name in names:
+                path = os.path.join(root, name)
+                try:
+                    if os.stat(path).st_mtime < cutoff:
+                        os.remove(path)
+                        removed += 1
+                except OSError:
+                    pass
+        if removed:
+            logger.info(f"🧹 Pruned {removed} stored thumbnails")
+        return removed
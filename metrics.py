@@ -0,0 +1,227 @@
+import json
+import logging
+import os
+import threading
+import time
+from bisect import bisect_left
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+logger = logging.getLogger(__name__)
+
+METRIC_PREFIX = 'newsletter_'
+
+# Upper bounds (seconds) of the latency histogram buckets exported to Prometheus
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+# Memory bounds for long-lived processes (the app records spans on every search and never
+# exports): spans kept for the report, and recent durations per stage kept for percentiles
+MAX_SPANS = 10000
+MAX_LATENCY_SAMPLES = 2000
+
+
+def _label_key(labels):
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+
+def _format_labels(label_key, extra=()):
+    pairs = list(label_key) + list(extra)
+    if not pairs:
+        return ''
+    escaped = (name + '="' + value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') + '"'
+               for name, value in pairs)
+    return '{' + ','.join(escaped) + '}'
+
+
+def _percentile(values, pct):
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered) + 0.5)) - 1))
+    return ordered[rank]
+
+
+def _atomic_write(path, text):
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+
+
+class _Histogram:
+    """Cumulative latency histogram over LATENCY_BUCKETS, plus recent samples for percentiles"""
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.buckets = [0] * len(LATENCY_BUCKETS)
+        self.samples = deque(maxlen=MAX_LATENCY_SAMPLES)
+
+    def add(self, seconds):
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+        position = bisect_left(LATENCY_BUCKETS, seconds)
+        if position < len(self.buckets):
+            self.buckets[position] += 1
+        self.samples.append(seconds)
+
+
+class RunMetrics:
+    """Counters, latency histograms and spans collected over one pipeline run.
+
+    Spans (stage, start offset, duration, outcome and attributes such as the
+    article URL) are kept up to MAX_SPANS, the oldest dropped first, and every
+    duration also feeds the stage's latency histogram, whose percentiles come
+    from its last MAX_LATENCY_SAMPLES durations. Memory stays bounded in
+    processes that never reset. Safe to use from worker threads and the event
+    loop alike.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """Start a new run, dropping everything recorded so far"""
+        with self._lock:
+            self.started_at = datetime.now(timezone.utc)
+            self._start = time.monotonic()
+            self._counters = defaultdict(float)
+            self._histograms = defaultdict(_Histogram)
+            self._gauges = {}
+            self.spans = deque(maxlen=MAX_SPANS)
+            self.spans_dropped = 0
+
+    def incr(self, name, value=1, **labels):
+        """Add value to a counter such as retries_total or scrape_bytes_total"""
+        with self._lock:
+            self._counters[(name, _label_key(labels))] += value
+
+    def set_gauge(self, name, value, **labels):
+        with self._lock:
+            self._gauges[(name, _label_key(labels))] = value
+
+    def record(self, stage, seconds, **attrs):
+        """Record a finished span of stage that took seconds; attrs may include ok=False"""
+        attrs.setdefault('ok', True)
+        with self._lock:
+            self._histograms[stage].add(seconds)
+            if len(self.spans) == MAX_SPANS:
+                self.spans_dropped += 1
+            self.spans.append({'stage': stage, 'start': round(time.monotonic() - seconds - self._start, 4),
+                               'duration': round(seconds, 4), **attrs})
+
+    @contextmanager
+    def span(self, stage, **attrs):
+        """Time the block as one span of stage; a raised exception marks it failed and propagates.
+
+        The yielded dict can be updated inside the block to attach more
+        attributes (e.g. ok=False or the strategy that won).
+        """
+        record = dict(attrs)
+        start = time.monotonic()
+        try:
+            yield record
+        except BaseException:
+            record['ok'] = False
+            raise
+        finally:
+            self.record(stage, time.monotonic() - start, **record)
+
+    def counter(self, name, **labels):
+        with self._lock:
+            return self._counters.get((name, _label_key(labels)), 0)
+
+    def report(self):
+        """Machine-readable summary of the run"""
+        with self._lock:
+            counters = [{'name': name, 'labels': dict(key), 'value': value}
+                        for (name, key), value in sorted(self._counters.items())]
+            gauges = [{'name': name, 'labels': dict(key), 'value': value}
+                      for (name, key), value in sorted(self._gauges.items())]
+            stages = {
+                stage: {
+                    'count': histogram.count,
+                    'total_s': round(histogram.total, 4),
+                    'p50_s': round(_percentile(histogram.samples, 50), 4),
+                    'p95_s': round(_percentile(histogram.samples, 95), 4),
+                    'max_s': round(histogram.max, 4),
+                }
+                for stage, histogram in sorted(self._histograms.items()) if histogram.count
+            }
+            spans = list(self.spans)
+            spans_dropped = self.spans_dropped
+            elapsed = time.monotonic() - self._start
+
+        return {
+            'started_at': self.started_at.isoformat(),
+            'elapsed_s': round(elapsed, 3),
+            'stages': stages,
+            'counters': counters,
+            'gauges': gauges,
+            'spans': spans,
+            'spans_dropped': spans_dropped,
+        }
+
+    def prometheus_text(self):
+        """Render counters, gauges and stage latency histograms in the Prometheus text format"""
+        with self._lock:
+            counters = sorted(self._counters.items())
+            gauges = sorted(self._gauges.items())
+            latencies = {stage: (histogram.count, histogram.total, list(histogram.buckets))
+                         for stage, histogram in sorted(self._histograms.items())}
+            elapsed = time.monotonic() - self._start
+
+        lines = []
+        declared = set()
+        for kind, items in (('counter', counters), ('gauge', gauges)):
+            for (name, key), value in items:
+                metric = METRIC_PREFIX + name
+                if metric not in declared:
+                    lines.append(f"# TYPE {metric} {kind}")
+                    declared.add(metric)
+                lines.append(f"{metric}{_format_labels(key)} {value:g}")
+
+        metric = METRIC_PREFIX + 'stage_duration_seconds'
+        lines.append(f"# TYPE {metric} histogram")
+        for stage, (count, total, buckets) in latencies.items():
+            key = (('stage', stage),)
+            cumulative = 0
+            for bound, bucket_count in zip(LATENCY_BUCKETS, buckets):
+                cumulative += bucket_count
+                lines.append(f"{metric}_bucket{_format_labels(key, [('le', f'{bound:g}')])} {cumulative}")
+            lines.append(f"{metric}_bucket{_format_labels(key, [('le', '+Inf')])} {count}")
+            lines.append(f"{metric}_sum{_format_labels(key)} {total:.6f}")
+            lines.append(f"{metric}_count{_format_labels(key)} {count}")
+
+        lines.append(f"# TYPE {METRIC_PREFIX}run_duration_seconds gauge")
+        lines.append(f"{METRIC_PREFIX}run_duration_seconds {elapsed:.3f}")
+        lines.append(f"# TYPE {METRIC_PREFIX}last_run_timestamp_seconds gauge")
+        lines.append(f"{METRIC_PREFIX}last_run_timestamp_seconds {time.time():.0f}")
+        return '\n'.join(lines) + '\n'
+
+    def export(self, json_path=None, prometheus_path=None):
+        """Atomically write the JSON run report and/or the Prometheus textfile"""
+        if json_path:
+            try:
+                _atomic_write(json_path, json.dumps(self.report(), indent=2))
+                logger.info(f"📈 Run report written to {json_path}")
+            except Exception as e:
+                logger.warning(f"Could not write run report {json_path}: {e}")
+        if prometheus_path:
+            try:
+                _atomic_write(prometheus_path, self.prometheus_text())
+            except Exception as e:
+                logger.warning(f"Could not write metrics textfile {prometheus_path}: {e}")
+
+    def summary(self):
+        """One-line latency summary per stage for the run log"""
+        stages = self.report()['stages']
+        return ', '.join(f"{stage} p50 {stats['p50_s']:.2f}s p95 {stats['p95_s']:.2f}s (n={stats['count']})"
+                         for stage, stats in stages.items())
+
+
+# Shared by every module of a pipeline run
+metrics = RunMetrics()
@@ -0,0 +1,148 @@
+import asyncio
+import hashlib
+import io
+import logging
+import os
+import threading
+
+import edge_tts
+
+from config import TTS_CONCURRENCY
+from disk_cache import evict_lru_dir
+
+logger = logging.getLogger(__name__)
+
+INTRO_TEXT = "Welcome to your AI Newsletter Summary. Here are today's top stories."
+NEXT_ARTICLE_TEXT = "Next article."
+OUTRO_TEXT = "That concludes your newsletter summary. Have a great day!"
+
+
+def article_segment_text(article):
+    """Spoken text for one article: title, byline and summary"""
+    text = f"{article['title']}\n"
+    if article['author'] and article['author'] != 'Unknown Author':
+        text += f"By {article['author']} from {article['source']}.\n"
+    else:
+        text += f"From {article['source']}.\n"
+    return text + article['ai_summary']
+
+
+def segment_key(name, text, voice):
+    """Cache key for a rendered segment: its name (e.g. the article id), a hash of its text, and the voice"""
+    text_hash = hashlib.sha256(text.encode('utf-8')).hexdigest()
+    return hashlib.sha256(f"{name}\x1f{text_hash}\x1f{voice}".encode('utf-8')).hexdigest()
+
+
+def plan_segments(articles):
+    """Return the newsletter as an ordered list of (name, text) segments.
+
+    Everything position-dependent ("Article 2.") is its own short segment, so an
+    article's segment is reused no matter where it lands in a later newsletter.
+    """
+    segments = [('intro', INTRO_TEXT)]
+    for i, article in enumerate(articles, 1):
+        segments.append((f'heading-{i}', f"Article {i}."))
+        segments.append((f"article-{article['id']}", article_segment_text(article)))
+        if i < len(articles):
+            segments.append(('next', NEXT_ARTICLE_TEXT))
+    segments.append(('outro', OUTRO_TEXT))
+    return segments
+
+
+class AudioSegmentCache:
+    """On-disk cache of synthesized MP3 segments.
+
+    Least recently used segments are removed once the directory exceeds max_bytes.
+    """
+
+    def __init__(self, directory, max_bytes=200 * 1024 * 1024):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.directory, key[:2], f"{key}.mp3")
+
+    def get(self, key):
+        """Return the cached segment bytes, or None"""
+        path = self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+        except OSError:
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return data
+
+    def put(self, key, data):
+        path = self._path(key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{threading.get_ident()}.tmp"
+            with open(tmp_path, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"Could not write audio segment {key}: {e}")
+
+    def evict(self):
+        """Remove least recently used segments until the cache fits max_bytes"""
+        evict_lru_dir(self.directory, self.max_bytes)
+
+
+async def synthesize(text, voice):
+    """Render text to MP3 bytes with edge-tts"""
+    communicate = edge_tts.Communicate(text, voice)
+    audio_bytes = io.BytesIO()
+    async for chunk in communicate.stream():
+        if chunk["type"] == "audio":
+            audio_bytes.write(chunk["data"])
+    return audio_bytes.getvalue()
+
+
+async def _render_segment(key, text, voice, cache, semaphore, stats):
+    data = cache.get(key)
+    if data is not None:
+        return data
+    async with semaphore:
+        data = await synthesize(text, voice)
+    cache.put(key, data)
+    stats['synthesized'] += 1
+    return data
+
+
+async def stream_newsletter(articles, voice, cache, concurrency=TTS_CONCURRENCY):
+    """Yield the newsletter as (segment name, MP3 bytes) in playback order.
+
+    Missing segments are synthesized concurrently, at most `concurrency` at a
+    time and started in playback order, so the first segments are ready after
+    about one synthesis however many articles follow. MP3 frames are
+    self-contained, so concatenating the yielded bytes gives a playable file.
+    """
+    segments = [(name, segment_key(name, text, voice), text) for name, text in plan_segments(articles)]
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+    stats = {'synthesized': 0}
+
+    tasks = {}
+    for _, key, text in segments:
+        if key not in tasks:
+            tasks[key] = asyncio.ensure_future(_render_segment(key, text, voice, cache, semaphore, stats))
+
+    try:
+        for name, key, _ in segments:
+            yield name, await tasks[key]
+    finally:
+        for task in tasks.values():
+            task.cancel()
+
+    logger.info(f"🔊 Newsletter audio: {stats['synthesized']} of {len(tasks)} segments synthesized, rest from cache")
+    if stats['synthesized']:
+        cache.evict()
+
+
+async def render_newsletter(articles, voice, cache, concurrency=TTS_CONCURRENCY):
+    """Build the whole newsletter MP3 from cached segments, synthesizing only the missing ones"""
+    return b''.join([data async for _, data in stream_newsletter(articles, voice, cache, concurrency)])
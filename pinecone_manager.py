@@ -1,20 +1,33 @@
+from concurrent.futures import ThreadPoolExecutor, wait
 from datetime import datetime, timezone
 import hashlib
+import json
+import random
+import threading
 import time
-from ai_services import generate_embedding
-from config import pc, PINECONE_INDEX_NAME
+from ai_services import generate_embeddings, summary_failed
+from article_manifest import build_manifest, published_timestamp, write_manifest
+from config import (get_pinecone, PINECONE_INDEX_NAME, UPSERT_BATCH_SIZE, UPSERT_MAX_BATCH_BYTES, UPSERT_THREADS,
+                    VERIFY_SAMPLE_SIZE, VECTOR_STORE)
+from date_utils import is_from_last_24_hours
+from metrics import metrics
 import logging
 
 from text_utils import clean_string_for_metadata
+from vector_store import open_index
 
 logger = logging.getLogger(__name__)
 
 def create_index():
-    """Create Pinecone index if it doesn't exist"""
+    """Open the configured vector index (Pinecone, or the local store when VECTOR_STORE=local)"""
     try:
-        existing_indexes = [index.name for index in pc.list_indexes()]
-        logger.info(f"Existing indexes: {existing_indexes}")
-        index = pc.Index(PINECONE_INDEX_NAME)
+        if VECTOR_STORE == 'pinecone':
+            pc = get_pinecone()
+            existing_indexes = [index.name for index in pc.list_indexes()]
+            logger.info(f"Existing indexes: {existing_indexes}")
+            index = pc.Index(PINECONE_INDEX_NAME)
+        else:
+            index = open_index(VECTOR_STORE)
         stats = index.describe_index_stats()
         logger.info(f"Index ready. Stats: {stats}")
         return index
@@ -22,30 +35,71 @@ def create_index():
         logger.error(f"Error creating/accessing index: {e}")
         return None
 
+def list_vector_ids(index):
+    """Return every vector ID in the index using paginated ID listing"""
+    try:
+        return [vector_id for page in index.list() for vector_id in page]
+    except Exception as e:
+        # ID listing is only available on serverless indexes; fall back to a capped query scan
+        logger.warning(f"ID listing unavailable ({e}), falling back to query scan capped at 10000 IDs")
+        query_response = index.query(vector=[0.0] * 768, top_k=10000, include_metadata=False)
+        return [match.id for match in query_response.matches]
+
+
+def fetch_metadata(index, ids, batch_size=100):
+    """Fetch metadata for the given IDs in batches, returning {id: metadata}"""
+    ids = list(ids)
+    metadata = {}
+    for i in range(0, len(ids), batch_size):
+        response = index.fetch(ids=ids[i:i + batch_size])
+        for vector_id, vector in response.vectors.items():
+            metadata[vector_id] = vector.metadata or {}
+    return metadata
+
+
+def fetch_all_metadata(index):
+    """Metadata of every stored vector, {id: metadata}"""
+    return fetch_metadata(index, list_vector_ids(index))
+
+
+def write_article_manifest(index):
+    """Rewrite the app's recency-ordered article manifest from what the index now holds"""
+    try:
+        articles = build_manifest(fetch_all_metadata(index))
+    except Exception as e:
+        logger.error(f"Error building article manifest: {e}")
+        return False
+    if write_manifest(articles):
+        logger.info(f"🗂️ Article manifest updated with {len(articles)} articles")
+        return True
+    return False
+
+
+def flush_index(index):
+    """Persist buffered writes on backends that buffer them (the local store); Pinecone writes through"""
+    flush = getattr(index, 'flush', None)
+    if flush is not None:
+        flush()
+
+
+def delete_ids(index, ids, batch_size=1000):
+    """Delete vectors by ID in batches"""
+    ids = list(ids)
+    for i in range(0, len(ids), batch_size):
+        index.delete(ids=ids[i:i + batch_size])
+        logger.info(f"Deleted batch {i // batch_size + 1}/{(len(ids) + batch_size - 1) // batch_size}")
+    flush_index(index)
+
+
 def clear_old_articles(index):
     """Delete all existing articles from Pinecone before adding new ones"""
     try:
         logger.info("Clearing old articles from Pinecone...")
 
-        # Get all vector IDs by querying with a dummy vector
-        query_response = index.query(
-            vector=[0.0] * 768,
-            top_k=10000,  # Get all vectors (adjust if you have more)
-            include_metadata=False
-        )
-
-        if query_response.matches:
-            vector_ids = [match.id for match in query_response.matches]
+        vector_ids = list_vector_ids(index)
+        if vector_ids:
             logger.info(f"Found {len(vector_ids)} existing articles to delete")
-
-            # Delete in batches of 100 (Pinecone limit)
-            batch_size = 100
-            for i in range(0, len(vector_ids), batch_size):
-                batch_ids = vector_ids[i:i + batch_size]
-                index.delete(ids=batch_ids)
-                logger.info(f"Deleted batch {i // batch_size + 1}/{(len(vector_ids) + batch_size - 1) // batch_size}")
-                time.sleep(1)  # Small delay between batches
-
+            delete_ids(index, vector_ids)
             logger.info("Successfully cleared all old articles")
         else:
             logger.info("No existing articles found to delete")
@@ -54,55 +108,245 @@ def clear_old_articles(index):
         logger.error(f"Error clearing old articles: {e}")
 
 
-def embed_and_store(index, article, content, image_url="", ai_summary=""):
-    """Store article with embedding in Pinecone"""
-    try:
-        logger.info(f"Starting embed_and_store for: {article['title'][:50]}...")
+def article_fingerprint(article):
+    """Hash of the feed fields that decide whether a stored article needs reprocessing"""
+    key = "\x1f".join(str(article.get(field, '')) for field in ('title', 'url', 'summary', 'published'))
+    return hashlib.md5(key.encode()).hexdigest()
+
+
+def plan_sync(index, articles, reference_time=None):
+    """Work out an incremental sync of the index against the current article window.
+
+    Returns (to_process, expired_ids, unchanged_count): articles that are new or
+    whose feed fingerprint changed, stored IDs that are no longer in the window
+    and were published more than 24 hours ago, and how many articles are
+    already stored unchanged.
+    """
+    desired = {}
+    for article in articles:
+        desired.setdefault(make_doc_id(article['url']), article)
+
+    existing_ids = set(list_vector_ids(index))
+    stored = fetch_metadata(index, existing_ids)
+
+    to_process = [
+        article for doc_id, article in desired.items()
+        if stored.get(doc_id, {}).get('fingerprint') != article_fingerprint(article)
+    ]
+
+    # IDs missing from this run's window are kept while still inside 24 hours
+    # (e.g. their feed timed out this run), and expired once they age out
+    expired_ids = [
+        doc_id for doc_id in existing_ids - desired.keys()
+        if not is_from_last_24_hours(stored.get(doc_id, {}).get('published'), reference_time)
+    ]
+
+    unchanged_count = len(desired) - len(to_process)
+    logger.info(f"🔄 Sync plan: {len(to_process)} new/changed, {unchanged_count} unchanged, "
+                f"{len(expired_ids)} expired of {len(existing_ids)} stored")
+    return to_process, expired_ids, unchanged_count
+
+
+def make_doc_id(url):
+    """Stable vector ID for an article URL"""
+    return hashlib.md5(url.encode()).hexdigest()
+
 
-        embedding = generate_embedding(content[:5000])
+def build_metadata(article, content, image_url="", ai_summary=""):
+    """Build the Pinecone metadata dict for an article.
 
+    When summarization failed the feed summary is shown instead and the
+    fingerprint is left blank, so the next incremental sync processes the
+    article again rather than treating it as stored unchanged.
+    """
+    failed = summary_failed(ai_summary)
+    return {
+        "title": clean_string_for_metadata(article["title"], 500),
+        "url": clean_string_for_metadata(article["url"], 500, preserve_url=True),  # Preserve URL structure
+        "original_summary": clean_string_for_metadata(article["summary"], 1000),
+        "ai_summary": clean_string_for_metadata(article["summary"] if failed else ai_summary, 2000),
+        "author": clean_string_for_metadata(article["author"], 100),
+        "source": clean_string_for_metadata(article["source"], 100),
+        "published": article["published"],
+        "published_ts": published_timestamp(article["published"]),
+        "content": clean_string_for_metadata(content, 2000),
+        "image": clean_string_for_metadata(image_url, 500, preserve_url=True) if image_url else "",
+        "image_key": article.get("image_key", ""),
+        "fingerprint": "" if failed else article_fingerprint(article),
+        "processed_at": datetime.now(timezone.utc).isoformat()
+    }
+
+
+def prepare_vectors(entries):
+    """Embed many articles in batched requests and build their upsert records.
+
+    entries is a list of (article, content, image_url, ai_summary) tuples. Returns
+    records in the same order, with None where embedding failed.
+    """
+    embeddings = generate_embeddings([content[:5000] for _, content, _, _ in entries])
+
+    records = []
+    for (article, content, image_url, ai_summary), embedding in zip(entries, embeddings):
         if embedding is None:
             logger.error(f"Failed to generate embedding for: {article['title']}")
-            return False
+            records.append(None)
+            continue
 
-        doc_id = hashlib.md5(article['url'].encode()).hexdigest()
-
-        metadata = {
-            "title": clean_string_for_metadata(article["title"], 500),
-            "url": clean_string_for_metadata(article["url"], 500, preserve_url=True),  # Preserve URL structure
-            "original_summary": clean_string_for_metadata(article["summary"], 1000),
-            "ai_summary": clean_string_for_metadata(ai_summary if ai_summary else article["summary"], 2000),
-            "author": clean_string_for_metadata(article["author"], 100),
-            "source": clean_string_for_metadata(article["source"], 100),
-            "published": article["published"],
-            "content": clean_string_for_metadata(content, 2000),
-            "image": clean_string_for_metadata(image_url, 500, preserve_url=True) if image_url else "",
-            "processed_at": datetime.now(timezone.utc).isoformat()
-        }
-
-        # Log the URL being stored for debugging
-        logger.info(f"🔗 Storing URL: {metadata['url']}")
-
-        upsert_response = index.upsert([{
-            "id": doc_id,
+        records.append({
+            "id": make_doc_id(article['url']),
             "values": embedding,
-            "metadata": metadata
-        }])
+            "metadata": build_metadata(article, content, image_url, ai_summary)
+        })
+    return records
 
-        logger.debug(f"Upsert response: {upsert_response}")
 
-        time.sleep(1)
-        query_response = index.fetch([doc_id])
+def prepare_vector(article, content, image_url="", ai_summary=""):
+    """Embed an article and build its upsert record, or return None if embedding fails"""
+    return prepare_vectors([(article, content, image_url, ai_summary)])[0]
 
-        if doc_id in query_response.vectors:
-            stored_url = query_response.vectors[doc_id].metadata.get('url', 'N/A')
-            logger.info(f"✅ Successfully stored: {article['title'][:50]}...")
-            logger.info(f"✅ Verified stored URL: {stored_url}")
-            return True
-        else:
-            logger.error(f"❌ Failed to verify storage: {article['title'][:50]}...")
+
+def store_vector(index, record):
+    """Upsert a single prepared record into Pinecone"""
+    # Log the URL being stored for debugging
+    logger.info(f"🔗 Storing URL: {record['metadata']['url']}")
+
+    upsert_response = index.upsert([record])
+    logger.debug(f"Upsert response: {upsert_response}")
+    logger.info(f"✅ Successfully stored: {record['metadata']['title'][:50]}...")
+    return True
+
+
+class VectorWriter:
+    """Buffers upsert records and flushes them to the index in size-limited batches.
+
+    A batch is flushed once it reaches batch_size records or would exceed
+    max_batch_bytes of JSON. With max_workers > 1 batches are upserted on a
+    thread pool so add() does not wait on the network.
+    """
+
+    def __init__(self, index, batch_size=UPSERT_BATCH_SIZE, max_batch_bytes=UPSERT_MAX_BATCH_BYTES,
+                 max_workers=UPSERT_THREADS, max_retries=3):
+        self.index = index
+        self.batch_size = max(1, batch_size)
+        self.max_batch_bytes = max_batch_bytes
+        self.max_retries = max_retries
+        self.written_ids = []
+        self.failed_ids = []
+        self._buffer = []
+        self._buffer_bytes = 0
+        self._pending = []
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="upsert") \
+            if max_workers > 1 else None
+
+    def add(self, record):
+        """Buffer a record, flushing a full batch if needed"""
+        record_bytes = len(json.dumps(record))
+        batches = []
+
+        with self._lock:
+            if self._buffer and self._buffer_bytes + record_bytes > self.max_batch_bytes:
+                batches.append(self._take_buffer())
+            self._buffer.append(record)
+            self._buffer_bytes += record_bytes
+            if len(self._buffer) >= self.batch_size:
+                batches.append(self._take_buffer())
+
+        for batch in batches:
+            self._submit(batch)
+
+    def flush(self):
+        """Write any buffered records and wait for in-flight batches"""
+        with self._lock:
+            batch = self._take_buffer()
+        if batch:
+            self._submit(batch)
+
+        with self._lock:
+            pending, self._pending = self._pending, []
+        wait(pending)
+
+    def close(self):
+        """Flush everything and return (written_ids, failed_ids)"""
+        self.flush()
+        if self._executor:
+            self._executor.shutdown(wait=True)
+        try:
+            flush_index(self.index)
+        except Exception as e:
+            logger.error(f"❌ Failed to flush {len(self.written_ids)} written vectors: {e}")
+            self.failed_ids.extend(self.written_ids)
+            self.written_ids = []
+        return self.written_ids, self.failed_ids
+
+    def _take_buffer(self):
+        batch, self._buffer, self._buffer_bytes = self._buffer, [], 0
+        return batch
+
+    def _submit(self, batch):
+        if self._executor is None:
+            self._upsert_batch(batch)
+            return
+        future = self._executor.submit(self._upsert_batch, batch)
+        with self._lock:
+            self._pending.append(future)
+
+    def _upsert_batch(self, batch):
+        ids = [record["id"] for record in batch]
+        for attempt in range(self.max_retries):
+            try:
+                with metrics.span('pinecone_upsert', records=len(batch)):
+                    self.index.upsert(vectors=batch)
+                logger.info(f"📥 Upserted batch of {len(batch)} vectors")
+                with self._lock:
+                    self.written_ids.extend(ids)
+                return
+            except Exception as e:
+                logger.warning(f"Upsert attempt {attempt + 1} for {len(batch)} vectors failed: {e}")
+                if attempt < self.max_retries - 1:
+                    metrics.incr('retries_total', operation='pinecone_upsert')
+                    time.sleep(2 ** attempt)
+
+        logger.error(f"❌ Failed to upsert batch of {len(batch)} vectors after {self.max_retries} attempts")
+        with self._lock:
+            self.failed_ids.extend(ids)
+
+
+def verify_upserts(index, ids, sample_size=VERIFY_SAMPLE_SIZE):
+    """Spot-check a random sample of written IDs with a single bulk fetch.
+
+    Returns the sampled IDs that could not be found.
+    """
+    if not ids or sample_size <= 0:
+        return []
+
+    sample = random.sample(list(ids), min(sample_size, len(ids)))
+    try:
+        response = index.fetch(ids=sample)
+        missing = [doc_id for doc_id in sample if doc_id not in response.vectors]
+    except Exception as e:
+        logger.error(f"Error verifying upserts: {e}")
+        return sample
+
+    metrics.set_gauge('verify_missing', len(missing))
+    if missing:
+        logger.warning(f"⚠️ {len(missing)}/{len(sample)} sampled vectors not found yet: {missing}")
+    else:
+        logger.info(f"✅ Verified {len(sample)} sampled vectors")
+    return missing
+
+
+def embed_and_store(index, article, content, image_url="", ai_summary=""):
+    """Store article with embedding in Pinecone"""
+    try:
+        logger.info(f"Starting embed_and_store for: {article['title'][:50]}...")
+
+        record = prepare_vector(article, content, image_url, ai_summary)
+        if record is None:
             return False
 
+        return store_vector(index, record)
+
     except Exception as e:
         logger.error(f"Error storing article {article['title']}: {e}")
         return False
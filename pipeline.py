@@ -1,12 +1,22 @@
 import asyncio
+import json
 import logging
-from datetime import datetime
+import os
+from datetime import datetime, timezone
 import pytz
-from rss_fetcher import fetch_recent_articles
-from pinecone_manager import create_index, clear_old_articles, embed_and_store, verify_stored_data
-from ai_services import summarize_content
+from rss_fetcher import fetch_recent_articles, feed_full_text
+from pinecone_manager import (create_index, clear_old_articles, prepare_vectors, verify_stored_data, VectorWriter,
+                              verify_upserts, plan_sync, delete_ids, write_article_manifest)
+from ai_services import summarize_content, summary_failed, get_ai_cache
+from config import (SCRAPE_CONCURRENCY, SUMMARIZE_CONCURRENCY, EMBED_CONCURRENCY, STORE_CONCURRENCY,
+                    STAGE_QUEUE_SIZE, SYNC_MODE, EMBED_BATCH_SIZE, EMBED_BATCH_LINGER, LAST_RUN_PATH,
+                    IMAGE_STORE_DIR, IMAGE_CONCURRENCY, IMAGE_STORE_MAX_AGE_DAYS, RUN_REPORT_PATH,
+                    METRICS_TEXTFILE_PATH)
 from connection_test import test_connection
 from scrape import ArticleScraper
+from rate_limiter import interleave_by_host
+from image_cache import ImageStore
+from metrics import metrics
 
 # Set up logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -15,8 +25,230 @@ logger = logging.getLogger(__name__)
 # Set timezone
 IST = pytz.timezone('Asia/Kolkata')
 
+# Marks the end of a stage's input queue
+_DONE = object()
+
+
+async def _run_stage(name, handler, inbox, outbox, concurrency, counts):
+    """Run `concurrency` workers that pull items from inbox, apply handler and push successes to outbox.
+
+    Bounded queues give backpressure: a worker blocks on outbox.put until the next
+    stage has room. Items whose handler returns False or raises are counted as failed.
+    """
+    async def worker():
+        while True:
+            item = await inbox.get()
+            if item is _DONE:
+                # Put the marker back so sibling workers also stop
+                await inbox.put(_DONE)
+                return
+
+            try:
+                # One span per article per stage
+                with metrics.span(name, url=item['article']['url']) as span:
+                    ok = await handler(item)
+                    span['ok'] = bool(ok)
+            except Exception as e:
+                ok = False
+                logger.error(f"Error in {name} stage for {item['article']['title']}: {e}")
+
+            await _forward(item, ok, outbox, counts)
+
+    await asyncio.gather(*(worker() for _ in range(max(1, concurrency))))
+    if outbox is not None:
+        await outbox.put(_DONE)
+
+
+async def _run_batch_stage(name, handler, inbox, outbox, concurrency, batch_size, linger, counts):
+    """Like _run_stage, but hands up to batch_size items to handler at once.
+
+    A single collector fills each batch, waiting at most `linger` seconds after
+    its first item, so items are not split across several partial batches.
+    Up to `concurrency` batches are handled at the same time. handler receives
+    a list of items and returns a list of per-item results.
+    """
+    loop = asyncio.get_running_loop()
+    slots = asyncio.Semaphore(max(1, concurrency))
+    in_flight = set()
+
+    async def handle(batch):
+        try:
+            try:
+                with metrics.span(name, articles=len(batch)) as span:
+                    results = await handler(batch)
+                    span['ok'] = all(results)
+            except Exception as e:
+                results = [False] * len(batch)
+                logger.error(f"Error in {name} stage for a batch of {len(batch)} articles: {e}")
+
+            for item, ok in zip(batch, results):
+                await _forward(item, ok, outbox, counts)
+        finally:
+            slots.release()
+
+    finished = False
+    while not finished:
+        item = await inbox.get()
+        if item is _DONE:
+            break
+
+        batch = [item]
+        deadline = loop.time() + linger
+        while len(batch) < batch_size:
+            try:
+                item = await asyncio.wait_for(inbox.get(), max(0.0, deadline - loop.time()))
+            except asyncio.TimeoutError:
+                break
+            if item is _DONE:
+                finished = True
+                break
+            batch.append(item)
+
+        # Wait for a free handler slot; meanwhile upstream backs up on the bounded inbox
+        await slots.acquire()
+        task = asyncio.ensure_future(handle(batch))
+        in_flight.add(task)
+        task.add_done_callback(in_flight.discard)
+
+    if in_flight:
+        await asyncio.gather(*in_flight)
+    if outbox is not None:
+        await outbox.put(_DONE)
+
+
+async def _forward(item, ok, outbox, counts):
+    """Count a finished item as failed/processed, or pass it on to the next stage"""
+    if not ok:
+        counts['failed'] += 1
+    elif outbox is None:
+        counts['processed'] += 1
+    else:
+        await outbox.put(item)
+
+
+async def run_staged_pipeline(index, scraper, articles, image_store=None):
+    """Scrape, render thumbnails, summarize, embed and store articles through queue-connected stages.
+
+    Returns (processed_count, failed_count).
+    """
+    total = len(articles)
+    counts = {'processed': 0, 'failed': 0}
+    writer = VectorWriter(index)
+    # One download per image URL, shared by articles that use the same picture
+    image_keys = {}
+
+    async def scrape(item):
+        article = item['article']
+        logger.info(f"Processing article {item['position']}/{total}: {article['title']}")
+        logger.info(f"Published: {article['published']} | Source: {article['source']} | URL: {article['url']}")
+
+        # Full-text feeds already carry the post; only truncated or missing bodies are scraped
+        content, image_url, reason = await asyncio.to_thread(feed_full_text, article)
+        metrics.incr('content_source_total', source='feed' if content else 'scrape', feed_body=reason)
+        if content:
+            logger.info(f"📄 Using full text from the feed ({len(content)} characters), skipping scrape")
+            item['content'], item['image_url'] = content, image_url
+            return True
+
+        # Use the scraper to get content and image
+        item['content'], item['image_url'] = await scraper.scrape_article(article['url'])
+        item['image_url'] = item['image_url'] or article.get('image', '')
+        if not item['content']:
+            logger.warning(f"⚠️ No content scraped for: {article['title'][:50]}...")
+            return False
+        return True
+
+    async def thumbnail(item):
+        # A missing image never fails the article; it just has no stored thumbnail
+        url = item['image_url']
+        if image_store is not None and url:
+            if url not in image_keys:
+                image_keys[url] = asyncio.ensure_future(asyncio.to_thread(image_store.ingest, url))
+            item['article']['image_key'] = await image_keys[url]
+        return True
+
+    async def summarize(item):
+        item['ai_summary'] = await asyncio.to_thread(summarize_content, item['content'])
+        if summary_failed(item['ai_summary']):
+            # Still stored with the feed summary, but unfingerprinted so the next run retries it
+            logger.warning(f"⚠️ Summary failed, will retry next run: {item['article']['title'][:50]}...")
+            metrics.incr('summaries_failed_total')
+        return True
+
+    async def embed(batch):
+        entries = [(item['article'], item['content'], item['image_url'], item['ai_summary']) for item in batch]
+        records = await asyncio.to_thread(prepare_vectors, entries)
+        for item, record in zip(batch, records):
+            item['record'] = record
+        return [record is not None for record in records]
+
+    async def store(item):
+        await asyncio.to_thread(writer.add, item['record'])
+        logger.info(f"✅ Processed, queued for storage: {item['article']['title'][:50]}...")
+        return True
+
+    scrape_queue = asyncio.Queue(maxsize=STAGE_QUEUE_SIZE)
+    thumbnail_queue = asyncio.Queue(maxsize=STAGE_QUEUE_SIZE)
+    summarize_queue = asyncio.Queue(maxsize=STAGE_QUEUE_SIZE)
+    embed_queue = asyncio.Queue(maxsize=STAGE_QUEUE_SIZE)
+    store_queue = asyncio.Queue(maxsize=STAGE_QUEUE_SIZE)
+
+    async def feed():
+        # Round-robin across hosts so per-host rate limits rarely make scrape workers wait
+        for position, article in enumerate(interleave_by_host(articles), 1):
+            await scrape_queue.put({'position': position, 'article': article})
+        await scrape_queue.put(_DONE)
+
+    await asyncio.gather(
+        feed(),
+        _run_stage("scrape", scrape, scrape_queue, thumbnail_queue, SCRAPE_CONCURRENCY, counts),
+        _run_stage("thumbnail", thumbnail, thumbnail_queue, summarize_queue, IMAGE_CONCURRENCY, counts),
+        _run_stage("summarize", summarize, summarize_queue, embed_queue, SUMMARIZE_CONCURRENCY, counts),
+        _run_batch_stage("embed", embed, embed_queue, store_queue, EMBED_CONCURRENCY, EMBED_BATCH_SIZE,
+                         EMBED_BATCH_LINGER, counts),
+        _run_stage("store", store, store_queue, None, STORE_CONCURRENCY, counts),
+    )
+
+    # Articles count as processed only once their batch has actually been written
+    written_ids, failed_ids = await asyncio.to_thread(writer.close)
+    if failed_ids:
+        logger.error(f"❌ Failed to store {len(failed_ids)} articles")
+    counts['processed'] -= len(failed_ids)
+    counts['failed'] += len(failed_ids)
+
+    await asyncio.to_thread(verify_upserts, index, written_ids)
+
+    return counts['processed'], counts['failed']
+
+
+def record_last_run(processed_count=0, failed_count=0, deleted_count=0):
+    """Atomically write the run marker the app uses to invalidate its cached article list"""
+    marker = {
+        'finished_at': datetime.now(timezone.utc).isoformat(),
+        'processed': processed_count,
+        'failed': failed_count,
+        'deleted': deleted_count,
+    }
+    try:
+        os.makedirs(os.path.dirname(LAST_RUN_PATH) or '.', exist_ok=True)
+        tmp_path = f"{LAST_RUN_PATH}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(marker, f)
+        os.replace(tmp_path, LAST_RUN_PATH)
+    except Exception as e:
+        logger.warning(f"Could not write run marker {LAST_RUN_PATH}: {e}")
+
+
 async def process_articles():
-    """Main processing function"""
+    """Main processing function; each run also writes a JSON run report and a Prometheus textfile"""
+    metrics.reset()
+    try:
+        await _process_articles()
+    finally:
+        metrics.export(RUN_REPORT_PATH, METRICS_TEXTFILE_PATH)
+
+
+async def _process_articles():
     logger.info("🚀 Starting newsletter processing for last 24 hours...")
 
     index = create_index()
@@ -24,57 +256,48 @@ async def process_articles():
         logger.error("Failed to create/access Pinecone index")
         return
 
-    # Clear old articles first
-    clear_old_articles(index)
+    if SYNC_MODE == "full":
+        # Clear old articles first
+        clear_old_articles(index)
 
     # Fetch articles from last 24 hours
-    articles = fetch_recent_articles()
+    articles, feed_stats = fetch_recent_articles()
+
+    cached_feeds = sum(1 for stat in feed_stats if stat.get('cached'))
+    logger.info(f"♻️ {cached_feeds}/{len(feed_stats)} feeds unchanged since the last run")
+
+    failed_feeds = [stat for stat in feed_stats if stat['status'] != 'ok']
+    if failed_feeds:
+        logger.warning(f"⚠️ {len(failed_feeds)}/{len(feed_stats)} feeds failed: "
+                       f"{', '.join(stat['source'] + ' (' + stat['status'] + ')' for stat in failed_feeds)}")
+
+    expired_ids = []
+    if SYNC_MODE != "full":
+        if not any(stat['status'] == 'ok' for stat in feed_stats):
+            logger.error("❌ Every feed failed; leaving the index untouched")
+            return
+        articles, expired_ids, unchanged_count = plan_sync(index, articles)
+        metrics.set_gauge('articles', unchanged_count, outcome='unchanged')
+        logger.info(f"⏭️ Skipping {unchanged_count} articles already stored unchanged")
 
     if not articles:
         logger.warning(
-            "⚠️ No recent articles found! This might be normal if no newsletters were published in the last 24 hours.")
+            "⚠️ No new articles to process! This might be normal if no newsletters were published in the last 24 hours.")
+        if expired_ids:
+            delete_ids(index, expired_ids)
+        write_article_manifest(index)
+        record_last_run(deleted_count=len(expired_ids))
         return
 
     logger.info(f"📰 Processing {len(articles)} articles...")
 
-    # Initialize the scraper
-    scraper = ArticleScraper()
+    image_store = ImageStore(IMAGE_STORE_DIR)
 
-    processed_count = 0
-    failed_count = 0
+    # Initialize the scraper; its pooled browsers are shut down when the run ends
+    async with ArticleScraper() as scraper:
+        processed_count, failed_count = await run_staged_pipeline(index, scraper, articles, image_store)
 
-    for i, article in enumerate(articles, 1):
-        try:
-            logger.info(f"\n{'=' * 60}")
-            logger.info(f"Processing article {i}/{len(articles)}: {article['title']}")
-            logger.info(f"Published: {article['published']}")
-            logger.info(f"Source: {article['source']}")
-            logger.info(f"Original URL: {article['url']}")
-            logger.info(f"{'=' * 60}")
-
-            # Use the scraper to get content and image
-            content, image_url = await scraper.scrape_article(article['url'])
-
-            if content:
-                ai_summary = summarize_content(content)
-                success = embed_and_store(index, article, content, image_url, ai_summary)
-
-                if success:
-                    processed_count += 1
-                    logger.info(f"✅ Successfully processed: {article['title'][:50]}...")
-                else:
-                    failed_count += 1
-                    logger.error(f"❌ Failed to store: {article['title'][:50]}...")
-            else:
-                failed_count += 1
-                logger.warning(f"⚠️ No content scraped for: {article['title'][:50]}...")
-
-            # Small delay between articles to be respectful
-            await asyncio.sleep(2)
-
-        except Exception as e:
-            failed_count += 1
-            logger.error(f"Error processing article {article['title']}: {e}")
+    image_store.prune(IMAGE_STORE_MAX_AGE_DAYS)
 
     logger.info(f"\n🎉 Processing complete!")
     logger.info(f"✅ Successfully processed: {processed_count} articles")
@@ -82,6 +305,26 @@ async def process_articles():
     if processed_count + failed_count > 0:
         logger.info(f"📊 Success rate: {(processed_count / (processed_count + failed_count) * 100):.1f}%")
 
+    metrics.set_gauge('articles', processed_count, outcome='processed')
+    metrics.set_gauge('articles', failed_count, outcome='failed')
+    logger.info(f"⏱️ Stage latency: {metrics.summary()}")
+
+    ai_cache = get_ai_cache()
+    if ai_cache:
+        logger.info(f"🗄️ AI cache: {ai_cache.summary()}")
+        for kind, kind_stats in ai_cache.stats.items():
+            for outcome, count in kind_stats.items():
+                metrics.set_gauge('ai_cache_lookups', count, kind=kind, outcome=outcome)
+
+    if expired_ids:
+        # Expire old articles only after the new ones are written so the app never shows an empty index
+        logger.info(f"🗑️ Deleting {len(expired_ids)} expired articles")
+        delete_ids(index, expired_ids)
+        metrics.set_gauge('articles', len(expired_ids), outcome='expired')
+
+    # The manifest is rewritten before the run marker, so the app reloads a complete listing
+    write_article_manifest(index)
+    record_last_run(processed_count, failed_count, len(expired_ids))
     verify_stored_data(index)
 
 
@@ -0,0 +1,101 @@
+import asyncio
+import logging
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlparse
+
+from config import HOST_RATE_LIMIT, HOST_RATE_LIMITS
+
+logger = logging.getLogger(__name__)
+
+
+def host_of(url):
+    """Lower-cased host name of a URL"""
+    return (urlparse(url).hostname or '').lower()
+
+
+def parse_retry_after(value, default=30.0):
+    """Convert a Retry-After header (seconds or HTTP date) into seconds to wait"""
+    if not value:
+        return default
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+        if retry_at.tzinfo is None:
+            retry_at = retry_at.replace(tzinfo=timezone.utc)
+        return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+    except Exception:
+        return default
+
+
+class HostRateLimiter:
+    """Per-host request scheduler shared by the feed fetcher (threads) and the scraper (asyncio).
+
+    Each host gets its own requests/sec budget; requests to different hosts
+    never wait on each other. A 429/503 pushes the host's next slot out by the
+    server's Retry-After.
+    """
+
+    def __init__(self, default_rate=HOST_RATE_LIMIT, host_rates=None):
+        self.default_rate = default_rate
+        self.host_rates = dict(HOST_RATE_LIMITS if host_rates is None else host_rates)
+        self._next_slot = {}
+        self._lock = threading.Lock()
+
+    def _interval(self, host):
+        rate = self.host_rates.get(host, self.default_rate)
+        return 1.0 / rate if rate > 0 else 0.0
+
+    def reserve(self, url):
+        """Book the next free slot for the URL's host and return how long to wait for it"""
+        host = host_of(url)
+        now = time.monotonic()
+        with self._lock:
+            slot = max(now, self._next_slot.get(host, now))
+            self._next_slot[host] = slot + self._interval(host)
+        return slot - now
+
+    def wait(self, url):
+        """Block the calling thread until the host may be contacted"""
+        delay = self.reserve(url)
+        if delay > 0:
+            time.sleep(delay)
+
+    async def acquire(self, url):
+        """Wait without blocking the event loop until the host may be contacted"""
+        delay = self.reserve(url)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    def penalize(self, url, retry_after=None):
+        """Back off a host after a 429/503, honoring its Retry-After header"""
+        host = host_of(url)
+        delay = parse_retry_after(retry_after)
+        with self._lock:
+            self._next_slot[host] = max(self._next_slot.get(host, 0.0), time.monotonic() + delay)
+        logger.warning(f"🚦 {host} asked us to slow down; pausing it for {delay:.0f}s")
+        return delay
+
+
+def interleave_by_host(items, url_of=lambda item: item['url']):
+    """Reorder items round-robin across hosts so consecutive work hits different hosts"""
+    by_host = OrderedDict()
+    for item in items:
+        by_host.setdefault(host_of(url_of(item)), []).append(item)
+
+    interleaved = []
+    queues = [list(reversed(group)) for group in by_host.values()]
+    while queues:
+        queues = [queue for queue in queues if queue]
+        for queue in queues:
+            interleaved.append(queue.pop())
+    return interleaved
+
+
+host_limiter = HostRateLimiter()
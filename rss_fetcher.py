@@ -1,61 +1,339 @@
 import feedparser
+import json
+import os
+import requests
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed, TimeoutError as FuturesTimeoutError
 from datetime import datetime, timezone
 import logging
-from config import RSS_FEEDS
+from config import (RSS_FEEDS, FEED_FETCH_MAX_WORKERS, FEED_TIMEOUT, FEED_FETCH_TOTAL_TIMEOUT, FEED_CACHE_PATH,
+                    FEED_CONTENT_MIN_CHARS)
 from date_utils import parse_date_flexible, is_from_last_24_hours
+from html_extract import extract_fragment
+from rate_limiter import host_limiter
+from metrics import metrics
 
 logger = logging.getLogger(__name__)
 
-def fetch_recent_articles():
-    """Fetch articles from RSS feeds that were published in the last 24 hours"""
-    all_articles = []
-    reference_time = datetime.now(timezone.utc)
+FEED_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+    'Accept': 'application/rss+xml, application/atom+xml, application/xml;q=0.9, */*;q=0.8',
+}
 
-    logger.info(f"🔍 Fetching articles from {len(RSS_FEEDS)} RSS feeds...")
-    logger.info(f"📅 Reference time (UTC): {reference_time.strftime('%Y-%m-%d %H:%M:%S')}")
 
-    for source_name, feed_url in RSS_FEEDS.items():
+# Entry fields kept in the feed cache so a 304 can be served without re-parsing
+CACHED_ENTRY_FIELDS = ('title', 'link', 'summary', 'author', 'published', 'updated', 'published_parsed',
+                       'updated_parsed', 'content', 'enclosures', 'media_content', 'media_thumbnail')
+
+# Endings of feed bodies that only carry the start of the post
+TRUNCATION_ENDINGS = ('…', '...', '[…]', '[...]')
+TRUNCATION_PHRASES = ('read more', 'continue reading', 'keep reading', 'read the full', 'subscribe to read',
+                      'for paid subscribers', 'for paying subscribers', 'upgrade to paid')
+
+# Same cap as scraped content, to keep embeddings bounded
+MAX_CONTENT_CHARS = 15000
+
+
+class FeedTimeout(Exception):
+    """Raised when a single feed exceeds its deadline"""
+
+
+class FeedCache:
+    """Persistent on-disk cache of feed validators (ETag / Last-Modified) and parsed entries"""
+
+    def __init__(self, path=FEED_CACHE_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._feeds = {}
+        self._dirty = False
+        self.load()
+
+    def load(self):
+        """Load the cache file, starting empty if it is missing or unreadable"""
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self._feeds = json.load(f)
+        except FileNotFoundError:
+            self._feeds = {}
+        except Exception as e:
+            logger.warning(f"Could not read feed cache {self.path}: {e}")
+            self._feeds = {}
+
+    def save(self):
+        """Atomically write the cache back to disk if anything changed"""
+        with self._lock:
+            if not self._dirty:
+                return
+            snapshot = json.dumps(self._feeds)
+            self._dirty = False
+
         try:
-            logger.info(f"📡 Parsing feed: {source_name}")
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                f.write(snapshot)
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            logger.warning(f"Could not write feed cache {self.path}: {e}")
+
+    def conditional_headers(self, feed_url):
+        """Return If-None-Match / If-Modified-Since headers for a cached feed"""
+        with self._lock:
+            cached = self._feeds.get(feed_url)
+        if not cached:
+            return {}
+
+        headers = {}
+        if cached.get('etag'):
+            headers['If-None-Match'] = cached['etag']
+        if cached.get('last_modified'):
+            headers['If-Modified-Since'] = cached['last_modified']
+        return headers
+
+    def get_entries(self, feed_url):
+        """Return the cached entries for a feed as attribute-accessible dicts"""
+        with self._lock:
+            cached = self._feeds.get(feed_url)
+        if not cached:
+            return None
+        return [feedparser.FeedParserDict(entry) for entry in cached.get('entries', [])]
+
+    def update(self, feed_url, etag, last_modified, entries):
+        """Store the validators and entries of a freshly downloaded feed"""
+        serialized = [
+            {field: entry[field] for field in CACHED_ENTRY_FIELDS if field in entry}
+            for entry in entries
+        ]
+        with self._lock:
+            self._feeds[feed_url] = {
+                'etag': etag or '',
+                'last_modified': last_modified or '',
+                'entries': serialized,
+                'fetched_at': datetime.now(timezone.utc).isoformat()
+            }
+            self._dirty = True
+
+
+def _download_feed(feed_url, timeout, extra_headers=None):
+    """Download a feed body, aborting once the per-feed deadline has passed.
+
+    Returns (status_code, body, response_headers); the body is empty on a 304.
+    """
+    deadline = time.monotonic() + timeout
+    headers = {**FEED_HEADERS, **(extra_headers or {})}
+    for attempt in range(2):
+        host_limiter.wait(feed_url)
+        with requests.get(feed_url, headers=headers, timeout=timeout, stream=True) as response:
+            if response.status_code in (429, 503) and attempt == 0:
+                # Retry once if the server's Retry-After still fits in our deadline
+                delay = host_limiter.penalize(feed_url, response.headers.get('Retry-After'))
+                if time.monotonic() + delay < deadline:
+                    metrics.incr('retries_total', operation='feed_fetch')
+                    continue
+            if response.status_code == 304:
+                return 304, b'', response.headers
+            response.raise_for_status()
+            body = bytearray()
+            for chunk in response.iter_content(chunk_size=65536):
+                body.extend(chunk)
+                if time.monotonic() > deadline:
+                    raise FeedTimeout(f"exceeded {timeout:.0f}s deadline")
+            metrics.incr('feed_bytes_total', len(body))
+            return response.status_code, bytes(body), response.headers
+
+
+def _entry_content_html(entry):
+    """Longest full-text body of an entry (RSS content:encoded / Atom content), or ''"""
+    bodies = [item.get('value', '') for item in entry.get('content', None) or []
+              if 'html' in (item.get('type') or 'text/html') or item.get('type') == 'text/plain']
+    return max(bodies, key=len, default='')
+
+
+def _entry_image(entry):
+    """Image enclosure or Media RSS image of an entry, or ''"""
+    for enclosure in entry.get('enclosures', None) or []:
+        if enclosure.get('type', '').startswith('image/') and enclosure.get('href'):
+            return enclosure['href']
+    for media in entry.get('media_content', None) or []:
+        if (media.get('medium') == 'image' or media.get('type', '').startswith('image/')) and media.get('url'):
+            return media['url']
+    for thumbnail in entry.get('media_thumbnail', None) or []:
+        if thumbnail.get('url'):
+            return thumbnail['url']
+    return ''
+
+
+def feed_full_text(article, min_chars=FEED_CONTENT_MIN_CHARS):
+    """Return (content, image_url, reason) for an article whose feed carries the whole post.
+
+    content is '' when the feed body is missing or looks truncated: shorter than
+    min_chars, no longer than a separate summary, or ending in an ellipsis or a "read
+    more" / paywall line. reason is 'full', 'missing' or 'truncated'.
+    """
+    html = article.get('content_html', '')
+    if not html or min_chars <= 0:
+        return '', '', 'missing'
 
-            # Parse the RSS feed
-            feed = feedparser.parse(feed_url)
+    content, image_url = extract_fragment(html, article['url'])
+    tail = content[-200:].lower()
+
+    # With no <description>, feedparser copies the content body into summary; that is not a teaser
+    summary = article.get('summary', '')
+    summary_chars = 0
+    if summary and summary.strip() != html.strip():
+        summary_text = extract_fragment(summary, article['url'])[0]
+        summary_chars = len(summary_text) if summary_text != content else 0
+    if (len(content) < min_chars or len(content) <= summary_chars
+            or content.endswith(TRUNCATION_ENDINGS) or any(phrase in tail for phrase in TRUNCATION_PHRASES)):
+        return '', '', 'truncated'
+
+    return content[:MAX_CONTENT_CHARS], article.get('image') or image_url, 'full'
+
+
+def _extract_recent_entries(entries, source_name, reference_time):
+    """Turn feed entries into article dicts from the last 24 hours"""
+    feed_articles = []
+    for entry in entries:
+        try:
+            # Extract publication date, preferring the UTC struct_time feedparser already parsed
+            published_date = None
+            if hasattr(entry, 'published'):
+                published_date = parse_date_flexible(entry.get('published_parsed') or entry.published)
+            elif hasattr(entry, 'updated'):
+                published_date = parse_date_flexible(entry.get('updated_parsed') or entry.updated)
+
+            # Check if article is from last 24 hours
+            if published_date and is_from_last_24_hours(published_date, reference_time):
+                article = {
+                    'title': entry.title if hasattr(entry, 'title') else 'No Title',
+                    'url': entry.link if hasattr(entry, 'link') else '',
+                    'summary': entry.summary if hasattr(entry, 'summary') else '',
+                    'author': entry.author if hasattr(entry, 'author') else 'Unknown',
+                    'published': published_date.isoformat() if published_date else '',
+                    'source': source_name,
+                    'content_html': _entry_content_html(entry),
+                    'image': _entry_image(entry)
+                }
+
+                feed_articles.append(article)
+                logger.info(f"✅ Found recent article: {article['title'][:50]}...")
+
+        except Exception as e:
+            logger.error(f"Error processing entry from {source_name}: {e}")
+
+    return feed_articles
+
+
+def fetch_feed(source_name, feed_url, reference_time, timeout=FEED_TIMEOUT, cache=None):
+    """Fetch and parse a single feed, returning its recent articles and a status record.
+
+    When a FeedCache is given the request is conditional, and a 304 reuses the
+    cached entries without downloading or parsing the body.
+    """
+    start = time.monotonic()
+    status = {'source': source_name, 'url': feed_url, 'status': 'ok', 'articles': 0, 'error': '',
+              'cached': False}
+    articles = []
+
+    try:
+        logger.info(f"📡 Parsing feed: {source_name}")
+
+        extra_headers = cache.conditional_headers(feed_url) if cache else None
+        status_code, body, response_headers = _download_feed(feed_url, timeout, extra_headers)
+
+        entries = cache.get_entries(feed_url) if cache and status_code == 304 else None
+        if entries is not None:
+            logger.info(f"♻️ {source_name} not modified, using cached entries")
+            status['cached'] = True
+        else:
+            if status_code == 304:
+                # Server answered 304 but our copy is gone; fetch unconditionally
+                status_code, body, response_headers = _download_feed(feed_url, timeout)
+
+            feed = feedparser.parse(body)
 
             if feed.bozo:
                 logger.warning(f"⚠️ Feed parsing warning for {source_name}: {feed.bozo_exception}")
 
-            feed_articles = []
-            for entry in feed.entries:
-                try:
-                    # Extract publication date
-                    published_date = None
-                    if hasattr(entry, 'published'):
-                        published_date = parse_date_flexible(entry.published)
-                    elif hasattr(entry, 'updated'):
-                        published_date = parse_date_flexible(entry.updated)
-
-                    # Check if article is from last 24 hours
-                    if published_date and is_from_last_24_hours(published_date, reference_time):
-                        article = {
-                            'title': entry.title if hasattr(entry, 'title') else 'No Title',
-                            'url': entry.link if hasattr(entry, 'link') else '',
-                            'summary': entry.summary if hasattr(entry, 'summary') else '',
-                            'author': entry.author if hasattr(entry, 'author') else 'Unknown',
-                            'published': published_date.isoformat() if published_date else '',
-                            'source': source_name
-                        }
-
-                        feed_articles.append(article)
-                        logger.info(f"✅ Found recent article: {article['title'][:50]}...")
-
-                except Exception as e:
-                    logger.error(f"Error processing entry from {source_name}: {e}")
-
-            logger.info(f"📰 Found {len(feed_articles)} recent articles from {source_name}")
-            all_articles.extend(feed_articles)
+            entries = feed.entries
+            if cache:
+                cache.update(feed_url, response_headers.get('ETag'), response_headers.get('Last-Modified'), entries)
 
-        except Exception as e:
-            logger.error(f"❌ Error fetching from {source_name}: {e}")
+        articles = _extract_recent_entries(entries, source_name, reference_time)
+        status['articles'] = len(articles)
+        logger.info(f"📰 Found {len(articles)} recent articles from {source_name}")
+
+    except (FeedTimeout, requests.Timeout) as e:
+        status['status'] = 'timeout'
+        status['error'] = str(e)
+        logger.error(f"⏱️ Timed out fetching {source_name}: {e}")
+    except Exception as e:
+        status['status'] = 'error'
+        status['error'] = str(e)
+        logger.error(f"❌ Error fetching from {source_name}: {e}")
+
+    status['elapsed'] = round(time.monotonic() - start, 3)
+    metrics.incr('feeds_total', status=status['status'])
+    metrics.record('feed_fetch', status['elapsed'], source=source_name, ok=status['status'] == 'ok',
+                   status=status['status'], cached=status['cached'], articles=status['articles'])
+    return articles, status
+
+
+def fetch_recent_articles(feeds=None, max_workers=FEED_FETCH_MAX_WORKERS,
+                          feed_timeout=FEED_TIMEOUT, total_timeout=FEED_FETCH_TOTAL_TIMEOUT, use_cache=True):
+    """Fetch articles published in the last 24 hours from all RSS feeds concurrently.
+
+    Returns a tuple of (articles, feed_stats) where feed_stats holds one status
+    record per feed with its outcome, article count, cache use and elapsed seconds.
+    """
+    feeds = RSS_FEEDS if feeds is None else feeds
+    cache = FeedCache() if use_cache else None
+    all_articles = []
+    feed_stats = []
+    reference_time = datetime.now(timezone.utc)
+    start = time.monotonic()
+
+    logger.info(f"🔍 Fetching articles from {len(feeds)} RSS feeds ({max_workers} workers)...")
+    logger.info(f"📅 Reference time (UTC): {reference_time.strftime('%Y-%m-%d %H:%M:%S')}")
+
+    executor = ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix="feed")
+    futures = {
+        executor.submit(fetch_feed, source_name, feed_url, reference_time, feed_timeout, cache): (source_name, feed_url)
+        for source_name, feed_url in feeds.items()
+    }
+
+    merged = set()
+    try:
+        # Merge results in completion order so a slow feed never blocks the others
+        for future in as_completed(futures, timeout=total_timeout):
+            articles, status = future.result()
+            all_articles.extend(articles)
+            feed_stats.append(status)
+            merged.add(future)
+    except FuturesTimeoutError:
+        for future, (source_name, feed_url) in futures.items():
+            if future in merged:
+                continue
+            if future.done():
+                articles, status = future.result()
+                all_articles.extend(articles)
+                feed_stats.append(status)
+            else:
+                logger.error(f"⏱️ {source_name} did not finish within the {total_timeout:.0f}s fetch deadline")
+                metrics.incr('feeds_total', status='timeout')
+                feed_stats.append({
+                    'source': source_name, 'url': feed_url, 'status': 'timeout', 'articles': 0, 'cached': False,
+                    'error': f"exceeded {total_timeout:.0f}s total deadline",
+                    'elapsed': round(time.monotonic() - start, 3)
+                })
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+        if cache:
+            cache.save()
 
-    logger.info(f"🎉 Total recent articles found: {len(all_articles)}")
-    return all_articles
+    slowest = sorted(feed_stats, key=lambda s: s['elapsed'], reverse=True)[:3]
+    slowest_text = ", ".join(f"{s['source']} ({s['elapsed']:.1f}s)" for s in slowest)
+    logger.info(f"🐢 Slowest feeds: {slowest_text}")
+    logger.info(f"🎉 Total recent articles found: {len(all_articles)} in {time.monotonic() - start:.1f}s")
+    return all_articles, feed_stats
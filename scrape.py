@@ -1,32 +1,189 @@
+import aiohttp
 import asyncio
 import logging
 import re
-import requests
-from urllib.parse import urljoin
-from bs4 import BeautifulSoup
+import time
+from contextlib import asynccontextmanager
 from crawl4ai import AsyncWebCrawler, BrowserConfig, CrawlerRunConfig, CacheMode
+from html_extract import extract_image, extract_page, extract_text
+from rate_limiter import host_limiter
+from scrape_strategy import BROWSER, HTTP, StrategyStats
+from metrics import metrics
+from config import (SCRAPE_CONCURRENCY, BROWSER_POOL_SIZE, BROWSER_MAX_PAGES, HTTP_MAX_CONNECTIONS,
+                    HTTP_PER_HOST_LIMIT, HTTP_TIMEOUT)
+
+# aiohttp decodes brotli responses only when a brotli package is installed
+try:
+    import brotli  # noqa: F401
+    ACCEPT_ENCODING = 'gzip, deflate, br'
+except ImportError:
+    try:
+        import brotlicffi  # noqa: F401
+        ACCEPT_ENCODING = 'gzip, deflate, br'
+    except ImportError:
+        ACCEPT_ENCODING = 'gzip, deflate'
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
+
+# Crawl4AI error messages (lowercased fragments) that mean the browser, page or target itself is gone
+BROWSER_DEAD_ERRORS = ('has been closed', 'target closed', 'browser closed', 'page closed', 'disconnected')
+
+
+def browser_is_dead(error_message):
+    """True when a crawl error says the browser, its page or its target is closed"""
+    message = (error_message or '').lower()
+    return any(fragment in message for fragment in BROWSER_DEAD_ERRORS)
+
+
+class BrowserSlot:
+    """One long-lived Crawl4AI browser plus the page session it reuses"""
+
+    def __init__(self, slot_id):
+        self.slot_id = slot_id
+        self.session_id = f"browser-pool-{slot_id}"
+        self.crawler = None
+        self.pages_served = 0
+        self.healthy = True
+
+    async def crawl(self, url, config):
+        """Run a crawl on this slot's browser, reusing its page session.
+
+        The slot is marked unhealthy when the crawl raises or reports a closed
+        browser, page or target, so the next lease starts a fresh browser.
+        """
+        self.pages_served += 1
+        config.session_id = self.session_id
+        try:
+            result = await self.crawler.arun(url=url, config=config)
+        except Exception:
+            self.healthy = False
+            raise
+        if not result.success and browser_is_dead(result.error_message):
+            self.healthy = False
+        return result
+
+
+class BrowserPool:
+    """Pool of warm Crawl4AI browsers leased out to concurrent scrapes.
+
+    Browsers are started lazily on first lease and recycled after serving
+    max_pages pages or once a crawl on them shows the browser is broken
+    (see BrowserSlot.crawl and ArticleScraper.scrape_with_crawl4ai).
+    """
+
+    def __init__(self, browser_config, size=BROWSER_POOL_SIZE, max_pages=BROWSER_MAX_PAGES):
+        self.browser_config = browser_config
+        self.size = max(1, size)
+        self.max_pages = max_pages
+        self._slots = []
+        self._idle = None
+
+    def _ensure_slots(self):
+        if self._idle is None:
+            self._idle = asyncio.Queue()
+            for slot_id in range(self.size):
+                slot = BrowserSlot(slot_id)
+                self._slots.append(slot)
+                self._idle.put_nowait(slot)
+
+    async def _start(self, slot):
+        logger.info(f"🌐 Launching pooled browser {slot.slot_id}")
+        crawler = AsyncWebCrawler(config=self.browser_config, verbose=True)
+        await crawler.start()
+        slot.crawler = crawler
+        slot.pages_served = 0
+        slot.healthy = True
+
+    async def _stop(self, slot):
+        crawler, slot.crawler = slot.crawler, None
+        if crawler is None:
+            return
+        try:
+            await crawler.close()
+        except Exception as e:
+            logger.warning(f"Error closing pooled browser {slot.slot_id}: {e}")
+
+    async def _health_check(self, slot):
+        """Recycle a slot's browser if it crashed or has served too many pages"""
+        if slot.crawler is not None and not getattr(slot.crawler, 'ready', True):
+            slot.healthy = False
+
+        if slot.crawler is not None and (not slot.healthy or slot.pages_served >= self.max_pages):
+            reason = "unhealthy" if not slot.healthy else f"served {slot.pages_served} pages"
+            logger.info(f"♻️ Recycling pooled browser {slot.slot_id} ({reason})")
+            await self._stop(slot)
+
+        if slot.crawler is None:
+            await self._start(slot)
+
+    @asynccontextmanager
+    async def lease(self):
+        """Lease a healthy browser slot for the duration of the block"""
+        self._ensure_slots()
+        slot = await self._idle.get()
+        try:
+            await self._health_check(slot)
+            yield slot
+        finally:
+            self._idle.put_nowait(slot)
+
+    async def close(self):
+        """Shut down every browser in the pool"""
+        for slot in self._slots:
+            await self._stop(slot)
+
+
 class ArticleScraper:
     """Main article scraper class with multiple scraping strategies"""
 
-    def __init__(self):
+    def __init__(self, pool_size=BROWSER_POOL_SIZE, max_pages_per_browser=BROWSER_MAX_PAGES, rate_limiter=None,
+                 strategy_stats=None):
         self.browser_config = BrowserConfig(
             headless=True,
             viewport_width=1920,
             viewport_height=1080,
             user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
         )
+        self.browser_pool = BrowserPool(self.browser_config, pool_size, max_pages_per_browser)
+        self.rate_limiter = rate_limiter or host_limiter
+        self.strategy_stats = strategy_stats if strategy_stats is not None else StrategyStats()
 
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
             'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
             'Accept-Language': 'en-US,en;q=0.5',
-            'Accept-Encoding': 'gzip, deflate',
+            'Accept-Encoding': ACCEPT_ENCODING,
             'Connection': 'keep-alive',
         }
+        self._http_session = None
+
+    def _get_http_session(self):
+        """Shared keep-alive HTTP session with a bounded, per-host limited connection pool"""
+        if self._http_session is None or self._http_session.closed:
+            connector = aiohttp.TCPConnector(limit=HTTP_MAX_CONNECTIONS, limit_per_host=HTTP_PER_HOST_LIMIT,
+                                             ttl_dns_cache=300)
+            self._http_session = aiohttp.ClientSession(
+                connector=connector,
+                headers=self.headers,
+                timeout=aiohttp.ClientTimeout(total=HTTP_TIMEOUT),
+            )
+        return self._http_session
+
+    async def close(self):
+        """Release the pooled browsers and the HTTP session, and persist the per-domain strategy stats"""
+        await self.browser_pool.close()
+        self.strategy_stats.save()
+        logger.info(f"🧭 Scrape strategy by domain: {self.strategy_stats.summary()}")
+        if self._http_session is not None and not self._http_session.closed:
+            await self._http_session.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
 
     async def scrape_with_crawl4ai(self, url):
         """Scrape full content from article URL using Crawl4AI with enhanced configuration"""
@@ -44,9 +201,13 @@ class ArticleScraper:
                 wait_for_images=False,  # Don't wait for images to speed up
             )
 
-            async with AsyncWebCrawler(config=self.browser_config, verbose=True) as crawler:
+            # Wait for the host's politeness slot before holding a browser
+            await self.rate_limiter.acquire(url)
+            async with self.browser_pool.lease() as browser:
                 # First attempt with standard configuration
-                result = await crawler.arun(url=url, config=config)
+                result = await browser.crawl(url, config)
+                self._check_throttled(url, result)
+                metrics.incr('scrape_bytes_total', len(result.html or ''), strategy='crawl4ai')
 
                 if not result.success:
                     logger.warning(f"First attempt failed for {url}: {result.error_message}")
@@ -60,14 +221,20 @@ class ArticleScraper:
                         wait_for="networkidle",  # Wait for network to be idle
                     )
 
-                    result = await crawler.arun(url=url, config=fallback_config)
+                    metrics.incr('retries_total', operation='crawl4ai')
+                    await self.rate_limiter.acquire(url)
+                    result = await browser.crawl(url, fallback_config)
+                    self._check_throttled(url, result)
+                    metrics.incr('scrape_bytes_total', len(result.html or ''), strategy='crawl4ai')
 
                     if not result.success:
+                        # Crawl4AI reports a crashed browser as a failed result rather than raising
                         logger.error(f"Both attempts failed for {url}: {result.error_message}")
+                        browser.healthy = False
                         return "", ""
 
-                # Extract content and image
-                content, image_url = self._extract_content_from_result(result, url)
+                # Extract content and image off the event loop so other crawls keep going
+                content, image_url = await asyncio.to_thread(self._extract_content_from_result, result, url)
 
                 if content and len(content) > 100:
                     logger.info(f"✅ Successfully scraped {url} with Crawl4AI - {len(content)} characters")
@@ -80,6 +247,13 @@ class ArticleScraper:
             logger.error(f"❌ Error scraping {url} with Crawl4AI: {e}")
             return "", ""
 
+    def _check_throttled(self, url, result):
+        """Back off the host if a crawl came back rate limited"""
+        if getattr(result, 'status_code', None) in (429, 503):
+            headers = getattr(result, 'response_headers', None) or {}
+            retry_after = headers.get('retry-after') or headers.get('Retry-After')
+            self.rate_limiter.penalize(url, retry_after)
+
     def _extract_content_from_result(self, result, url):
         """Extract content and images from Crawl4AI result"""
         content = ""
@@ -114,35 +288,9 @@ class ArticleScraper:
     def _extract_text_from_html(self, html_content):
         """Extract clean text from HTML content"""
         try:
-            soup = BeautifulSoup(html_content, 'html.parser')
-
-            # Try to find main content area
-            main_content = None
-            content_selectors = [
-                'article', '[role="main"]', 'main', '.post-content',
-                '.entry-content', '.article-content', '.content', '.post-body'
-            ]
-
-            for selector in content_selectors:
-                main_content = soup.select_one(selector)
-                if main_content and main_content.get_text().strip():
-                    break
-
-            # If no main content found, use body
-            if not main_content:
-                main_content = soup.find('body') or soup
-
-            if main_content:
-                content = main_content.get_text()
-                # Clean up the content
-                lines = (line.strip() for line in content.splitlines())
-                chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
-                content = ' '.join(chunk for chunk in chunks if chunk)
-                return content
-
+            return extract_text(html_content)
         except Exception as e:
             logger.error(f"Error extracting text from HTML: {e}")
-
         return ""
 
     def _clean_markdown_content(self, markdown_content):
@@ -161,82 +309,32 @@ class ArticleScraper:
     def _extract_image_from_html(self, html_content, base_url):
         """Extract the best image from HTML content"""
         try:
-            soup = BeautifulSoup(html_content, 'html.parser')
-
-            # Try to find a good image
-            img_selectors = [
-                'meta[property="og:image"]',
-                'meta[name="twitter:image"]',
-                'img[class*="featured"]',
-                'img[class*="hero"]',
-                'article img',
-                '.content img',
-                'img'
-            ]
-
-            for selector in img_selectors:
-                img_element = soup.select_one(selector)
-                if img_element:
-                    src = img_element.get('content') or img_element.get('src', '')
-                    if src:
-                        # Make relative URLs absolute
-                        if src.startswith('//'):
-                            src = 'https:' + src
-                        elif src.startswith('/'):
-                            src = urljoin(base_url, src)
-
-                        if src.startswith('http') and any(
-                                ext in src.lower() for ext in ['.jpg', '.jpeg', '.png', '.webp', '.gif']):
-                            return src
-
+            return extract_image(html_content, base_url)
         except Exception as e:
             logger.error(f"Error extracting image from HTML: {e}")
-
         return ""
 
     async def scrape_with_requests(self, url):
-        """Fallback scraping method using requests + BeautifulSoup"""
+        """Fallback scraping method using the shared aiohttp session + lxml extraction"""
         try:
-            logger.info(f"Scraping with requests fallback: {url}")
-
-            response = requests.get(url, headers=self.headers, timeout=30, allow_redirects=True)
-            response.raise_for_status()
-
-            soup = BeautifulSoup(response.content, 'html.parser')
-
-            # Remove unwanted elements
-            for element in soup(["script", "style", "nav", "footer", "header", "aside"]):
-                element.decompose()
-
-            # Try to find main content area first
-            main_content = None
-            content_selectors = [
-                'article', '[role="main"]', 'main', '.post-content',
-                '.entry-content', '.article-content', '.content'
-            ]
-
-            for selector in content_selectors:
-                main_content = soup.select_one(selector)
-                if main_content:
+            logger.info(f"Scraping with HTTP fallback: {url}")
+
+            html = None
+            for attempt in range(3):
+                await self.rate_limiter.acquire(url)
+                async with self._get_http_session().get(url, allow_redirects=True) as response:
+                    if response.status in (429, 503) and attempt < 2:
+                        # The limiter holds this host back for Retry-After before the next attempt
+                        self.rate_limiter.penalize(url, response.headers.get('Retry-After'))
+                        metrics.incr('retries_total', operation='http_fetch')
+                        continue
+                    response.raise_for_status()
+                    html = await response.read()
+                    metrics.incr('scrape_bytes_total', len(html), strategy='http')
                     break
 
-            # If no main content found, use body
-            if not main_content:
-                main_content = soup.find('body')
-
-            content = ""
-            if main_content:
-                content = main_content.get_text()
-            else:
-                content = soup.get_text()
-
-            # Clean up whitespace
-            lines = (line.strip() for line in content.splitlines())
-            chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
-            content = ' '.join(chunk for chunk in chunks if chunk)
-
-            # Try to find images
-            image_url = self._extract_image_from_html(str(soup), url)
+            # Parse off the event loop so concurrent fetches keep overlapping
+            content, image_url = await asyncio.to_thread(self._extract_from_fallback_html, html, url)
 
             if content and len(content) > 100:
                 content = content[:15000] if len(content) > 15000 else content
@@ -250,18 +348,57 @@ class ArticleScraper:
             logger.error(f"❌ Fallback scraping error for {url}: {e}")
             return "", ""
 
-    async def scrape_article(self, url):
-        """Main scraping function that tries Crawl4AI first, then falls back to requests"""
-        try:
-            # First try with Crawl4AI
+    def _extract_from_fallback_html(self, html, url):
+        """Extract text content and image from a raw HTML page with a single parse"""
+        return extract_page(html, url)
+
+    async def _run_strategy(self, strategy, url):
+        """Scrape with one strategy, recording its span and the domain's outcome"""
+        start = time.monotonic()
+        if strategy == BROWSER:
             content, image_url = await self.scrape_with_crawl4ai(url)
+        else:
+            content, image_url = await self.scrape_with_requests(url)
+        elapsed = time.monotonic() - start
 
-            if content and len(content) > 100:
-                return content, image_url
+        ok = bool(content and len(content) > 100)
+        metrics.record('crawl4ai' if strategy == BROWSER else 'http_fetch', elapsed, url=url, ok=ok,
+                       chars=len(content or ''))
+        self.strategy_stats.record(url, strategy, ok, elapsed, len(content or ''))
+        return ok, content, image_url
+
+    async def scrape_article(self, url):
+        """Main scraping function: tries plain HTTP or Crawl4AI first depending on what works for the domain.
+
+        Domains without enough history are scraped with both strategies so they
+        can be compared (one article per domain at a time); the browser's result
+        is kept when it succeeds, as before.
+        """
+        try:
+            strategies, calibrate = self.strategy_stats.plan(url)
+            metrics.incr('scrape_plan_total', first='calibrate' if calibrate else strategies[0])
+
+            results = {}
+            try:
+                for strategy in strategies:
+                    if results and not calibrate:
+                        logger.info(f"Falling back to {strategy} for {url}")
+                    results[strategy] = await self._run_strategy(strategy, url)
+                    if results[strategy][0] and not calibrate:
+                        break
+            finally:
+                if calibrate:
+                    self.strategy_stats.end_probe(url)
+
+            preference = [BROWSER, HTTP] if calibrate else strategies
+            for strategy in preference:
+                ok, content, image_url = results.get(strategy, (False, "", ""))
+                if ok:
+                    metrics.incr('scrape_strategy_total', strategy=strategy)
+                    return content, image_url
 
-            # Fallback to requests if Crawl4AI doesn't work well
-            logger.info(f"Falling back to requests for {url}")
-            return await self.scrape_with_requests(url)
+            metrics.incr('scrape_strategy_total', strategy='none')
+            return "", ""
 
         except Exception as e:
             logger.error(f"Error in main scraping function for {url}: {e}")
@@ -272,11 +409,8 @@ class ArticleScraper:
         try:
             logger.info(f"Scraping {len(urls)} articles concurrently...")
 
-            # Create tasks for concurrent scraping
-            tasks = [self.scrape_article(url) for url in urls]
-
             # Run with limited concurrency to avoid overwhelming servers
-            semaphore = asyncio.Semaphore(3)  # Limit to 3 concurrent requests
+            semaphore = asyncio.Semaphore(SCRAPE_CONCURRENCY)
 
             async def scrape_with_semaphore(url):
                 async with semaphore:
@@ -296,14 +430,14 @@ class ArticleScraper:
 # Convenience functions for easy importing
 async def scrape_single_article(url):
     """Scrape a single article - convenience function"""
-    scraper = ArticleScraper()
-    return await scraper.scrape_article(url)
+    async with ArticleScraper() as scraper:
+        return await scraper.scrape_article(url)
 
 
 async def scrape_articles_batch(urls):
     """Scrape multiple articles - convenience function"""
-    scraper = ArticleScraper()
-    return await scraper.scrape_multiple_articles(urls)
+    async with ArticleScraper() as scraper:
+        return await scraper.scrape_multiple_articles(urls)
 
 '''
 # For testing the scraper independently
@@ -0,0 +1,137 @@
+import json
+import logging
+import os
+import time
+
+from config import (SCRAPE_STATS_PATH, SCRAPE_STRATEGY_MIN_SAMPLES, SCRAPE_HTTP_MIN_SUCCESS_RATE,
+                    SCRAPE_HTTP_MIN_CONTENT_RATIO, SCRAPE_STRATEGY_REPROBE_HOURS)
+from rate_limiter import host_of
+
+logger = logging.getLogger(__name__)
+
+HTTP = 'http'
+BROWSER = 'crawl4ai'
+
+# Weight kept by older outcomes on each new one, so a domain's stats follow its recent behaviour
+DECAY = 0.8
+
+
+class StrategyStats:
+    """Per-domain scrape outcomes by strategy, persisted across runs, that pick which strategy runs first.
+
+    For each domain and strategy it keeps decayed success, latency and content
+    length totals. Plain HTTP goes first on domains where it reliably returns
+    as much text as the browser; the headless browser goes first where pages
+    need JavaScript. Until a domain has min_samples outcomes for both
+    strategies, or when its stats are older than reprobe_hours, both strategies
+    run so they can be compared, but only for one in-flight article per domain
+    at a time; the domain's other articles use the best order known so far.
+    """
+
+    def __init__(self, path=SCRAPE_STATS_PATH, min_samples=SCRAPE_STRATEGY_MIN_SAMPLES,
+                 min_success_rate=SCRAPE_HTTP_MIN_SUCCESS_RATE, min_content_ratio=SCRAPE_HTTP_MIN_CONTENT_RATIO,
+                 reprobe_hours=SCRAPE_STRATEGY_REPROBE_HOURS):
+        self.path = path
+        self.min_samples = min_samples
+        self.min_success_rate = min_success_rate
+        self.min_content_ratio = min_content_ratio
+        self.reprobe_seconds = reprobe_hours * 3600
+        self._domains = {}
+        self._dirty = False
+        # Domains with a dual-strategy probe in flight
+        self._probing = set()
+        self.load()
+
+    def load(self):
+        """Load the stats file, starting empty if it is missing or unreadable"""
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self._domains = json.load(f)
+        except FileNotFoundError:
+            self._domains = {}
+        except Exception as e:
+            logger.warning(f"Could not read scrape stats {self.path}: {e}")
+            self._domains = {}
+
+    def save(self):
+        """Atomically write the stats back to disk if anything changed"""
+        if not self._dirty:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self._domains, f)
+            os.replace(tmp_path, self.path)
+            self._dirty = False
+        except Exception as e:
+            logger.warning(f"Could not write scrape stats {self.path}: {e}")
+
+    def record(self, url, strategy, ok, seconds, chars):
+        """Add one scrape outcome for the URL's domain"""
+        stats = self._domains.setdefault(host_of(url), {}).setdefault(strategy, {
+            'samples': 0, 'attempts': 0.0, 'successes': 0.0, 'seconds': 0.0, 'chars': 0.0, 'updated_at': 0.0})
+        stats['samples'] += 1
+        stats['attempts'] = stats['attempts'] * DECAY + 1
+        stats['successes'] = stats['successes'] * DECAY + (1 if ok else 0)
+        stats['seconds'] = stats['seconds'] * DECAY + seconds
+        stats['chars'] = stats['chars'] * DECAY + (chars if ok else 0)
+        stats['updated_at'] = time.time()
+        self._dirty = True
+
+    def domain_summary(self, url):
+        """Success rate, mean latency and mean successful content length per strategy for a domain"""
+        summary = {}
+        for strategy, stats in self._domains.get(host_of(url), {}).items():
+            summary[strategy] = {
+                'samples': stats['samples'],
+                'success_rate': stats['successes'] / stats['attempts'] if stats['attempts'] else 0.0,
+                'seconds': stats['seconds'] / stats['attempts'] if stats['attempts'] else 0.0,
+                'chars': stats['chars'] / stats['successes'] if stats['successes'] else 0.0,
+            }
+        return summary
+
+    def _settled(self, stats):
+        return (stats.get('samples', 0) >= self.min_samples
+                and time.time() - stats.get('updated_at', 0) < self.reprobe_seconds)
+
+    def http_is_enough(self, url):
+        """True when plain HTTP reliably gets about as much article text as the browser on this domain"""
+        summary = self.domain_summary(url)
+        http = summary.get(HTTP)
+        if not http or http['success_rate'] < self.min_success_rate:
+            return False
+        browser = summary.get(BROWSER)
+        return not browser or not browser['chars'] or http['chars'] >= self.min_content_ratio * browser['chars']
+
+    def needs_probe(self, url):
+        """True while a domain lacks settled stats for either strategy"""
+        domain = self._domains.get(host_of(url), {})
+        return not all(self._settled(domain.get(strategy, {})) for strategy in (HTTP, BROWSER))
+
+    def best_order(self, url):
+        """Strategies in the order that currently works best for the domain (browser first when unknown)"""
+        return [HTTP, BROWSER] if self.http_is_enough(url) else [BROWSER, HTTP]
+
+    def plan(self, url):
+        """Return (strategies in the order to try, whether to run all of them to compare).
+
+        A probe claims its domain until end_probe(url) is called, so concurrent
+        articles from the same host do not all hit it with both strategies.
+        """
+        if self.needs_probe(url) and host_of(url) not in self._probing:
+            self._probing.add(host_of(url))
+            return [HTTP, BROWSER], True
+        return self.best_order(url), False
+
+    def end_probe(self, url):
+        """Release the domain claimed by a probing plan()"""
+        self._probing.discard(host_of(url))
+
+    def summary(self):
+        """Count of known domains by the strategy they currently try first"""
+        counts = {HTTP: 0, BROWSER: 0, 'calibrating': 0}
+        for domain in self._domains:
+            url = f"https://{domain}/"
+            counts['calibrating' if self.needs_probe(url) else self.best_order(url)[0]] += 1
+        return counts
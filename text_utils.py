@@ -3,39 +3,61 @@ import logging
 
 logger = logging.getLogger(__name__)
 
+# Characters the original implementation replaced with a space before its ", "
+# rule. That rule comes from an implicit string concatenation in the original
+# character list: a comma followed by a space was dropped. It is kept here so
+# output stays identical.
+_PRE_COMMA_SYMBOLS = re.escape('*/\\`~^|<>{}[]§¶†‡•◦▪▫–—')
+
+# Characters outside the speech-safe set (whitespace included) and commas that
+# would have been dropped. Any run of them becomes a single space, which folds
+# the symbol replacement, the catch-all filter and the whitespace collapse into
+# one pass. Runs that are already a single space are not matched, so ordinary
+# word breaks cost nothing.
+_SEPARATOR = r"[^\w.,!?;:()\-'&@#%]"
+_NON_SPACE_SEPARATOR = r"[^\w.,!?;:()\-'&@#% ]"
+_DROPPED_COMMA = rf",(?=[ {_PRE_COMMA_SYMBOLS}])"
+_SPEECH_SEPARATOR_RUN = re.compile(
+    rf" (?:{_SEPARATOR}|{_DROPPED_COMMA})+|(?:{_NON_SPACE_SEPARATOR}|{_DROPPED_COMMA})(?:{_SEPARATOR}|{_DROPPED_COMMA})*"
+)
+_DOUBLE_UNDERSCORE = re.compile(r'__(.*?)__')
+_SINGLE_UNDERSCORE = re.compile(r'_(.*?)_')
+
+
 def clean_text_for_speech(text):
     """Clean text to remove unwanted characters that cause issues with text-to-speech"""
     if not text:
         return ""
 
-    # Remove common problematic characters
-    unwanted_chars = ['*', '/', '\\', '`', '~', '^', '|', '<', '>', '{', '}', '[', ']',
-                      '§', '¶', '†', '‡', '•', '◦', '▪', '▫', '–', '—', ''', ''', '"', '"',
-                      '…', '¡', '¿', '«', '»', '‹', '›', '€', '£', '¥', '©', '®', '™']
+    cleaned_text = _SPEECH_SEPARATOR_RUN.sub(' ', text)
 
-    # Replace unwanted characters with spaces or appropriate alternatives
-    cleaned_text = text
-    for char in unwanted_chars:
-        cleaned_text = cleaned_text.replace(char, ' ')
+    # Remove markdown-style underscore emphasis (asterisks, backticks and
+    # backslashes are already gone at this point)
+    if '_' in cleaned_text:
+        cleaned_text = _DOUBLE_UNDERSCORE.sub(r'\1', cleaned_text)  # Bold
+        cleaned_text = _SINGLE_UNDERSCORE.sub(r'\1', cleaned_text)  # Italic
 
-    # Replace multiple special characters and symbols
-    cleaned_text = re.sub(r'[^\w\s\.,!?;:()\-\'\"&@#%]', ' ', cleaned_text)
+    return cleaned_text.strip()
 
-    # Clean up extra whitespace
-    cleaned_text = re.sub(r'\s+', ' ', cleaned_text)
 
-    # Remove markdown-style formatting
-    cleaned_text = re.sub(r'\*\*(.*?)\*\*', r'\1', cleaned_text)  # Bold
-    cleaned_text = re.sub(r'\*(.*?)\*', r'\1', cleaned_text)  # Italic
-    cleaned_text = re.sub(r'__(.*?)__', r'\1', cleaned_text)  # Bold
-    cleaned_text = re.sub(r'_(.*?)_', r'\1', cleaned_text)  # Italic
-    cleaned_text = re.sub(r'`(.*?)`', r'\1', cleaned_text)  # Code
+def clean_texts_for_speech(texts):
+    """Batch version of clean_text_for_speech; repeated strings are cleaned once"""
+    cleaned = {}
+    results = []
+    for text in texts:
+        if text not in cleaned:
+            cleaned[text] = clean_text_for_speech(text)
+        results.append(cleaned[text])
+    return results
 
-    # Remove any remaining problematic patterns
-    cleaned_text = re.sub(r'\\[a-zA-Z]', '', cleaned_text)  # Remove backslash commands
-    cleaned_text = re.sub(r'\\\w+', '', cleaned_text)  # Remove other backslash patterns
 
-    return cleaned_text.strip()
+_CITATION_BRACKETS = re.compile(r'\[\d+\]')
+_CITATION_PARENS = re.compile(r'\(\d+\)')
+_REFERENCE_SECTION = re.compile(r'\n*(?:References?|Sources?):.*$', re.IGNORECASE | re.DOTALL)
+_NUMBERED_REFERENCE = re.compile(r'\n\d+\.\s+.*$', re.MULTILINE)
+_TRAILING_NUMBER = re.compile(r'\s+\d+\s*$')
+_LEADING_NUMBER = re.compile(r'^\s*\d+\s+')
+_WHITESPACE_RUN = re.compile(r'\s+')
 
 
 def clean_perplexity_summary(text):
@@ -44,24 +66,23 @@ def clean_perplexity_summary(text):
         return ""
 
     # Remove citation numbers in square brackets like [1], [2], etc.
-    text = re.sub(r'\[\d+\]', '', text)
+    text = _CITATION_BRACKETS.sub('', text)
 
     # Remove citation numbers in parentheses like (1), (2), etc.
-    text = re.sub(r'\(\d+\)', '', text)
+    text = _CITATION_PARENS.sub('', text)
 
     # Remove reference patterns like "References:" or "Sources:" at the end
-    text = re.sub(r'\n*(?:References?|Sources?):.*$', '', text, flags=re.IGNORECASE | re.DOTALL)
+    text = _REFERENCE_SECTION.sub('', text)
 
     # Remove any numbered list items that might be references
-    text = re.sub(r'\n\d+\.\s+.*$', '', text, flags=re.MULTILINE)
+    text = _NUMBERED_REFERENCE.sub('', text)
 
     # Remove standalone numbers that might be citations
-    text = re.sub(r'\s+\d+\s*$', '', text)
-    text = re.sub(r'^\s*\d+\s+', '', text)
+    text = _TRAILING_NUMBER.sub('', text)
+    text = _LEADING_NUMBER.sub('', text)
 
     # Clean up multiple spaces and newlines
-    text = re.sub(r'\s+', ' ', text)
-    text = re.sub(r'\n+', ' ', text)
+    text = _WHITESPACE_RUN.sub(' ', text)
 
     # Apply general text cleaning for TTS
     text = clean_text_for_speech(text)
@@ -85,10 +106,21 @@ def clean_string_for_metadata(s, max_len, preserve_url=False):
     if preserve_url:
         cleaned = clean_url(str(s))
     else:
-        cleaned = clean_text_for_speech(str(s))
-        cleaned = ''.join(char for char in cleaned if ord(char) >= 32 and ord(char) < 127)
+        # clean_text_for_speech leaves no control characters, so only non-ASCII needs dropping
+        cleaned = clean_text_for_speech(str(s)).encode('ascii', 'ignore').decode('ascii')
     return cleaned[:max_len]
 
+
+def clean_strings_for_metadata(values, max_len, preserve_url=False):
+    """Batch version of clean_string_for_metadata; repeated values are cleaned once"""
+    cleaned = {}
+    results = []
+    for value in values:
+        if value not in cleaned:
+            cleaned[value] = clean_string_for_metadata(value, max_len, preserve_url)
+        results.append(cleaned[value])
+    return results
+
 def ensure_complete_sentences(text):
     """Ensure the text ends with complete sentences"""
     if not text:
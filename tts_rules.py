@@ -0,0 +1,121 @@
+import re
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Spoken forms for acronyms some TTS engines mispronounce. Add entries here;
+# they are matched in the same pass as everything else.
+TTS_TERMS = {
+    'API': 'A-P-I',
+    'URL': 'U-R-L',
+    'HTTP': 'H-T-T-P',
+}
+
+# Patterns for the name part of "<name> <version>" model names, rewritten as
+# "<name>-<version>" (e.g. "GPT 4" -> "GPT-4"). Add alternatives here to cover
+# more model families; each must start with an uppercase ASCII letter.
+TTS_MODEL_NAME_PATTERNS = [
+    r'[A-Z]+',
+]
+
+# Abbreviation rewrites as (pattern, replacement, required substrings), applied
+# in order. They overlap with each other, so they stay sequential, but they run
+# only when the text contains something that looks like a dotted abbreviation
+# (see _ABBREVIATION_HINT), and each rule is skipped when a required substring
+# is missing.
+TTS_ABBREVIATION_RULES = [
+    (r'\bA\.\s*I\.\b', 'AI', ('A.', 'I.')),
+    (r'\bU\.\s*S\.\b', 'US', ('U.', 'S.')),
+    (r'\bU\.\s*K\.\b', 'UK', ('U.', 'K.')),
+    # Acronyms with periods and spaces (e.g., "N. A. S. A." -> "NASA")
+    (r'\b([A-Z])\.\s*([A-Z])\.\s*([A-Z])\.\s*([A-Z])\.\b', r'\1\2\3\4', ()),
+    (r'\b([A-Z])\.\s*([A-Z])\.\s*([A-Z])\.\b', r'\1\2\3', ()),
+    # Company names with periods (e.g., "Inc." -> "Incorporated")
+    (r'\bInc\.\b', 'Incorporated', ('Inc.',)),
+    (r'\bLtd\.\b', 'Limited', ('Ltd.',)),
+    (r'\bCorp\.\b', 'Corporation', ('Corp.',)),
+]
+
+# Every default abbreviation rule needs one of these to match, so texts without them skip the rules
+_ABBREVIATION_HINT = re.compile(r'[A-Z]\.\s*[A-Z]|(?:Inc|Ltd|Corp)\.\w')
+
+
+class TTSRuleEngine:
+    """Compiles the rewrite tables into as few regex passes as possible.
+
+    Number joins ("2. 5" -> "2.5"), model names, acronym terms and whitespace
+    collapsing share one alternation with a dispatch on the matched group. The
+    abbreviation rules, which depend on each other's order, run as an extra set
+    of passes only when the text can contain one.
+    """
+
+    def __init__(self, terms=None, model_name_patterns=None, abbreviation_rules=None):
+        self.terms = dict(TTS_TERMS if terms is None else terms)
+        model_names = '|'.join(f'(?:{pattern})' for pattern in
+                               (TTS_MODEL_NAME_PATTERNS if model_name_patterns is None else model_name_patterns))
+        term_names = '|'.join(re.escape(term) for term in sorted(self.terms, key=len, reverse=True)) or r'(?!)'
+
+        number = r'(?P<number>(?<=\d)\.\s+(?=\d))'
+        model = rf'\b(?P<name>{model_names})\s+(?P<version>\d+(?:\.\d+)?)\b'
+        term = rf'\b(?P<term>{term_names})\b'
+        space = r'(?P<space>\s{2,}|[^\S ])'
+
+        # A cheap lookahead on the characters an alternative can start with lets
+        # the engine skip most positions (ordinary letters and single spaces)
+        # without trying every branch
+        term_starts = ''.join(sorted({re.escape(term[0]) for term in self.terms}))
+        word_start = f'A-Z{term_starts}'
+        space_start = r'[^\S ]| \s'
+
+        self._all = re.compile(
+            rf'(?=[.{word_start}]|{space_start})(?:{"|".join((number, model, term, space))})')
+        self._numbers_and_models = re.compile(rf'(?=[.A-Z])(?:{number}|{model})')
+        self._terms_and_space = re.compile(rf'(?=[{word_start}]|{space_start})(?:{term}|{space})')
+        self._abbreviations = [
+            (re.compile(pattern), replacement, required)
+            for pattern, replacement, required in
+            (TTS_ABBREVIATION_RULES if abbreviation_rules is None else abbreviation_rules)
+        ]
+        # Custom abbreviation rules always run since the hint only covers the defaults
+        self._abbreviation_hint = _ABBREVIATION_HINT if abbreviation_rules is None else None
+
+    def _rewrite(self, match):
+        group = match.lastgroup
+        if group == 'number':
+            return '.'
+        if group == 'term':
+            return self.terms[match.group('term')]
+        if group == 'space':
+            return ' '
+        # Model name; its name part gets the spoken form when it is also a term
+        name = match.group('name')
+        return f"{self.terms.get(name, name)}-{match.group('version')}"
+
+    def _rewrite_model_only(self, match):
+        if match.lastgroup == 'number':
+            return '.'
+        return f"{match.group('name')}-{match.group('version')}"
+
+    def apply(self, text):
+        if self._abbreviation_hint is not None and not self._abbreviation_hint.search(text):
+            return self._all.sub(self._rewrite, text).strip()
+
+        # Keep the original rule order: numbers and model names, abbreviations, then terms
+        text = self._numbers_and_models.sub(self._rewrite_model_only, text)
+        for pattern, replacement, required in self._abbreviations:
+            if all(literal in text for literal in required):
+                text = pattern.sub(replacement, text)
+        return self._terms_and_space.sub(self._rewrite, text).strip()
+
+
+_default_engine = TTSRuleEngine()
+
+
+def preprocess_for_tts(text):
+    """Preprocess text to make it more TTS-friendly"""
+    return _default_engine.apply(text)
+
+
+def preprocess_many_for_tts(texts):
+    """Batch version of preprocess_for_tts"""
+    return [_default_engine.apply(text) for text in texts]
@@ -0,0 +1,333 @@
+"""Vector store backends behind the Pinecone Index interface the rest of the code uses.
+
+Both backends expose the same subset of pinecone.Index:
+
+    upsert(vectors=[{'id', 'values', 'metadata'}, ...])
+    flush()                             -> local only: persist buffered writes
+    fetch(ids=[...]).vectors            -> {id: record with .id, .values, .metadata}
+    delete(ids=[...])
+    list(limit=100)                     -> yields pages of IDs
+    query(vector=..., top_k=..., include_metadata=..., filter=...).matches
+                                        -> records with .id, .score, .metadata
+    describe_index_stats()              -> .total_vector_count, .dimension
+
+VECTOR_STORE picks the backend: "pinecone" (hosted) or "local", a
+LocalVectorIndex under LOCAL_INDEX_DIR that needs no network at all.
+"""
+import glob
+import json
+import logging
+import os
+import sqlite3
+import threading
+import types
+import uuid
+
+import numpy as np
+
+from config import VECTOR_STORE, LOCAL_INDEX_DIR, PINECONE_INDEX_NAME, get_pinecone
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+
+
+def _any_value(value, test):
+    """Apply test to a metadata value, or to any element of a list value"""
+    if isinstance(value, list):
+        return any(test(item) for item in value)
+    return test(value)
+
+
+def _compare(value, test):
+    try:
+        return value is not _MISSING and _any_value(value, test)
+    except TypeError:
+        return False
+
+
+_OPERATORS = {
+    '$eq': lambda value, arg: _compare(value, lambda v: v == arg),
+    '$ne': lambda value, arg: not _compare(value, lambda v: v == arg),
+    '$gt': lambda value, arg: _compare(value, lambda v: v > arg),
+    '$gte': lambda value, arg: _compare(value, lambda v: v >= arg),
+    '$lt': lambda value, arg: _compare(value, lambda v: v < arg),
+    '$lte': lambda value, arg: _compare(value, lambda v: v <= arg),
+    '$in': lambda value, arg: _compare(value, lambda v: v in arg),
+    '$nin': lambda value, arg: not _compare(value, lambda v: v in arg),
+    '$exists': lambda value, arg: (value is not _MISSING) == bool(arg),
+}
+
+
+def matches_filter(metadata, metadata_filter):
+    """Evaluate a Pinecone-style metadata filter ($eq, $in, $gte, $and, $or, ...) against one record"""
+    for key, condition in metadata_filter.items():
+        if key == '$and':
+            if not all(matches_filter(metadata, part) for part in condition):
+                return False
+        elif key == '$or':
+            if not any(matches_filter(metadata, part) for part in condition):
+                return False
+        else:
+            value = metadata.get(key, _MISSING)
+            if not isinstance(condition, dict):
+                condition = {'$eq': condition}
+            for operator, arg in condition.items():
+                if operator not in _OPERATORS:
+                    raise ValueError(f"Unsupported filter operator: {operator}")
+                if not _OPERATORS[operator](value, arg):
+                    return False
+    return True
+
+
+class LocalVectorIndex:
+    """Embedded vector index: a memory-mapped NumPy matrix plus SQLite metadata.
+
+    upsert and delete only buffer changes in memory, where this process's
+    reads already see them; flush() writes them out as one new generation.
+    A generation is a vectors-<id>.npy file plus the SQLite transaction that
+    points the index at it (and rewrites the ID/row/metadata table). That
+    transaction is the atomic switch, so readers in other processes (the app)
+    always see a complete generation. A run therefore rewrites the matrix once
+    per flush, not once per upsert batch; unflushed changes are lost if the
+    process dies. Queries are a cosine top-k over the matrix with numpy.
+    Intended for a single writing process and indexes of up to a few hundred
+    thousand vectors (each flush rewrites the whole matrix).
+    """
+
+    def __init__(self, directory=LOCAL_INDEX_DIR):
+        self.directory = directory
+        self._lock = threading.RLock()
+        os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(os.path.join(directory, 'metadata.sqlite3'), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS records (
+                id TEXT PRIMARY KEY,
+                row INTEGER NOT NULL,
+                metadata TEXT NOT NULL
+            )
+        """)
+        self._conn.execute("CREATE TABLE IF NOT EXISTS state (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+        self._conn.commit()
+        self._data_version = None
+        # Unflushed changes: id -> (vector, metadata), or None for a delete
+        self._pending = {}
+        self._cleared = False
+        self._merged = None
+        self._load()
+
+    def _load(self):
+        """Read the current generation: IDs, metadata and the mapped vector matrix"""
+        for _ in range(3):
+            self._data_version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+            # One read transaction, so state and records come from the same commit
+            self._conn.execute("BEGIN")
+            try:
+                state = dict(self._conn.execute("SELECT key, value FROM state").fetchall())
+                rows = self._conn.execute("SELECT id, metadata FROM records ORDER BY row").fetchall()
+            finally:
+                self._conn.execute("COMMIT")
+
+            dimension = int(state.get('dimension', 0))
+            vectors_file = state.get('vectors_file', '')
+            try:
+                if vectors_file:
+                    vectors = np.load(os.path.join(self.directory, vectors_file), mmap_mode='r')
+                else:
+                    vectors = np.zeros((0, dimension), dtype=np.float32)
+                break
+            except FileNotFoundError:
+                # A writer replaced the generation between our read and the open; read it again
+                continue
+        else:
+            raise RuntimeError(f"Local vector index {self.directory} keeps changing underneath us")
+
+        self.dimension = dimension
+        self._vectors = vectors
+        self._norms = np.linalg.norm(vectors, axis=1) if len(vectors) else np.zeros(0, dtype=np.float32)
+        self._ids = [record_id for record_id, _ in rows]
+        self._metadata = [json.loads(metadata) for _, metadata in rows]
+        self._rows = {record_id: row for row, record_id in enumerate(self._ids)}
+        self._vectors_file = vectors_file
+        self._merged = None
+
+    def _refresh(self):
+        """Pick up a generation committed by another process"""
+        if self._conn.execute("PRAGMA data_version").fetchone()[0] != self._data_version:
+            self._load()
+
+    def _refresh_if_clean(self):
+        """Refresh from disk unless this process has unflushed changes layered on the current generation"""
+        if not self._pending and not self._cleared:
+            self._refresh()
+
+    def _view(self):
+        """(ids, metadata, vectors, norms, rows) of the flushed generation plus unflushed changes"""
+        if not self._pending and not self._cleared:
+            return self._ids, self._metadata, self._vectors, self._norms, self._rows
+        if self._merged is None:
+            keep = [] if self._cleared else \
+                [row for row, record_id in enumerate(self._ids) if record_id not in self._pending]
+            added = [(record_id, change) for record_id, change in self._pending.items() if change is not None]
+            ids = [self._ids[row] for row in keep] + [record_id for record_id, _ in added]
+            metadata = [self._metadata[row] for row in keep] + [meta for _, (_, meta) in added]
+            vectors = np.empty((len(ids), self.dimension), dtype=np.float32)
+            if keep:
+                vectors[:len(keep)] = self._vectors[keep]
+            for offset, (_, (vector, _)) in enumerate(added, len(keep)):
+                vectors[offset] = vector
+            norms = np.linalg.norm(vectors, axis=1) if len(vectors) else np.zeros(0, dtype=np.float32)
+            self._merged = (ids, metadata, vectors, norms,
+                            {record_id: row for row, record_id in enumerate(ids)})
+        return self._merged
+
+    def _commit(self, ids, metadata, vectors):
+        """Write vectors to a new generation file and switch the index to it in one transaction"""
+        vectors_file = ''
+        if len(ids):
+            vectors_file = f"vectors-{uuid.uuid4().hex}.npy"
+            with open(os.path.join(self.directory, vectors_file), 'wb') as f:
+                np.save(f, np.ascontiguousarray(vectors, dtype=np.float32))
+                f.flush()
+                os.fsync(f.fileno())
+
+        with self._conn:
+            self._conn.execute("DELETE FROM records")
+            self._conn.executemany(
+                "INSERT INTO records (id, row, metadata) VALUES (?, ?, ?)",
+                ((record_id, row, json.dumps(meta)) for row, (record_id, meta) in enumerate(zip(ids, metadata))))
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO state (key, value) VALUES (?, ?)",
+                [('vectors_file', vectors_file), ('dimension', str(self.dimension))])
+
+        # Older generations stay readable for processes that still map them (POSIX keeps unlinked files)
+        for path in glob.glob(os.path.join(self.directory, 'vectors-*.npy')):
+            if os.path.basename(path) != vectors_file:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+        self._pending = {}
+        self._cleared = False
+        self._load()
+
+    def flush(self):
+        """Write buffered upserts and deletes to disk as one new generation"""
+        with self._lock:
+            if not self._pending and not self._cleared:
+                return
+            ids, metadata, vectors, _, _ = self._view()
+            logger.info(f"🗄️ Flushing {len(self._pending)} changes to the local vector index ({len(ids)} vectors)")
+            self._commit(ids, metadata, vectors)
+
+    def upsert(self, vectors, namespace=None, **kwargs):
+        """Buffer inserts/replacements given as dicts with id/values/metadata or (id, values, metadata) tuples"""
+        records = [record if isinstance(record, dict) else
+                   {'id': record[0], 'values': record[1], 'metadata': record[2] if len(record) > 2 else {}}
+                   for record in vectors]
+        if not records:
+            return types.SimpleNamespace(upserted_count=0)
+
+        with self._lock:
+            self._refresh_if_clean()
+            dimension = len(records[0]['values'])
+            if self.dimension and dimension != self.dimension:
+                raise ValueError(f"Vector dimension {dimension} does not match index dimension {self.dimension}")
+            self.dimension = dimension
+
+            for record in records:
+                vector = np.asarray(record['values'], dtype=np.float32)
+                if vector.shape != (dimension,):
+                    raise ValueError(f"Vector for {record['id']} has shape {vector.shape}, expected ({dimension},)")
+                # Re-inserting moves the record to the end of the merged view
+                self._pending.pop(record['id'], None)
+                self._pending[record['id']] = (vector, record.get('metadata') or {})
+            self._merged = None
+        return types.SimpleNamespace(upserted_count=len(records))
+
+    def delete(self, ids=None, delete_all=False, namespace=None, **kwargs):
+        """Buffer deletes of the given IDs, or of every record"""
+        with self._lock:
+            self._refresh_if_clean()
+            if delete_all:
+                self._pending = {}
+                self._cleared = True
+            else:
+                for record_id in ids or []:
+                    self._pending[record_id] = None
+            self._merged = None
+        return {}
+
+    def fetch(self, ids, namespace=None, **kwargs):
+        with self._lock:
+            self._refresh_if_clean()
+            record_ids, metadata, vectors, _, rows = self._view()
+        found = {}
+        for record_id in ids:
+            row = rows.get(record_id)
+            if row is not None:
+                found[record_id] = types.SimpleNamespace(id=record_id, values=vectors[row].tolist(),
+                                                         metadata=metadata[row])
+        return types.SimpleNamespace(vectors=found, namespace=namespace or '')
+
+    def list(self, prefix=None, limit=100, namespace=None, **kwargs):
+        """Yield pages of up to limit IDs, optionally only those starting with prefix"""
+        with self._lock:
+            self._refresh_if_clean()
+            ids = [record_id for record_id in self._view()[0] if not prefix or record_id.startswith(prefix)]
+        for start in range(0, len(ids), limit):
+            yield ids[start:start + limit]
+
+    def describe_index_stats(self, **kwargs):
+        with self._lock:
+            self._refresh_if_clean()
+            return types.SimpleNamespace(total_vector_count=len(self._view()[0]), dimension=self.dimension,
+                                         namespaces={})
+
+    def query(self, vector=None, top_k=10, include_metadata=False, include_values=False, filter=None,
+              id=None, namespace=None, **kwargs):
+        """Cosine top_k over all records (optionally metadata-filtered), best first"""
+        with self._lock:
+            self._refresh_if_clean()
+            ids, metadata, vectors, norms, rows = self._view()
+            if id is not None:
+                vector = vectors[rows[id]] if id in rows else None
+
+        if vector is None or not ids or top_k <= 0:
+            return types.SimpleNamespace(matches=[], namespace=namespace or '')
+
+        query = np.asarray(vector, dtype=np.float32)
+        denominator = norms * float(np.linalg.norm(query))
+        scores = np.divide(vectors @ query, denominator, out=np.zeros(len(ids), dtype=np.float32),
+                           where=denominator > 0)
+
+        candidates = len(ids)
+        if filter:
+            mask = np.fromiter((matches_filter(meta, filter) for meta in metadata), dtype=bool, count=len(ids))
+            candidates = int(mask.sum())
+            scores = np.where(mask, scores, -np.inf)
+
+        k = min(top_k, candidates)
+        if k <= 0:
+            return types.SimpleNamespace(matches=[], namespace=namespace or '')
+        top = np.argpartition(-scores, k - 1)[:k] if k < len(ids) else np.arange(len(ids))
+        top = top[np.argsort(-scores[top], kind='stable')]
+
+        return types.SimpleNamespace(matches=[
+            types.SimpleNamespace(id=ids[row], score=float(scores[row]),
+                                  metadata=metadata[row] if include_metadata else None,
+                                  values=vectors[row].tolist() if include_values else [])
+            for row in top
+        ], namespace=namespace or '')
+
+
+def open_index(backend=None):
+    """Open the configured vector index: the hosted Pinecone index or the local store"""
+    backend = backend or VECTOR_STORE
+    if backend == 'local':
+        logger.info(f"🗄️ Using local vector index at {LOCAL_INDEX_DIR}")
+        return LocalVectorIndex(LOCAL_INDEX_DIR)
+    if backend == 'pinecone':
+        return get_pinecone().Index(PINECONE_INDEX_NAME)
+    raise ValueError(f"Unknown VECTOR_STORE {backend!r}; expected 'pinecone' or 'local'")